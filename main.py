@@ -16,14 +16,21 @@ from modules.project_initializer import create_project_folder
 from modules.content_generator import generate_content
 from modules.keyword_extractor import extract_keywords
 from modules.video_fetcher import fetch_videos
-from modules.video_processor import process_videos
+from modules.video_processor import process_videos_with_status, get_ffmpeg_paths
 from modules.tts_generator import generate_tts
-from modules.subtitle_renderer import render_subtitles
-from modules.audio_merger import merge_audio
+from modules.subtitle_renderer import render_subtitles, prepare_word_level_subtitles
+from modules.render_planner import render_single_pass
+from modules.audio_merger import merge_audio_with_status
 from modules.closing_scene_adder import add_closing_scene
 from modules.metadata_writer import write_metadata
 from modules.youtube_uploader import YouTubeUploader
 from modules.topic_generator import generate_topic, generate_english_topic, generate_topic_international  # İki fonksiyonu da import edelim
+from utils.stage_graph import StageGraph, StreamChannel, Fallback, unwrap
+from utils.worker_pool import run_worker_pool
+from utils.checkpoint import StageManifest, hash_inputs
+from utils.http_client import close_session
+from utils.rate_limiter import backoff_delay
+from utils.media_info import media_duration
 
 # Force exit after a certain delay - use as a safety net
 def force_exit():
@@ -42,7 +49,8 @@ def load_config():
 
 async def process_single_video(topic, openai_api_key="", pexels_api_key="", pixabay_api_key="", youtube_api_key="", 
                               language="tr", tts_language="tr", subtitle_language="tr", max_videos=None, 
-                              continuous_mode=False, log_callback=None, upload_to_youtube=True):
+                              continuous_mode=False, log_callback=None, upload_to_youtube=True, stage_limits=None,
+                              project_folder=None):
     """
     Tek bir video işleme süreci için asenkron fonksiyon
     
@@ -59,6 +67,8 @@ async def process_single_video(topic, openai_api_key="", pexels_api_key="", pixa
         continuous_mode (bool): Sürekli çalışma modu
         log_callback (callable): Log mesajlarını göndermek için callback fonksiyonu
         upload_to_youtube (bool): Video YouTube'a yüklensin mi
+        stage_limits (dict): Paralel işler arasında paylaşılan "network" ve "cpu" eşzamanlılık sınırları
+        project_folder (str): Devam ettirilecek mevcut proje klasörü (None ise yeni klasör oluşturulur)
         
     Returns:
         tuple: (success, video_url) - İşlem başarılı mı ve video URL'si
@@ -91,188 +101,345 @@ async def process_single_video(topic, openai_api_key="", pexels_api_key="", pixa
             youtube_api_key = youtube_api_key or config.get("youtube_api_key", "")
         
         # 2. PROJECT INITIALIZATION - ADIM 2: Proje Klasörü Oluşturma
-        project_folder = create_project_folder()
-        log_message(f"Project folder created: {project_folder}")
+        if project_folder and os.path.isdir(project_folder):
+            # Manifest çıktı dosyalarını mutlak yollarla izler
+            project_folder = os.path.abspath(project_folder)
+            log_message(f"Mevcut proje klasörüne devam ediliyor: {project_folder}")
+        else:
+            project_folder = create_project_folder()
+            log_message(f"Project folder created: {project_folder}")
+        
+        # Tamamlanan adımlar proje klasöründeki manifest dosyasına yazılır,
+        # böylece yarıda kalan bir proje --resume ile devam ettirilebilir
+        manifest = StageManifest(project_folder)
+        manifest.set_job(
+            topic=topic,
+            language=language,
+            tts_language=tts_language,
+            subtitle_language=subtitle_language
+        )
+        
+        default_tts_voice = config.get("default_tts_voice", "alloy") if config else "alloy"
+        
+        video_resolution = config.get("video_resolution", "1080x1920") if config else "1080x1920"
+        # Çözünürlük string ise, tuple'a çevir
+        if isinstance(video_resolution, str) and "x" in video_resolution:
+            width, height = map(int, video_resolution.split("x"))
+            resolution_tuple = (width, height)
+        else:
+            resolution_tuple = (1080, 1920)  # Varsayılan çözünürlük
+        
+        # Tek geçişli render: kırpma, ölçekleme, birleştirme, ses, altyazı ve kapanış tek kodlamada
+        single_pass_render = config.get("single_pass_render", False) if config else False
+        use_subtitles = config.get("use_subtitles", False) if config else False
+        # Akışlı içerik: cümleler model yazarken TTS'e aktarılır
+        stream_content = config.get("stream_content", False) if config else False
+        sentence_stream = None
+        
+        # Adımlar bir bağımlılık grafiği olarak tanımlanır. TTS ile video indirme (fetch)
+        # paralel çalışır; video işleme klipleri seslendirme süresine göre planladığı için
+        # ikisini de bekler ve dallar merge_audio adımında birleşir.
         
         # 3. CONTENT GENERATION - ADIM 3: İçerik Oluşturma (İçerik dili kullanılır)
-        try:
-            # İçerik oluşturmadan önce kullanılan dili ayrıntılı log'la
-            log_message(f"İçerik oluşturma başlatılıyor - İçerik dili: {language}")
-            
-            content_data = generate_content(topic, language=language)
-            log_message(f"{language} dilinde içerik oluşturuldu")
-            
-            # İçerik oluşturma başarılı mı kontrol et ve dili doğrula
-            if content_data and "response" in content_data and content_data["response"]:
-                log_message(f"İçerik başarıyla oluşturuldu - Oluşturulan {len(content_data['response'])} cümle")
-                # İlk cümleyi log'la (uzun olmayacak şekilde)
-                first_sentence = content_data["response"][0]
-                log_message(f"İlk cümle örneği: {first_sentence[:50]}...")
-            
-            # İçerik metinlerini dosyalara kaydet
-            for i, sentence in enumerate(content_data["response"]):
-                with open(os.path.join(project_folder, f"text_{i+1:02d}.txt"), "w", encoding="utf-8") as f:
-                    f.write(sentence)
-            log_message("Content saved to text files")
-        except Exception as e:
-            log_message(f"İçerik oluşturma hatası: {str(e)}", True)
-            return False, None
+        def content_stage(results):
+            try:
+                # İçerik oluşturmadan önce kullanılan dili ayrıntılı log'la
+                log_message(f"İçerik oluşturma başlatılıyor - İçerik dili: {language}")
+                
+                if sentence_stream is not None:
+                    streamed = []
+                    
+                    def on_sentence(sentence):
+                        streamed.append(sentence)
+                        sentence_stream.put(sentence)
+                    
+                    try:
+                        content_data = generate_content(topic, language=language, on_sentence=on_sentence)
+                        # Akış dışı dönen cümleler (örn. API anahtarı yoksa yedek içerik) de aktarılır
+                        for sentence in content_data["response"][len(streamed):]:
+                            sentence_stream.put(sentence)
+                    finally:
+                        sentence_stream.close()
+                else:
+                    content_data = generate_content(topic, language=language)
+                log_message(f"{language} dilinde içerik oluşturuldu")
+                
+                # İçerik oluşturma başarılı mı kontrol et ve dili doğrula
+                if content_data and "response" in content_data and content_data["response"]:
+                    log_message(f"İçerik başarıyla oluşturuldu - Oluşturulan {len(content_data['response'])} cümle")
+                    # İlk cümleyi log'la (uzun olmayacak şekilde)
+                    first_sentence = content_data["response"][0]
+                    log_message(f"İlk cümle örneği: {first_sentence[:50]}...")
+                
+                # İçerik metinlerini dosyalara kaydet
+                for i, sentence in enumerate(content_data["response"]):
+                    with open(os.path.join(project_folder, f"text_{i+1:02d}.txt"), "w", encoding="utf-8") as f:
+                        f.write(sentence)
+                log_message("Content saved to text files")
+                return content_data
+            except Exception as e:
+                log_message(f"İçerik oluşturma hatası: {str(e)}", True)
+                raise
         
         # 4. KEYWORD EXTRACTION - ADIM 4: Anahtar Kelime Çıkarma
-        try:
-            keywords = extract_keywords(content_data["response"], topic, language=language, openai_api_key=openai_api_key)
-            log_message(f"Keywords: {keywords}")
-            
-            # Anahtar kelimeleri bir dosyaya kaydet (video işleme için kullanılacak)
-            with open(os.path.join(project_folder, "pexels_keywords.txt"), "w", encoding="utf-8") as f:
-                for keyword in keywords:
-                    f.write(f"{keyword}\n")
-        except Exception as e:
-            log_message(f"Anahtar kelime çıkarma hatası: {str(e)}", True)
-            keywords = [topic]  # En azından konu başlığını kullan
+        def keywords_stage(results):
+            content_data = results["content"]
+            try:
+                keywords = extract_keywords(content_data["response"], topic, language=language, openai_api_key=openai_api_key)
+                log_message(f"Keywords: {keywords}")
+                
+                # Anahtar kelimeleri bir dosyaya kaydet (video işleme için kullanılacak)
+                with open(os.path.join(project_folder, "pexels_keywords.txt"), "w", encoding="utf-8") as f:
+                    for keyword in keywords:
+                        f.write(f"{keyword}\n")
+            except Exception as e:
+                log_message(f"Anahtar kelime çıkarma hatası: {str(e)}", True)
+                # En azından konu başlığını kullan; adım tamamlanmış sayılmaz
+                return Fallback([topic])
+            return keywords
         
         # 5. VIDEO FETCH - ADIM 5: Video İndirme
-        try:
-            videos = await fetch_videos(
-                keywords,
-                pexels_api_key,
-                openai_api_key,
-                topic,
-                content_data["response"],
-                project_folder,
-                min_score=3.0,
-                language=language  # Çeviriler için kullanılır, arama her zaman İngilizce
-            )
-            log_message(f"{len(videos)} videos downloaded")
-            
-            # Video yoksa veya indirilemezse, işleme devam etme
-            if not videos:
-                log_message("Hiç video indirilemedi veya bulunamadı.", True)
-                # İşleme devam edebiliriz ama boş bir video ile
-            
-        except Exception as e:
-            log_message(f"Video indirme hatası: {str(e)}", True)
-            videos = []  # Boş liste ile devam et
+        async def fetch_stage(results):
+            try:
+                videos = await fetch_videos(
+                    results["keywords"],
+                    pexels_api_key,
+                    openai_api_key,
+                    topic,
+                    results["content"]["response"],
+                    project_folder,
+                    min_score=3.0,
+                    language=language,  # Çeviriler için kullanılır, arama her zaman İngilizce
+                    target_resolution=resolution_tuple
+                )
+                log_message(f"{len(videos)} videos downloaded")
+                
+                # Video yoksa veya indirilemezse, işleme devam etme
+                if not videos:
+                    log_message("Hiç video indirilemedi veya bulunamadı.", True)
+                    # İşleme devam edebiliriz ama boş bir video ile
+                
+            except Exception as e:
+                log_message(f"Video indirme hatası: {str(e)}", True)
+                return Fallback([])  # Boş liste ile devam et
+            return videos
         
         # 6. VIDEO PROCESSING - ADIM 6: Video İşleme
-        try:
-            video_resolution = config.get("video_resolution", "1080x1920") if config else "1080x1920"
-            # Çözünürlük string ise, tuple'a çevir
-            if isinstance(video_resolution, str) and "x" in video_resolution:
-                width, height = map(int, video_resolution.split("x"))
-                resolution_tuple = (width, height)
-            else:
-                resolution_tuple = (1080, 1920)  # Varsayılan çözünürlük
+        def process_stage(results):
+            try:
+                # Klipler seslendirme süresine göre planlanır; böylece video sonradan yavaşlatılmaz veya kırpılmaz
+                ffprobe_path = get_ffmpeg_paths()[1]
+                narration_duration = sum(media_duration(audio_file, ffprobe_path) or 0 for audio_file in results.get("tts") or [])
+                processed_video, processed = process_videos_with_status(results["fetch"], resolution_tuple, project_folder,
+                                                                        target_duration=narration_duration or None)
+                if not processed:
+                    # Yer tutucu video bu çalışmada kullanılır ama tamamlanmış sayılmaz
+                    log_message("Videolar işlenemedi, yer tutucu video kullanılıyor", True)
+                    return Fallback(processed_video)
+                log_message("Videos processed")
                 
-            processed_video = process_videos(videos, resolution_tuple, project_folder)
-            log_message("Videos processed")
-            
-            # İşlenmiş video yolunu kontrol et
-            if not os.path.exists(processed_video):
-                log_message(f"İşlenmiş video dosyası bulunamadı: {processed_video}", True)
-                # İşlem devam edebilir, ses dosyaları oluşturulabilir
-            
-        except Exception as e:
-            log_message(f"Video işleme hatası: {str(e)}", True)
-            processed_video = os.path.join(project_folder, "processed_video.mp4")
-            # Video işleme başarısız olsa bile, ses oluşturmaya devam edebiliriz
+                # İşlenmiş video yolunu kontrol et
+                if not os.path.exists(processed_video):
+                    log_message(f"İşlenmiş video dosyası bulunamadı: {processed_video}", True)
+                    # İşlem devam edebilir, ses dosyaları oluşturulabilir
+                    return Fallback(processed_video)
+                
+            except Exception as e:
+                log_message(f"Video işleme hatası: {str(e)}", True)
+                # Video işleme başarısız olsa bile, ses oluşturmaya devam edebiliriz
+                return Fallback(os.path.join(project_folder, "processed_video.mp4"))
+            return processed_video
         
         # 7. TTS GENERATION - ADIM 7: TTS (Text-to-Speech) Oluşturma
-        try:
-            default_tts_voice = config.get("default_tts_voice", "alloy") if config else "alloy"
-            audio_files = generate_tts(
-                content_data["response"],
-                openai_api_key,
-                default_tts_voice,
-                project_folder,
-                language=tts_language  # TTS dili kullanılır
-            )
-            log_message(f"{len(audio_files)} audio files created")
-            
-            # Ses dosyası yoksa, işleme devam etme
-            if not audio_files:
-                log_message("Ses dosyaları oluşturulamadı.", True)
-                # İşlem devam edebilir ama altyazı ile
-            
-        except Exception as e:
-            log_message(f"TTS oluşturma hatası: {str(e)}", True)
-            audio_files = []  # Boş liste ile devam et
+        def tts_stage(results):
+            try:
+                audio_files = generate_tts(
+                    sentence_stream if sentence_stream is not None else results["content"]["response"],
+                    openai_api_key,
+                    default_tts_voice,
+                    project_folder,
+                    language=tts_language  # TTS dili kullanılır
+                )
+                log_message(f"{len(audio_files)} audio files created")
+                
+                # Ses dosyası yoksa, işleme devam etme
+                if not audio_files:
+                    log_message("Ses dosyaları oluşturulamadı.", True)
+                    # İşlem devam edebilir ama altyazı ile
+                
+            except Exception as e:
+                log_message(f"TTS oluşturma hatası: {str(e)}", True)
+                return Fallback([])  # Boş liste ile devam et
+            return audio_files
         
         # 8. AUDIO MERGING - ADIM 8: Ses Birleştirme
-        try:
-            if audio_files:
-                video_with_audio = merge_audio(processed_video, audio_files, project_folder)
-                log_message("Audio merged")
-            else:
-                video_with_audio = processed_video  # Ses yoksa orijinal video ile devam et
-                log_message("Ses dosyası olmadığı için seslendirme atlandı", True)
-        except Exception as e:
-            log_message(f"Ses birleştirme hatası: {str(e)}", True)
-            video_with_audio = processed_video  # Orijinal video ile devam et
+        def merge_stage(results):
+            processed_video = results["process"]
+            audio_files = results["tts"]
+            try:
+                if audio_files:
+                    video_with_audio, merged = merge_audio_with_status(processed_video, audio_files, project_folder)
+                    if not merged:
+                        log_message("Ses eklenemedi, sessiz video ile devam ediliyor", True)
+                        return Fallback(video_with_audio)
+                    log_message("Audio merged")
+                else:
+                    video_with_audio = processed_video  # Ses yoksa orijinal video ile devam et
+                    log_message("Ses dosyası olmadığı için seslendirme atlandı", True)
+            except Exception as e:
+                log_message(f"Ses birleştirme hatası: {str(e)}", True)
+                return Fallback(processed_video)  # Orijinal video ile devam et
+            return video_with_audio
         
         # 9. SUBTITLE RENDERING - ADIM 9: Altyazı Oluşturma
-        try:
-            font_path = config.get("font_path", "") if config else ""
-            use_subtitles = config.get("use_subtitles", False) if config else False
-            
-            # Altyazı gösterilmesi seçeneğine göre işlem yap
-            if use_subtitles:
-                log_message(f"Altyazılar oluşturuluyor. Dil: {subtitle_language}")
-                subtitled_video = render_subtitles(
-                    video_with_audio,
-                    content_data["response"],
-                    font_path,
-                    project_folder,
-                    subtitle_language=subtitle_language,  # Altyazı dili kullanılır
-                    content_language=language,           # İçerik dili gerekirse çeviri için kullanılır
-                    openai_api_key=openai_api_key
-                )
-                log_message(f"Subtitles added in {subtitle_language} language")
-            else:
-                log_message("Altyazı gösterme devre dışı bırakıldı, işlem atlanıyor")
-                subtitled_video = video_with_audio  # Altyazısız olarak devam et
+        def subtitles_stage(results):
+            video_with_audio = results["merge"]
+            try:
+                font_path = config.get("font_path", "") if config else ""
                 
-        except Exception as e:
-            log_message(f"Altyazı oluşturma hatası: {str(e)}", True)
-            subtitled_video = video_with_audio  # Altyazısız video ile devam et
+                # Altyazı gösterilmesi seçeneğine göre işlem yap
+                if use_subtitles:
+                    log_message(f"Altyazılar oluşturuluyor. Dil: {subtitle_language}")
+                    subtitled_video = render_subtitles(
+                        video_with_audio,
+                        results["content"]["response"],
+                        font_path,
+                        project_folder,
+                        subtitle_language=subtitle_language,  # Altyazı dili kullanılır
+                        content_language=language,           # İçerik dili gerekirse çeviri için kullanılır
+                        openai_api_key=openai_api_key
+                    )
+                    log_message(f"Subtitles added in {subtitle_language} language")
+                else:
+                    log_message("Altyazı gösterme devre dışı bırakıldı, işlem atlanıyor")
+                    subtitled_video = video_with_audio  # Altyazısız olarak devam et
+                    
+            except Exception as e:
+                log_message(f"Altyazı oluşturma hatası: {str(e)}", True)
+                return Fallback(video_with_audio)  # Altyazısız video ile devam et
+            return subtitled_video
         
         # 10. CLOSING SCENE - ADIM 10: Kapanış Sahnesi Ekleme
-        try:
-            closing_video_path = config.get("closing_video_path", "") if config else ""
-            final_video = add_closing_scene(subtitled_video, closing_video_path, project_folder)
-            log_message("Closing scene added")
-            final_video_path = final_video  # Son video yolunu kaydet
-        except Exception as e:
-            log_message(f"Kapanış sahnesi ekleme hatası: {str(e)}", True)
-            final_video_path = subtitled_video  # Kapanış sahnesi olmadan devam et
+        def closing_stage(results):
+            subtitled_video = results["subtitles"]
+            try:
+                closing_video_path = config.get("closing_video_path", "") if config else ""
+                final_video = add_closing_scene(subtitled_video, closing_video_path, project_folder)
+                log_message("Closing scene added")
+                return final_video  # Son video yolunu kaydet
+            except Exception as e:
+                log_message(f"Kapanış sahnesi ekleme hatası: {str(e)}", True)
+                return Fallback(subtitled_video)  # Kapanış sahnesi olmadan devam et
         
         # 11. METADATA CREATION - ADIM 11: Metadata Oluşturma
+        def metadata_stage(results):
+            keywords = results["keywords"]
+            content_data = results["content"]
+            try:
+                metadata = write_metadata(
+                    project_folder, 
+                    topic, 
+                    keywords, 
+                    "gpt-4o", 
+                    default_tts_voice, 
+                    language=language,
+                    tts_language=tts_language,
+                    subtitle_language=subtitle_language
+                )
+                log_message(f"Metadata created with title: {metadata.get('title', 'No title')}")
+            except Exception as e:
+                log_message(f"Metadata oluşturma hatası: {str(e)}", True)
+                return Fallback({
+                    "title": f"Facts About {topic}",
+                    "keywords": keywords if keywords else ["educational", "shorts", "facts"],
+                    "content": "\n".join(content_data["response"]) + "\n\n#Shorts #Educational" if content_data and "response" in content_data else "",
+                    "category_id": "27"
+                })
+            return metadata
+        
+        # 6-10. SINGLE-PASS RENDER - ADIM 6-10: Tek Geçişli Render
+        def render_stage(results):
+            try:
+                subtitle_path = ""
+                if use_subtitles:
+                    subtitle_path = prepare_word_level_subtitles(results["content"]["response"], project_folder)
+                    if not subtitle_path:
+                        raise RuntimeError("Kelime seviyesinde altyazı hazırlanamadı")
+                
+                # Kapanış videosu yoksa add_closing_scene ile aynı yedek yolu kullan
+                closing_video_path = config.get("closing_video_path", "") if config else ""
+                if not closing_video_path or not os.path.exists(closing_video_path):
+                    closing_video_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "kapanis.mp4")
+                
+                final_video = render_single_pass(
+                    results["fetch"],
+                    results["tts"],
+                    project_folder,
+                    resolution_tuple,
+                    closing_video_path=closing_video_path,
+                    subtitle_path=subtitle_path,
+                    fonts_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "fonts")
+                )
+                log_message("Video tek geçişte oluşturuldu")
+                return final_video
+            except Exception as e:
+                log_message(f"Tek geçişli render hatası: {str(e)} - çok aşamalı yönteme dönülüyor", True)
+                legacy_results = dict(results)
+                failed = False
+                for name, stage_func in (("process", process_stage), ("merge", merge_stage),
+                                         ("subtitles", subtitles_stage), ("closing", closing_stage)):
+                    result = stage_func(legacy_results)
+                    failed = failed or isinstance(result, Fallback)
+                    legacy_results[name] = unwrap(result)
+                return Fallback(legacy_results["closing"]) if failed else legacy_results["closing"]
+        
+        graph = StageGraph(log=log_message, limits=stage_limits, manifest=manifest)
+        graph.add("content", content_stage, resource="network")
+        graph.add("keywords", keywords_stage, deps=["content"], resource="network")
+        graph.add("fetch", fetch_stage, deps=["keywords", "content"], resource="network")
+        if stream_content:
+            # TTS içerikle birlikte başlar ve cümleleri akıştan okur. İçerik adımını beklerken
+            # bir ağ yuvası tutup onu kilitlememesi için kaynak sınırı verilmez (API hız sınırı yine geçerli)
+            sentence_stream = StreamChannel(graph.results, "content", lambda content: content.get("response", []))
+            # İçerik sonucu yine de TTS'in girdilerine dahil edilir (manifest anahtarı)
+            graph.add("tts", tts_stage, stream_deps=["content"])
+        else:
+            graph.add("tts", tts_stage, deps=["content"], resource="network")
+        if single_pass_render:
+            graph.add("closing", render_stage, deps=["fetch", "tts", "content"], resource="cpu")
+        else:
+            graph.add("process", process_stage, deps=["fetch", "tts"], resource="cpu")
+            graph.add("merge", merge_stage, deps=["process", "tts"], resource="cpu")
+            graph.add("subtitles", subtitles_stage, deps=["merge", "content"], resource="cpu")
+            graph.add("closing", closing_stage, deps=["subtitles"], resource="cpu")
+        graph.add("metadata", metadata_stage, deps=["keywords", "content"], resource="network")
+        
         try:
-            metadata = write_metadata(
-                project_folder, 
-                topic, 
-                keywords, 
-                "gpt-4o", 
-                default_tts_voice, 
-                language=language,
-                tts_language=tts_language,
-                subtitle_language=subtitle_language
-            )
-            log_message(f"Metadata created with title: {metadata.get('title', 'No title')}")
-        except Exception as e:
-            log_message(f"Metadata oluşturma hatası: {str(e)}", True)
-            metadata = {
-                "title": f"Facts About {topic}",
-                "keywords": keywords if keywords else ["educational", "shorts", "facts"],
-                "content": "\n".join(content_data["response"]) + "\n\n#Shorts #Educational" if content_data and "response" in content_data else "",
-                "category_id": "27"
-            }
+            results = await graph.run()
+        except Exception:
+            # İçerik üretilemediyse devam edilemez (hata zaten loglandı)
+            return False, None
+        finally:
+            graph.report()
+        
+        content_data = results["content"]
+        keywords = results["keywords"]
+        final_video_path = results["closing"]
+        metadata = results["metadata"]
         
         log_message(f"Process completed! Final video: {final_video_path}")
         
         # 12. YOUTUBE UPLOAD - ADIM 11: YouTube'a Yükleme
+        # Aynı video daha önce yüklendiyse (devam ettirilen proje) tekrar yükleme
+        upload_hash = hash_inputs({"video": final_video_path, "job": manifest.job})
+        previous_upload = manifest.completed_result("upload", upload_hash)
+        
         # YouTube API key kontrolü ve YouTube'a yükleme seçeneği kontrolü
-        if youtube_api_key and upload_to_youtube:
+        if youtube_api_key and upload_to_youtube and previous_upload:
+            video_url = previous_upload.get("result", {}).get("video_url")
+            log_message(f"Video daha önce yüklenmiş, yükleme atlanıyor: {video_url}")
+            success = True
+        elif youtube_api_key and upload_to_youtube:
             try:
                 # Create metadata for YouTube upload
                 metadata = {}
@@ -375,6 +542,7 @@ async def process_single_video(topic, openai_api_key="", pexels_api_key="", pixa
                         video_url = result.get('video_url', '')
                         log_message(f"Video successfully uploaded to YouTube: {video_url}")
                         success = True
+                        manifest.record("upload", upload_hash, {"video_url": video_url, "video_id": result.get("video_id")}, 0.0)
                     else:
                         log_message("Upload successful but video ID not returned", True)
                 else:
@@ -405,8 +573,19 @@ async def process_single_video(topic, openai_api_key="", pexels_api_key="", pixa
         log_message(f"An error occurred: {str(e)}", True)
         return False, None
 
-async def async_main(continuous_mode=False, max_videos=None, language='tr', tts_language='tr', subtitle_language='tr', upload_to_youtube=True):
-    """Ana asenkron fonksiyon, sürekli mod desteği ile"""
+def generate_next_topic(config, language):
+    """Dil seçeneğine göre GPT ile yeni bir konu üretir"""
+    if language == 'en':
+        return generate_english_topic(config["openai_api_key"])
+    elif language in ['es', 'fr', 'de', 'it', 'pt', 'ru', 'ar']:
+        # Farklı diller için uluslararası konu üreteci
+        return generate_topic_international(config["openai_api_key"], language)
+    else:
+        return generate_topic(config["openai_api_key"])
+
+async def async_main(continuous_mode=False, max_videos=None, language='tr', tts_language='tr', subtitle_language='tr', upload_to_youtube=True,
+                     workers=1, network_limit=None, cpu_limit=None, resume_folder=None):
+    """Ana asenkron fonksiyon, sürekli mod ve paralel üretim desteği ile"""
     # Logging settings
     logging.basicConfig(
         level=logging.INFO,
@@ -418,8 +597,64 @@ async def async_main(continuous_mode=False, max_videos=None, language='tr', tts_
         # Load config file
         config = load_config()
         
+        # Yarıda kalan bir projeyi devam ettir - tamamlanmış adımlar atlanır
+        if resume_folder:
+            manifest = StageManifest(resume_folder)
+            job = manifest.job
+            if not job.get("topic"):
+                logger.error(f"Devam ettirilecek proje bulunamadı veya manifest eksik: {resume_folder}")
+                return 1
+            
+            logger.info(f"Proje devam ettiriliyor: {resume_folder} (Konu: {job['topic']})")
+            success, video_url = await process_single_video(
+                job["topic"],
+                config["openai_api_key"],
+                config["pexels_api_key"],
+                config.get("pixabay_api_key", ""),
+                config.get("youtube_api_key", ""),
+                job.get("language", language),
+                job.get("tts_language", tts_language),
+                job.get("subtitle_language", subtitle_language),
+                upload_to_youtube=upload_to_youtube,
+                project_folder=resume_folder
+            )
+            logger.info(f"Devam ettirilen proje {'tamamlandı' if success else 'başarısız oldu'}. URL: {video_url}")
+            return 0 if success else 1
+        
+        # Paralel üretim modu: birden fazla video aynı anda işlenir
+        if continuous_mode and workers > 1:
+            async def process_topic(topic, limits):
+                return await process_single_video(
+                    topic,
+                    config["openai_api_key"],
+                    config["pexels_api_key"],
+                    config.get("pixabay_api_key", ""),
+                    config.get("youtube_api_key", ""),
+                    language,
+                    tts_language,
+                    subtitle_language,
+                    max_videos,
+                    continuous_mode,
+                    upload_to_youtube=upload_to_youtube,
+                    stage_limits=limits
+                )
+            
+            video_count = await run_worker_pool(
+                lambda: generate_next_topic(config, language),
+                process_topic,
+                workers=workers,
+                max_videos=max_videos,
+                network_limit=network_limit,
+                cpu_limit=cpu_limit
+            )
+            logger.info(f"Paralel üretim tamamlandı, {video_count} video üretildi.")
+            print("\nProgram başarıyla tamamlandı!")
+            return 0
+        
         # Video sayacı
         video_count = 0
+        # Art arda başarısız olan video sayısı (bekleme süresi buna göre artar)
+        consecutive_failures = 0
         
         # Sürekli mod
         while True:
@@ -432,22 +667,12 @@ async def async_main(continuous_mode=False, max_videos=None, language='tr', tts_
                 # Konu seçimi (manuel veya otomatik)
                 if continuous_mode:
                     # Otomatik olarak GPT ile yeni konu üret (dil seçeneğine göre)
-                    if language == 'en':
-                        topic = generate_english_topic(config["openai_api_key"])
-                        logger.info(f"New topic generated with GPT: {topic}")
-                    elif language in ['es', 'fr', 'de', 'it', 'pt', 'ru', 'ar']:
-                        # Farklı diller için uluslararası konu üreteci
-                        topic = generate_topic_international(config["openai_api_key"], language)
-                        logger.info(f"New topic generated with GPT ({language}): {topic}")
-                    else:
-                        topic = generate_topic(config["openai_api_key"])
-                        logger.info(f"GPT ile yeni konu üretildi: {topic}")
+                    topic = generate_next_topic(config, language)
+                    logger.info(f"GPT ile yeni konu üretildi ({language}): {topic}")
                     
-                    # Bir sonraki videoya geçmeden önce kısa bir bekleme süresi
                     print(f"\n{'='*50}")
                     print(f"{'Next topic' if language == 'en' else 'Sıradaki konu'}: {topic}")
                     print(f"{'='*50}\n")
-                    time.sleep(3)  # 3 saniye bekle
                 else:
                     # Manuel konu girişi
                     topic = input("Please enter a topic (or 'q' to exit): " if language == 'en' else "Lütfen bir konu girin (çıkış için 'q'): ")
@@ -476,23 +701,30 @@ async def async_main(continuous_mode=False, max_videos=None, language='tr', tts_
                 # Video sayacını artır
                 if success:
                     video_count += 1
+                    consecutive_failures = 0
                     logger.info(f"Video {video_count} tamamlandı. URL: {video_url}")
+                else:
+                    consecutive_failures += 1
                 
                 # Sürekli modda değilse döngüyü sonlandır
                 if not continuous_mode:
                     break
                 
-                # Sürekli modda sonraki video için bekle
-                logger.info(f"Sonraki video için bekleniyor... (20 saniye)")
-                time.sleep(20)  # API rate limitlerini aşmamak için bekle
+                # API limitleri istek bazında token bucket ile uygulanır; sabit bekleme yok.
+                # Sadece art arda hatalarda artan, rastgele dağıtılmış bir bekleme yapılır.
+                if consecutive_failures:
+                    delay = backoff_delay(consecutive_failures - 1)
+                    logger.info(f"Sonraki video için bekleniyor... ({delay:.1f} saniye)")
+                    await asyncio.sleep(delay)
                 
             except KeyboardInterrupt:
                 logger.info("Kullanıcı tarafından işlem kesildi.")
                 break
             except Exception as e:
                 logger.error(f"Video işleme hatası: {str(e)}", exc_info=True)
-                # Hata durumunda tekrar başlamadan önce biraz bekle
-                time.sleep(10)
+                # Hata durumunda tekrar başlamadan önce artan sürelerle bekle
+                consecutive_failures += 1
+                await asyncio.sleep(backoff_delay(consecutive_failures - 1))
                 # Hataya rağmen döngüye devam et
                 continue
         
@@ -507,6 +739,12 @@ async def async_main(continuous_mode=False, max_videos=None, language='tr', tts_
         return 1  # Return error code
     
     finally:
+        # Paylaşılan HTTP bağlantı havuzunu kapat
+        try:
+            await close_session()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP session: {str(e)}")
+        
         # Make sure to close all pending tasks
         tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
         if tasks:
@@ -546,6 +784,23 @@ def main():
         tts_language = 'tr'  # TTS dili
         subtitle_language = 'tr'  # Altyazı dili
         
+        # Yarıda kalan proje klasörü (--resume=<klasör> veya --resume <klasör>)
+        resume_folder = None
+        for i, arg in enumerate(sys.argv):
+            if arg.startswith("--resume="):
+                resume_folder = arg.split("=", 1)[1]
+            elif arg == "--resume" and i + 1 < len(sys.argv):
+                resume_folder = sys.argv[i + 1]
+        
+        if resume_folder and not os.path.isdir(resume_folder):
+            print(f"Proje klasörü bulunamadı: {resume_folder}")
+            sys.exit(1)
+        
+        # Paralel üretim ayarları (sadece sürekli modda kullanılır)
+        workers = 1
+        network_limit = None
+        cpu_limit = None
+        
         # Maksimum video sayısını kontrol et
         for arg in sys.argv:
             if arg.startswith("--max="):
@@ -553,6 +808,23 @@ def main():
                     max_videos = int(arg.split("=")[1])
                 except:
                     pass
+            # Aynı anda işlenecek video sayısı
+            elif arg.startswith("--workers=") or arg.startswith("-j="):
+                try:
+                    workers = max(1, int(arg.split("=")[1]))
+                except:
+                    pass
+            # Ağ ve FFmpeg aşamaları için eşzamanlılık sınırları
+            elif arg.startswith("--net-limit="):
+                try:
+                    network_limit = int(arg.split("=")[1])
+                except:
+                    pass
+            elif arg.startswith("--cpu-limit="):
+                try:
+                    cpu_limit = int(arg.split("=")[1])
+                except:
+                    pass
             # İçerik dili parametresi
             elif arg.startswith("--lang=") or arg.startswith("-l="):
                 lang = arg.split("=")[1].lower()
@@ -580,6 +852,8 @@ def main():
             print("TTS Language / Seslendirme Dili: " + tts_language)
             print("Subtitle Language / Altyazı Dili: " + subtitle_language)
             print(f"Upload to YouTube / YouTube'a Yükleme: {'Yes/Evet' if upload_to_youtube else 'No/Hayır'}")
+            if workers > 1:
+                print(f"Parallel jobs / Paralel işler: {workers}")
             
             print("The program will automatically create and upload videos" if language == 'en' else "Program, GPT tarafından üretilen konulara göre otomatik olarak")
             print("based on topics generated by GPT." if language == 'en' else "video oluşturup YouTube'a yükleyecek.")
@@ -594,7 +868,11 @@ def main():
             language=language, 
             tts_language=tts_language, 
             subtitle_language=subtitle_language,
-            upload_to_youtube=upload_to_youtube
+            upload_to_youtube=upload_to_youtube,
+            workers=workers,
+            network_limit=network_limit,
+            cpu_limit=cpu_limit,
+            resume_folder=resume_folder
         ), debug=False)
         
         # Add a short delay to allow for any pending operations to complete
@@ -13,6 +13,7 @@ import time
 # Ana programdan içe aktarmalar
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from main import process_single_video
+from utils.http_client import close_session
 from modules.topic_generator import generate_topic, generate_english_topic, generate_topic_international
 from langs import language_manager, get_text, _  # Dil desteği için modül
 from utils.language_utils import (
@@ -1281,10 +1282,12 @@ class MMotoApp(ctk.CTk):
                 asyncio.set_event_loop(loop)
                 
                 # İşlemi başlat
-                success, video_url = loop.run_until_complete(process_single_video(**params))
-                
-                # Loop'u temizle ve kapat
-                loop.close()
+                try:
+                    success, video_url = loop.run_until_complete(process_single_video(**params))
+                finally:
+                    # Loop'a ait paylaşılan HTTP oturumunu kapat (bağlantılar açık kalmasın), sonra loop'u kapat
+                    loop.run_until_complete(close_session())
+                    loop.close()
                 
                 # İşlem sonucunu kaydet
                 global_processing_state["success"] = success
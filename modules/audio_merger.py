@@ -3,10 +3,42 @@
 
 import os
 import subprocess
-from typing import List
+from typing import List, Optional, Tuple
 import tempfile
 import shutil
 import json
+from utils.media_info import media_duration
+
+# TTS adımının birleştirdiği parçanın kabul edilen süre sapması (saniye)
+MERGED_TRACK_TOLERANCE = 0.25
+# Ses videodan uzunsa video bu kadar fazladan uzatılır, -shortest çıktıyı ses bitiminde keser (saniye)
+PAD_MARGIN = 0.5
+
+def find_merged_track(audio_files: List[str], expected_duration: float, ffprobe_path: str = "ffprobe") -> Optional[str]:
+    """
+    TTS adımının oluşturduğu merged_audio.mp3 dosyasını, cümle sesleriyle güncel ve uyumluysa döndürür
+    
+    Args:
+        audio_files (List[str]): Cümle ses dosyaları
+        expected_duration (float): Cümle seslerinin toplam süresi
+        ffprobe_path (str): FFprobe uygulamasının yolu
+    
+    Returns:
+        Optional[str]: Birleştirilmiş ses dosyasının yolu veya kullanılamıyorsa None
+    """
+    if not audio_files:
+        return None
+    merged_track = os.path.join(os.path.dirname(os.path.abspath(audio_files[0])), "merged_audio.mp3")
+    if not os.path.exists(merged_track) or os.path.getsize(merged_track) == 0:
+        return None
+    # Cümle seslerinden daha eskiyse başka bir çalıştırmaya aittir
+    merged_mtime = os.path.getmtime(merged_track)
+    if any(os.path.exists(audio_file) and os.path.getmtime(audio_file) > merged_mtime for audio_file in audio_files):
+        return None
+    duration = media_duration(merged_track, ffprobe_path)
+    if duration is None or abs(duration - expected_duration) > MERGED_TRACK_TOLERANCE:
+        return None
+    return merged_track
 
 def merge_audio(video_path: str, audio_files: List[str], project_folder: str) -> str:
     """
@@ -18,7 +50,23 @@ def merge_audio(video_path: str, audio_files: List[str], project_folder: str) ->
         project_folder (str): Proje klasörünün yolu
     
     Returns:
-        str: Ses eklenmiş video dosyasının yolu
+        str: Ses eklenmiş video dosyasının yolu (hata durumunda sessiz kopya)
+    """
+    return merge_audio_with_status(video_path, audio_files, project_folder)[0]
+
+def merge_audio_with_status(video_path: str, audio_files: List[str], project_folder: str) -> Tuple[str, bool]:
+    """
+    merge_audio ile aynı işi yapar, ayrıca sesin gerçekten eklenip eklenmediğini bildirir
+    Ses eklenemezse video yine sessiz bir kopya olarak üretilir; çağıran taraf bu sonucu
+    tamamlanmış iş olarak kaydetmemelidir.
+    
+    Args:
+        video_path (str): Ses eklenecek video dosyasının yolu
+        audio_files (List[str]): Eklenecek ses dosyalarının yolları
+        project_folder (str): Proje klasörünün yolu
+    
+    Returns:
+        Tuple[str, bool]: (video dosyasının yolu, ses eklendiyse True)
     """
     # FFmpeg yolunu config.json'dan al
     config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
@@ -44,14 +92,14 @@ def merge_audio(video_path: str, audio_files: List[str], project_folder: str) ->
         audio_video = os.path.join(project_folder, "video_with_audio.mp4")
         with open(audio_video, 'wb') as f:
             f.write(b'')
-        return audio_video
+        return audio_video, False
     
     if not audio_files:
         print("Uyarı: Eklenecek ses dosyası bulunamadı!")
         # Sadece videoyu döndür
         audio_video = os.path.join(project_folder, "video_with_audio.mp4")
         shutil.copy2(video_path, audio_video)
-        return audio_video
+        return audio_video, False
     
     try:
         # Ses eklenmiş video dosyasının yolu
@@ -61,147 +109,108 @@ def merge_audio(video_path: str, audio_files: List[str], project_folder: str) ->
         video_duration = 0
         audio_duration = 0
         
-        # Video süresini al
-        try:
-            video_duration_cmd = f'"{ffprobe_path}" -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{os.path.abspath(video_path)}"'
-            video_result = subprocess.run(video_duration_cmd, shell=True, capture_output=True, text=True)
-            video_duration = float(video_result.stdout.strip())
+        # Video süresini al (süreler ortak medya bilgisi önbelleğinden okunur)
+        video_duration = media_duration(video_path, ffprobe_path)
+        if video_duration is not None:
             print(f"Video süresi: {video_duration:.2f} saniye")
-        except Exception as e:
-            print(f"Video süresi hesaplama hatası: {str(e)}")
+        else:
+            print(f"Video süresi hesaplanamadı: {video_path}")
+            video_duration = 0
         
         # Ses dosyalarının toplam süresini hesapla
         for audio_file in audio_files:
-            try:
-                audio_duration_cmd = f'"{ffprobe_path}" -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{os.path.abspath(audio_file)}"'
-                audio_result = subprocess.run(audio_duration_cmd, shell=True, capture_output=True, text=True)
-                file_duration = float(audio_result.stdout.strip())
+            file_duration = media_duration(audio_file, ffprobe_path)
+            if file_duration is not None:
                 audio_duration += file_duration
-            except Exception as e:
-                print(f"Ses süresi hesaplama hatası: {str(e)}")
+            else:
+                print(f"Ses süresi hesaplanamadı: {audio_file}")
         
         print(f"Toplam ses süresi: {audio_duration:.2f} saniye")
         
         # Ses ve video süresi uyumsuzluğunu kontrol et ve gerekirse uyum sağla
-        # Eğer ses video süresinden daha uzunsa, videoyu yavaşlat
-        # Eğer video ses süresinden çok daha uzunsa, videoyu kırp
+        # Eğer ses video süresinden %5'ten fazla uzunsa, video aynı komutta yavaşlatılır
+        # Ses daha az uzunsa video son karesi tekrarlanarak uzatılır; seslendirme hiçbir zaman kesilmez
+        # Eğer video ses süresinden uzunsa, -shortest ile ses süresinde kesilir
+        speed_factor = None
+        pad_duration = 0.0
         if audio_duration > 3 and video_duration > 3:  # Her ikisi de geçerli uzunlukta
             if audio_duration > video_duration * 1.05:  # Ses %5'den fazla uzunsa (daha hassas)
                 print(f"Uyarı: Ses süresi video süresinden %{((audio_duration / video_duration) - 1) * 100:.1f} daha uzun")
-                print("Video sesi uyumlu hale getirmek için düzenlenecek...")
-                
-                # Videoyu yavaşlat ve ses süresine uygun hale getir
+                print("Video sese uyumlu hale getirmek için yavaşlatılacak...")
                 speed_factor = video_duration / audio_duration
-                adjusted_video = os.path.join(project_folder, "adjusted_video.mp4")
-                
-                # Daha hassas hız ayarı için atempo filtresi ekle
-                adjust_cmd = f'"{ffmpeg_path}" -i "{os.path.abspath(video_path)}" -filter:v "setpts={1/speed_factor}*PTS" -c:v libx264 -preset medium -crf 18 -pix_fmt yuv420p "{os.path.abspath(adjusted_video)}"'
-                
-                try:
-                    subprocess.run(adjust_cmd, shell=True, check=True)
-                    if os.path.exists(adjusted_video) and os.path.getsize(adjusted_video) > 0:
-                        video_path = adjusted_video
-                        print(f"Video sese uygun şekilde yavaşlatıldı: {adjusted_video}")
-                except Exception as adjust_error:
-                    print(f"Video düzenleme hatası: {str(adjust_error)}")
-        
             elif video_duration > audio_duration * 1.1:  # Video %10'dan fazla uzunsa (daha hassas)
                 print(f"Uyarı: Video süresi ses süresinden %{((video_duration / audio_duration) - 1) * 100:.1f} daha uzun")
-                print("Video sese uyumlu hale getirmek için kırpılacak...")
-                
-                # Video süresini sese uygun şekilde kırp
-                trimmed_video = os.path.join(project_folder, "trimmed_video.mp4")
-                
-                # Videoyu ses süresine göre kırp, %5 tolerans ekle (daha hassas)
-                trim_cmd = f'"{ffmpeg_path}" -i "{os.path.abspath(video_path)}" -t {audio_duration * 1.05} -c:v copy "{os.path.abspath(trimmed_video)}"'
-                
-                try:
-                    subprocess.run(trim_cmd, shell=True, check=True)
-                    if os.path.exists(trimmed_video) and os.path.getsize(trimmed_video) > 0:
-                        video_path = trimmed_video
-                        print(f"Video sese uygun şekilde kırpıldı: {trimmed_video}")
-                except Exception as trim_error:
-                    print(f"Video kırpma hatası: {str(trim_error)}")
+                print("Video ses süresinde kesilecek...")
+        if video_duration > 0 and audio_duration > video_duration:
+            # Yavaşlatılan videoda yuvarlama farkı, diğer durumda aradaki süre kadar son kare tekrarlanır;
+            # fazlası -shortest ile ses bitiminde kesilir
+            pad_duration = (0 if speed_factor else audio_duration - video_duration) + PAD_MARGIN
+            if not speed_factor:
+                print(f"Video, sesin sonu kesilmesin diye {pad_duration:.2f} saniye uzatılacak...")
         
-        # Önce ses dosyalarını tek bir ses dosyasında birleştir
-        merged_audio = os.path.join(project_folder, "merged_audio.mp3")
+        # Ses kaynağı: TTS adımının birleştirdiği parça güncelse doğrudan kullanılır,
+        # değilse cümle sesleri aynı FFmpeg çağrısında concat filtresiyle birleştirilir
+        merged_track = find_merged_track(audio_files, audio_duration, ffprobe_path)
+        audio_sources = [merged_track] if merged_track else [audio_file for audio_file in audio_files if os.path.exists(audio_file)]
+        if not audio_sources:
+            # Ses birleştirme başarısız olmuşsa orijinal videoyu kopyala
+            print("Ses birleştirme başarısız, orijinal video kullanılıyor...")
+            shutil.copy2(video_path, audio_video)
+            return audio_video, False
         
-        if len(audio_files) == 1:
-            # Tek ses dosyası varsa kopyala
-            shutil.copy2(audio_files[0], merged_audio)
+        inputs = f'-i "{os.path.abspath(video_path)}" ' + " ".join(f'-i "{os.path.abspath(source)}"' for source in audio_sources)
+        audio_labels = "".join(f"[{i + 1}:a]" for i in range(len(audio_sources)))
+        if len(audio_sources) > 1:
+            audio_graph = f"{audio_labels}concat=n={len(audio_sources)}:v=0:a=1,aresample=async=1000[aout]"
         else:
-            # Birden fazla ses dosyası varsa birleştir
-            # Concat demuxer liste dosyası oluştur
-            concat_list = os.path.join(project_folder, "concat_list.txt")
-            with open(concat_list, "w", encoding="utf-8") as f:
-                for audio_file in audio_files:
-                    if os.path.exists(audio_file):
-                        f.write(f"file '{os.path.abspath(audio_file)}'\n")
-            
-            # Sesleri birleştir
-            concat_cmd = f'"{ffmpeg_path}" -f concat -safe 0 -i "{os.path.abspath(concat_list)}" -c copy "{os.path.abspath(merged_audio)}"'
-            try:
-                print("Ses dosyaları birleştiriliyor...")
-                subprocess.run(concat_cmd, shell=True, check=True)
-            except Exception as e:
-                print(f"Ses birleştirme hatası: {str(e)}")
-                if len(audio_files) > 0 and os.path.exists(audio_files[0]):
-                    shutil.copy2(audio_files[0], merged_audio)
-                else:
-                    # Boş ses dosyası oluştur
-                    with open(merged_audio, 'wb') as f:
-                        f.write(b'')
+            audio_graph = f"{audio_labels}aresample=async=1000[aout]"
         
-        # Birleştirilen sesi videoya ekle
-        if os.path.exists(merged_audio) and os.path.getsize(merged_audio) > 0:
-            print("Ses videoya ekleniyor...")
-            
-            # Ses ve videoya uygun bir encoder seç, daha yüksek ses kalitesi
-            audio_cmd = f'"{ffmpeg_path}" -i "{os.path.abspath(video_path)}" -i "{os.path.abspath(merged_audio)}" -map 0:v -map 1:a -c:v copy -c:a aac -b:a 256k -shortest -af "aresample=async=1000" "{os.path.abspath(audio_video)}"'
+        def build_mux_cmd(reencode_video: bool) -> str:
+            graphs = [audio_graph]
+            video_map = "0:v"
+            video_codec = "-c:v copy"
+            video_filters = []
+            if speed_factor:
+                video_filters.append(f"setpts={1/speed_factor}*PTS")
+            if pad_duration:
+                video_filters.append(f"tpad=stop_mode=clone:stop_duration={pad_duration:.3f}")
+            if video_filters:
+                graphs.insert(0, f"[0:v]{','.join(video_filters)}[vout]")
+                video_map = '"[vout]"'
+            if video_filters or reencode_video:
+                video_codec = "-c:v libx264 -preset medium -crf 18 -pix_fmt yuv420p"
+            return f'"{ffmpeg_path}" -y {inputs} -filter_complex "{"; ".join(graphs)}" -map {video_map} -map "[aout]" ' + \
+                   f'{video_codec} -c:a aac -b:a 256k -shortest "{os.path.abspath(audio_video)}"'
+        
+        # Birleştirilen sesi videoya tek FFmpeg çağrısında ekle
+        print("Ses videoya ekleniyor...")
+        try:
+            subprocess.run(build_mux_cmd(False), shell=True, check=True)
             
+            # Başarılı mı kontrol et
+            if os.path.exists(audio_video) and os.path.getsize(audio_video) > 0:
+                print(f"Ses başarıyla eklendi: {audio_video}")
+            else:
+                raise Exception("Ses eklenmiş video oluşturulamadı")
+        except Exception as e:
+            print(f"Ses ekleme hatası: {str(e)}")
+            # Alternatif yöntem dene: video akışı kopyalanamıyorsa yeniden kodla
             try:
-                subprocess.run(audio_cmd, shell=True, check=True)
+                subprocess.run(build_mux_cmd(True), shell=True, check=True)
                 
-                # Başarılı mı kontrol et
                 if os.path.exists(audio_video) and os.path.getsize(audio_video) > 0:
-                    print(f"Ses başarıyla eklendi: {audio_video}")
+                    print("Alternatif ses ekleme başarılı")
                 else:
-                    raise Exception("Ses eklenmiş video oluşturulamadı")
-            except Exception as e:
-                print(f"Ses ekleme hatası: {str(e)}")
-                # Alternatif yöntem dene
-                try:
-                    alt_cmd = f'"{ffmpeg_path}" -i "{os.path.abspath(video_path)}" -i "{os.path.abspath(merged_audio)}" -c:v copy -c:a aac -strict experimental "{os.path.abspath(audio_video)}"'
-                    subprocess.run(alt_cmd, shell=True, check=True)
-                    
-                    if os.path.exists(audio_video) and os.path.getsize(audio_video) > 0:
-                        print("Alternatif ses ekleme başarılı")
-                    else:
-                        # Hata durumunda orijinal videoyu kopyala
-                        shutil.copy2(video_path, audio_video)
-                except Exception as alt_error:
-                    print(f"Alternatif ses ekleme hatası: {str(alt_error)}")
                     # Hata durumunda orijinal videoyu kopyala
                     shutil.copy2(video_path, audio_video)
-        else:
-            # Ses birleştirme başarısız olmuşsa orijinal videoyu kopyala
-            print("Ses birleştirme başarısız, orijinal video kullanılıyor...")
-            shutil.copy2(video_path, audio_video)
-        
-        # Geçici dosyaları temizle
-        try:
-            if os.path.exists(merged_audio):
-                os.remove(merged_audio)
-            if os.path.exists(os.path.join(project_folder, "concat_list.txt")):
-                os.remove(os.path.join(project_folder, "concat_list.txt"))
-            if os.path.exists(os.path.join(project_folder, "adjusted_video.mp4")):
-                os.remove(os.path.join(project_folder, "adjusted_video.mp4"))
-            if os.path.exists(os.path.join(project_folder, "trimmed_video.mp4")):
-                os.remove(os.path.join(project_folder, "trimmed_video.mp4"))
-        except Exception as e:
-            print(f"Geçici dosya silme hatası: {str(e)}")
+                    return audio_video, False
+            except Exception as alt_error:
+                print(f"Alternatif ses ekleme hatası: {str(alt_error)}")
+                # Hata durumunda orijinal videoyu kopyala
+                shutil.copy2(video_path, audio_video)
+                return audio_video, False
         
-        return audio_video
+        return audio_video, True
         
     except Exception as e:
         print(f"Ses birleştirme genel hatası: {str(e)}")
@@ -209,10 +218,10 @@ def merge_audio(video_path: str, audio_files: List[str], project_folder: str) ->
         try:
             audio_video = os.path.join(project_folder, "video_with_audio.mp4")
             shutil.copy2(video_path, audio_video)
-            return audio_video
+            return audio_video, False
         except Exception as copy_error:
             print(f"Dosya kopyalama hatası: {str(copy_error)}")
             # Son çare - boş dosya
             with open(os.path.join(project_folder, "video_with_audio.mp4"), 'wb') as f:
                 f.write(b'')
-            return os.path.join(project_folder, "video_with_audio.mp4")
+            return os.path.join(project_folder, "video_with_audio.mp4"), False
@@ -5,6 +5,166 @@ import os
 import subprocess
 import shutil
 import json
+from typing import Any, Dict, Optional
+from utils.file_cache import FileCache, get_cache, file_fingerprint
+from utils.media_info import probe_media_info, media_duration
+
+# Akış kopyalamalı eklemenin kabul edilen süre sapması (saniye)
+CLOSING_DURATION_TOLERANCE = 0.5
+
+def probe_stream_profile(video_path: str, ffprobe_path: str = "ffprobe") -> Optional[Dict[str, Any]]:
+    """
+    Videonun akış kopyalamalı birleştirme için eşleşmesi gereken kodlama profilini okur
+    
+    Args:
+        video_path (str): Video dosyasının yolu
+        ffprobe_path (str): FFprobe uygulamasının yolu
+    
+    Returns:
+        Optional[Dict[str, Any]]: Video ve ses akışı ayarları veya desteklenmeyen/okunamayan videoda None
+    """
+    cmd = f'"{ffprobe_path}" -v error -show_entries stream=codec_type,codec_name,profile,level,width,height,pix_fmt,r_frame_rate,time_base,sample_rate,channels -of json "{os.path.abspath(video_path)}"'
+    try:
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        streams = json.loads(result.stdout).get("streams", [])
+    except Exception as e:
+        print(f"Video profili okunamadı: {str(e)}")
+        return None
+    
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    # Kapanış varyantı libx264 ve AAC ile üretildiğinden sadece bu codec'ler kopyalanabilir
+    if not video or video.get("codec_name") != "h264" or (audio and audio.get("codec_name") != "aac"):
+        return None
+    
+    profile = {
+        "width": int(video["width"]),
+        "height": int(video["height"]),
+        "pix_fmt": video.get("pix_fmt", "yuv420p"),
+        "fps": video.get("r_frame_rate", "30/1"),
+        "timescale": int(video.get("time_base", "1/15360").split("/")[1]),
+        "h264_profile": (video.get("profile") or "high").lower().replace("constrained ", ""),
+        "level": int(video.get("level") or 40),
+        "audio": None
+    }
+    if audio:
+        profile["audio"] = {"sample_rate": int(audio.get("sample_rate", 44100)), "channels": int(audio.get("channels", 2))}
+    return profile
+
+def closing_cache_key(closing_video_path: str, profile: Dict[str, Any]) -> str:
+    """
+    Kapanış videosu varyantı için önbellek anahtarı üretir (kaynak içeriği ve çıktı profili)
+    
+    Args:
+        closing_video_path (str): Kapanış video dosyasının yolu
+        profile (Dict[str, Any]): probe_stream_profile çıktısı
+    
+    Returns:
+        str: Önbellek anahtarı
+    """
+    return file_fingerprint(closing_video_path) + "|" + json.dumps(profile, sort_keys=True)
+
+def prepare_closing_variant(closing_video_path: str, profile: Dict[str, Any], project_folder: str,
+                            ffmpeg_path: str = "ffmpeg", ffprobe_path: str = "ffprobe",
+                            cache: Optional[FileCache] = None) -> Optional[str]:
+    """
+    Kapanış videosunu ana videonun profiline (codec, çözünürlük, fps, SAR, ses düzeni) uygun şekilde kodlar
+    Her profil için bir kez kodlanır ve önbellekte saklanır
+    
+    Args:
+        closing_video_path (str): Kapanış video dosyasının yolu
+        profile (Dict[str, Any]): probe_stream_profile çıktısı
+        project_folder (str): Proje klasörünün yolu
+        ffmpeg_path (str): FFmpeg uygulamasının yolu
+        ffprobe_path (str): FFprobe uygulamasının yolu
+        cache (FileCache): Kapanış varyantı önbelleği (None ise kullanılmaz)
+    
+    Returns:
+        Optional[str]: Hazırlanan kapanış videosunun yolu veya hata durumunda None
+    """
+    variant_path = os.path.join(project_folder, "closing_variant.mp4")
+    cache_key = closing_cache_key(closing_video_path, profile) if cache is not None else None
+    if cache_key and cache.link_to(cache_key, variant_path):
+        print("Kapanış videosu önbellekten alındı")
+        return variant_path
+    
+    width, height = profile["width"], profile["height"]
+    level = profile["level"]
+    video_filter = f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1:1,format={profile['pix_fmt']}"
+    video_args = f'-c:v libx264 -preset medium -crf 18 -profile:v {profile["h264_profile"]} -level {level // 10}.{level % 10} ' + \
+                 f'-r {profile["fps"]} -vsync cfr -video_track_timescale {profile["timescale"]}'
+    
+    audio = profile["audio"]
+    closing_info = probe_media_info(closing_video_path, ffprobe_path) or {}
+    if audio is None:
+        input_args = f'-i "{os.path.abspath(closing_video_path)}"'
+        audio_args = "-an"
+    elif closing_info.get("has_audio"):
+        input_args = f'-i "{os.path.abspath(closing_video_path)}"'
+        audio_args = f'-map 0:v:0 -map 0:a:0 -c:a aac -ar {audio["sample_rate"]} -ac {audio["channels"]}'
+    else:
+        # Sessiz kapanış videosuna ana videoyla aynı düzende boş ses eklenir
+        input_args = f'-i "{os.path.abspath(closing_video_path)}" -f lavfi -i anullsrc=r={audio["sample_rate"]}'
+        audio_args = f'-map 0:v:0 -map 1:a:0 -shortest -c:a aac -ar {audio["sample_rate"]} -ac {audio["channels"]}'
+    
+    # Geçici dosyaya kodlanıp yerine taşınır: mevcut variant_path başka bir profilin
+    # önbellek girdisine bağlı (hardlink) olabilir ve üzerine yazmak o girdiyi bozar
+    temp_path = os.path.join(project_folder, "closing_variant.part.mp4")
+    cmd = f'"{ffmpeg_path}" -y {input_args} -vf "{video_filter}" {video_args} {audio_args} "{os.path.abspath(temp_path)}"'
+    try:
+        print("Kapanış videosu çıktı profiline göre hazırlanıyor...")
+        subprocess.run(cmd, shell=True, check=True)
+        if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+            return None
+        os.replace(temp_path, variant_path)
+    except Exception as e:
+        print(f"Kapanış videosu hazırlama hatası: {str(e)}")
+        return None
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    
+    if cache_key:
+        cache.put(cache_key, variant_path, {"source": closing_video_path})
+    return variant_path
+
+def append_closing_copy(video_path: str, closing_variant: str, final_video: str,
+                        ffmpeg_path: str = "ffmpeg", ffprobe_path: str = "ffprobe") -> bool:
+    """
+    Profili eşleşen kapanış videosunu yeniden kodlamadan (-c copy) ana videonun sonuna ekler
+    
+    Args:
+        video_path (str): Ana video dosyasının yolu
+        closing_variant (str): prepare_closing_variant ile hazırlanmış kapanış videosu
+        final_video (str): Çıktı dosyasının yolu
+        ffmpeg_path (str): FFmpeg uygulamasının yolu
+        ffprobe_path (str): FFprobe uygulamasının yolu
+    
+    Returns:
+        bool: Birleştirme başarılı ve süre tutarlıysa True
+    """
+    list_file_path = os.path.splitext(final_video)[0] + "_closing_list.txt"
+    with open(list_file_path, "w", encoding="utf-8") as f:
+        f.write(f"file '{os.path.abspath(video_path)}'\n")
+        f.write(f"file '{os.path.abspath(closing_variant)}'\n")
+    
+    try:
+        cmd = f'"{ffmpeg_path}" -y -f concat -safe 0 -i "{list_file_path}" -c copy -movflags +faststart "{os.path.abspath(final_video)}"'
+        subprocess.run(cmd, shell=True, check=True)
+        
+        expected = (media_duration(video_path, ffprobe_path) or 0) + (media_duration(closing_variant, ffprobe_path) or 0)
+        duration = media_duration(final_video, ffprobe_path)
+        if duration and abs(duration - expected) <= CLOSING_DURATION_TOLERANCE:
+            return True
+        print(f"Kapanış eklenmiş video süresi beklenenden farklı ({duration} / {expected:.2f} saniye)")
+    except Exception as e:
+        print(f"Akış kopyalamalı kapanış ekleme hatası: {str(e)}")
+    finally:
+        try:
+            os.remove(list_file_path)
+        except OSError:
+            pass
+    return False
 
 def add_closing_scene(video_path: str, closing_video_path: str, project_folder: str) -> str:
     """
@@ -21,6 +181,7 @@ def add_closing_scene(video_path: str, closing_video_path: str, project_folder:
     # FFmpeg yolunu config.json'dan al
     config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
     ffmpeg_path = "ffmpeg"
+    ffprobe_path = "ffprobe"
     
     if os.path.exists(config_path):
         try:
@@ -29,6 +190,9 @@ def add_closing_scene(video_path: str, closing_video_path: str, project_folder:
                 
                 if "ffmpeg_path" in config:
                     ffmpeg_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config["ffmpeg_path"])
+                
+                if "ffprobe_path" in config:
+                    ffprobe_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config["ffprobe_path"])
         except:
             pass
     
@@ -58,6 +222,16 @@ def add_closing_scene(video_path: str, closing_video_path: str, project_folder:
         
         print("Kapanış sahnesi ekleniyor...")
         
+        # Hızlı yol: ana videonun profiline göre önceden kodlanmış kapanış videosunu kopyalayarak ekle
+        profile = probe_stream_profile(video_path, ffprobe_path)
+        if profile:
+            closing_variant = prepare_closing_variant(closing_video_path, profile, project_folder,
+                                                      ffmpeg_path, ffprobe_path, get_cache("closing", 256))
+            if closing_variant and append_closing_copy(video_path, closing_variant, final_video, ffmpeg_path, ffprobe_path):
+                print(f"Kapanış sahnesi yeniden kodlamadan eklendi: {final_video}")
+                return final_video
+            print("Akış kopyalamalı ekleme yapılamadı, yeniden kodlama yöntemine dönülüyor...")
+        
         # SAR değerlerini düzeltmek için önce her iki videoyu setsar=1:1 ile işle
         filter_cmd = f'"{ffmpeg_path}" -i "{os.path.abspath(video_path)}" -i "{os.path.abspath(closing_video_path)}" -filter_complex "[0:v]setsar=1:1[v1]; [1:v]setsar=1:1[v2]; [v1][0:a:0][v2][1:a:0]concat=n=2:v=1:a=1[outv][outa]" -map "[outv]" -map "[outa]" -c:v libx264 -c:a aac "{os.path.abspath(final_video)}"'
         
@@ -5,16 +5,69 @@ import os
 import json
 import openai
 from openai import OpenAI
+from utils.rate_limiter import call_with_retry
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterator, List, Optional
 
-def generate_content(topic: str, language: str = "tr") -> Dict[str, Any]:
+MAX_SENTENCES = 7
+
+def clean_paragraph(paragraph: str) -> str:
+    """
+    Removes bullet points and numbering from a generated paragraph
+    
+    Args:
+        paragraph (str): Paragraph text
+    
+    Returns:
+        str: Cleaned sentence (empty if the paragraph was blank)
+    """
+    paragraph = paragraph.strip()
+    if not paragraph:
+        return ""
+    return re.sub(r'^\d+\.\s*|\*\s*|\-\s*', '', paragraph)
+
+def stream_sentences(chunks: Iterator[Any]) -> Iterator[str]:
+    """
+    Yields sentences from a streamed chat completion as soon as each paragraph is complete
+    
+    Args:
+        chunks (Iterator[Any]): Chunks of a chat completion created with stream=True
+    
+    Yields:
+        str: Cleaned sentences, at most MAX_SENTENCES
+    """
+    buffer = ""
+    count = 0
+    for chunk in chunks:
+        if not chunk.choices:
+            continue
+        buffer += chunk.choices[0].delta.content or ""
+        # Each paragraph is a sentence; a newline means the paragraph is finished
+        while "\n" in buffer:
+            paragraph, buffer = buffer.split("\n", 1)
+            sentence = clean_paragraph(paragraph)
+            if sentence:
+                yield sentence
+                count += 1
+                if count >= MAX_SENTENCES:
+                    return
+    sentence = clean_paragraph(buffer)
+    if sentence:
+        yield sentence
+
+def generate_content(topic: str, language: str = "tr",
+                     on_sentence: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """
     Generates informative text content for a given topic
     
+    When on_sentence is given, the completion is streamed and every sentence is
+    passed to it as soon as it is complete, so TTS can start while the model is
+    still writing.
+    
     Args:
         topic (str): Content topic
         language (str): Content language (default: "tr" for Turkish)
+        on_sentence (Callable[[str], None]): Optional callback receiving each finished sentence
     
     Returns:
         Dict[str, Any]: Generated content information
@@ -70,6 +123,7 @@ def generate_content(topic: str, language: str = "tr") -> Dict[str, Any]:
             "response": dummy_content[selected_language]
         }
     
+    streamed: List[str] = []
     try:
         # Initialize OpenAI client
         client = OpenAI(api_key=api_key)
@@ -325,31 +379,37 @@ def generate_content(topic: str, language: str = "tr") -> Dict[str, Any]:
         settings = lang_settings[selected_language]
         
         # Send request
-        response = client.chat.completions.create(
+        response = call_with_retry("openai", client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": settings["system_message"]},
                 {"role": "user", "content": settings["prompt_template"]}
             ],
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=1000,
+            stream=on_sentence is not None
         )
         
-        # Get and process the response
-        content = response.choices[0].message.content
-        
-        # Split the response into sentences - each paragraph is a sentence
-        sentences = []
-        for paragraph in content.strip().split('\n'):
-            paragraph = paragraph.strip()
-            if paragraph:  # Skip empty paragraphs
-                # Remove bullet points and numbers if present
-                cleaned = re.sub(r'^\d+\.\s*|\*\s*|\-\s*', '', paragraph)
-                sentences.append(cleaned)
+        if on_sentence is not None:
+            # Hand over each sentence as soon as its paragraph is complete
+            for sentence in stream_sentences(response):
+                streamed.append(sentence)
+                on_sentence(sentence)
+            sentences = streamed
+        else:
+            # Get and process the response
+            content = response.choices[0].message.content
+            
+            # Split the response into sentences - each paragraph is a sentence
+            sentences = []
+            for paragraph in content.strip().split('\n'):
+                cleaned = clean_paragraph(paragraph)
+                if cleaned:  # Skip empty paragraphs
+                    sentences.append(cleaned)
         
         # Check sentence count and adjust if needed
-        if len(sentences) > 7:
-            sentences = sentences[:7]  # Maximum 7 sentences
+        if len(sentences) > MAX_SENTENCES:
+            sentences = sentences[:MAX_SENTENCES]
         
         # Return results
         return {
@@ -359,6 +419,13 @@ def generate_content(topic: str, language: str = "tr") -> Dict[str, Any]:
     
     except Exception as e:
         print(f"Content generation error: {str(e)}")
+        if streamed:
+            # Sentences already handed to the consumer are kept so both sides agree
+            return {
+                "topic": topic,
+                "response": streamed
+            }
+        
         # Return dummy content in case of error
         dummy_messages = {
             "tr": [
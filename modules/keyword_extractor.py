@@ -4,6 +4,7 @@
 import os
 import openai
 from openai import OpenAI
+from utils.rate_limiter import call_with_retry
 from typing import List, Dict, Any
 import re
 
@@ -153,7 +154,7 @@ def extract_keywords_with_openai(sentences: List[str], topic: str, language: str
     
     # API isteği gönder
     try:
-        response = client.chat.completions.create(
+        response = call_with_retry("openai", client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You extract the most relevant visual keywords from content and translate them to English."},
@@ -8,6 +8,7 @@ import re
 from typing import Dict, Any, List
 import openai
 from openai import OpenAI
+from utils.rate_limiter import call_with_retry
 
 def generate_youtube_metadata(topic: str, content: List[str], api_key: str) -> Dict[str, Any]:
     """
@@ -68,7 +69,7 @@ def generate_youtube_metadata(topic: str, content: List[str], api_key: str) -> D
         Format as JSON with keys: "title", "description", "tags" (as array), "category_id" (as string)
         """
         
-        response = client.chat.completions.create(
+        response = call_with_retry("openai", client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a YouTube metadata specialist who creates engaging titles and descriptions."},
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import subprocess
+from typing import List, Tuple, Dict, Any, Optional
+
+from modules.video_processor import get_ffmpeg_paths, select_videos, plan_clips, build_clip_filter, get_background_mode
+from utils.media_info import probe_media_info
+
+# Tek geçişli render için ortak çıktı profili
+OUTPUT_FPS = 30
+AUDIO_SAMPLE_RATE = 44100
+
+def probe_media(path: str, ffprobe_path: str = "ffprobe") -> Dict[str, Any]:
+    """
+    Bir medya dosyasının süresini ve ses akışı olup olmadığını ortak medya bilgisi önbelleğinden okur
+
+    Args:
+        path (str): Medya dosyasının yolu
+        ffprobe_path (str): FFprobe uygulamasının yolu
+
+    Returns:
+        Dict[str, Any]: {"duration": float, "has_audio": bool}
+    """
+    media = probe_media_info(path, ffprobe_path)
+    if media is None:
+        print(f"Medya bilgisi alınamadı: {path}")
+        return {"duration": 0.0, "has_audio": False}
+    return {"duration": media["duration"], "has_audio": media["has_audio"]}
+
+def escape_filter_path(path: str) -> str:
+    """
+    Dosya yolunu filter_complex içinde kullanılabilecek şekilde kaçışlar (Windows sürücü harfleri dahil)
+
+    Args:
+        path (str): Dosya yolu
+
+    Returns:
+        str: Tek tırnak içine alınmış, kaçışlanmış yol
+    """
+    escaped = os.path.abspath(path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    return f"'{escaped}'"
+
+def plan_render(video_paths: List[str], audio_files: List[str], project_folder: str, resolution: Tuple[int, int],
+                closing_video_path: str = "", subtitle_path: str = "", fonts_dir: str = "",
+                ffprobe_path: str = "ffprobe") -> Dict[str, Any]:
+    """
+    Klip kırpma, 9:16 ölçekleme/bulanıklaştırma, birleştirme, hız ayarı, ses ekleme,
+    altyazı ve kapanış sahnesini tek bir filter_complex grafiğinde toplar
+
+    Args:
+        video_paths (List[str]): İndirilen video dosyalarının yolları
+        audio_files (List[str]): TTS ses dosyalarının yolları (sıralı)
+        project_folder (str): Proje klasörünün yolu
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+        closing_video_path (str): Kapanış videosunun yolu (boşsa eklenmez)
+        subtitle_path (str): Yakılacak ASS/SRT altyazı dosyası (boşsa eklenmez)
+        fonts_dir (str): Altyazı fontlarının bulunduğu klasör
+        ffprobe_path (str): FFprobe uygulamasının yolu
+
+    Returns:
+        Dict[str, Any]: "inputs" (FFmpeg girdi argümanları), "filter_complex", "maps" ve süre bilgileri
+    """
+    width, height = resolution
+    inputs: List[List[str]] = []
+    filters: List[str] = []
+
+    # 1. Klipler - her klip girdi tarafında kırpılır, sadece gerekli kısım çözülür.
+    # Klip pencereleri seslendirme süresini tam kapsayacak şekilde seçilir (süreler önbellekten okunur)
+    narration_duration = sum(probe_media(audio_file, ffprobe_path)["duration"]
+                             for audio_file in audio_files if os.path.exists(audio_file))
+    clips = []
+    if video_paths:
+        selected_videos = select_videos(video_paths, project_folder)
+        clips = plan_clips(selected_videos, ffprobe_path, target_duration=narration_duration or None)
+
+    background_mode = get_background_mode(resolution)
+    video_labels = []
+    for clip in clips:
+        idx = len(inputs)
+        inputs.append(["-ss", f"{clip['start']:.3f}", "-t", f"{clip['duration']:.3f}", "-i", os.path.abspath(clip["path"])])
+        filters.append(build_clip_filter(clip["width"], clip["height"], resolution, f"{idx}:v", f"c{idx}", background_mode))
+        filters.append(f"[c{idx}]fps={OUTPUT_FPS},format=yuv420p,setsar=1:1,setpts=PTS-STARTPTS[v{idx}]")
+        video_labels.append(f"[v{idx}]")
+
+    video_duration = sum(clip["duration"] for clip in clips)
+
+    # 2. Sesler - TTS dosyaları sırayla birleştirilir
+    audio_labels = []
+    audio_duration = 0.0
+    for audio_file in audio_files:
+        if not os.path.exists(audio_file):
+            continue
+        idx = len(inputs)
+        inputs.append(["-i", os.path.abspath(audio_file)])
+        audio_duration += probe_media(audio_file, ffprobe_path)["duration"]
+        audio_labels.append(f"[{idx}:a]")
+
+    # Hiç klip yoksa siyah bir arka plan kullan
+    if not video_labels:
+        fallback_duration = audio_duration if audio_duration > 0 else 5.0
+        idx = len(inputs)
+        inputs.append(["-f", "lavfi", "-i", f"color=c=black:s={width}x{height}:r={OUTPUT_FPS}:d={fallback_duration:.3f}"])
+        filters.append(f"[{idx}:v]format=yuv420p,setsar=1:1[v{idx}]")
+        video_labels.append(f"[v{idx}]")
+        video_duration = fallback_duration
+
+    if len(video_labels) > 1:
+        filters.append(f"{''.join(video_labels)}concat=n={len(video_labels)}:v=1:a=0[vcat]")
+    else:
+        filters.append(f"{video_labels[0]}null[vcat]")
+
+    # 3. Ses ve video süresi uyumu (merge_audio ile aynı kurallar)
+    # Ses %5'ten fazla uzunsa video yavaşlatılır; daha az uzunsa son kare tekrarlanarak
+    # uzatılır, seslendirme hiçbir zaman kesilmez. Video uzunsa ses süresinde kesilir
+    speed_filter = ""
+    if audio_duration > 3 and video_duration > 3 and audio_duration > video_duration * 1.05:
+        speed_filter = f"setpts={audio_duration / video_duration:.6f}*PTS,fps={OUTPUT_FPS},"
+        main_duration = audio_duration
+        print(f"Video sese uyması için yavaşlatılacak: {video_duration:.2f}s -> {audio_duration:.2f}s")
+    elif audio_duration > video_duration > 0:
+        speed_filter = f"tpad=stop_mode=clone:stop_duration={audio_duration - video_duration + 0.5:.3f},"
+        main_duration = audio_duration
+        print(f"Video sesin sonu kesilmesin diye uzatılacak: {video_duration:.2f}s -> {audio_duration:.2f}s")
+    elif audio_duration > 0:
+        main_duration = min(video_duration, audio_duration)
+        if video_duration > audio_duration * 1.1:
+            print(f"Video sese uyması için kırpılacak: {video_duration:.2f}s -> {main_duration:.2f}s")
+    else:
+        main_duration = video_duration
+
+    # 4. Altyazı - ana bölüme yakılır (kapanış sahnesine değil)
+    subtitle_filter = ""
+    if subtitle_path and os.path.exists(subtitle_path):
+        subtitle_filter = f",subtitles={escape_filter_path(subtitle_path)}"
+        if fonts_dir and os.path.isdir(fonts_dir):
+            subtitle_filter += f":fontsdir={escape_filter_path(fonts_dir)}"
+
+    filters.append(f"[vcat]{speed_filter}trim=duration={main_duration:.3f},setpts=PTS-STARTPTS{subtitle_filter}[vmain]")
+
+    audio_format = f"aresample={AUDIO_SAMPLE_RATE}:async=1000,aformat=sample_fmts=fltp:sample_rates={AUDIO_SAMPLE_RATE}:channel_layouts=stereo"
+    if audio_labels:
+        if len(audio_labels) > 1:
+            filters.append(f"{''.join(audio_labels)}concat=n={len(audio_labels)}:v=0:a=1[acat]")
+        else:
+            filters.append(f"{audio_labels[0]}anull[acat]")
+        filters.append(f"[acat]{audio_format},apad,atrim=duration={main_duration:.3f},asetpts=PTS-STARTPTS[amain]")
+    else:
+        filters.append(f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=stereo,atrim=duration={main_duration:.3f},aformat=sample_fmts=fltp[amain]")
+
+    total_duration = main_duration
+
+    # 5. Kapanış sahnesi - aynı profile getirilip sona eklenir
+    if closing_video_path and os.path.exists(closing_video_path):
+        closing_info = probe_media(closing_video_path, ffprobe_path)
+        idx = len(inputs)
+        inputs.append(["-i", os.path.abspath(closing_video_path)])
+        filters.append(f"[{idx}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                       f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={OUTPUT_FPS},format=yuv420p,setsar=1:1[vclose]")
+        if closing_info["has_audio"]:
+            filters.append(f"[{idx}:a]{audio_format}[aclose]")
+        else:
+            filters.append(f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=stereo,atrim=duration={closing_info['duration']:.3f},aformat=sample_fmts=fltp[aclose]")
+        filters.append("[vmain][amain][vclose][aclose]concat=n=2:v=1:a=1[vout][aout]")
+        total_duration += closing_info["duration"]
+    else:
+        filters.append("[vmain]null[vout]")
+        filters.append("[amain]anull[aout]")
+
+    return {
+        "inputs": inputs,
+        "filter_complex": "; ".join(filters),
+        "maps": ["[vout]", "[aout]"],
+        "clip_count": len(clips),
+        "video_duration": video_duration,
+        "audio_duration": audio_duration,
+        "main_duration": main_duration,
+        "total_duration": total_duration
+    }
+
+def build_render_command(plan: Dict[str, Any], output_path: str, ffmpeg_path: str = "ffmpeg") -> List[str]:
+    """
+    Render planından tek seferde kodlayan FFmpeg komutunu oluşturur
+
+    Args:
+        plan (Dict[str, Any]): plan_render çıktısı
+        output_path (str): Çıktı video dosyasının yolu
+        ffmpeg_path (str): FFmpeg uygulamasının yolu
+
+    Returns:
+        List[str]: subprocess ile çalıştırılacak argüman listesi
+    """
+    cmd = [ffmpeg_path, "-y", "-hide_banner"]
+    for input_args in plan["inputs"]:
+        cmd.extend(input_args)
+    cmd.extend(["-filter_complex", plan["filter_complex"]])
+    for label in plan["maps"]:
+        cmd.extend(["-map", label])
+    cmd.extend([
+        "-c:v", "libx264", "-preset", "medium", "-crf", "18", "-profile:v", "high",
+        "-pix_fmt", "yuv420p", "-r", str(OUTPUT_FPS),
+        "-b:v", "5M", "-maxrate", "5M", "-bufsize", "5M",
+        "-c:a", "aac", "-b:a", "256k",
+        "-movflags", "+faststart",
+        os.path.abspath(output_path)
+    ])
+    return cmd
+
+def render_single_pass(video_paths: List[str], audio_files: List[str], project_folder: str, resolution: Tuple[int, int],
+                       closing_video_path: str = "", subtitle_path: str = "", fonts_dir: str = "") -> str:
+    """
+    Final videoyu tek bir FFmpeg çağrısıyla, tek bir H.264 kodlamasıyla üretir
+
+    Args:
+        video_paths (List[str]): İndirilen video dosyalarının yolları
+        audio_files (List[str]): TTS ses dosyalarının yolları
+        project_folder (str): Proje klasörünün yolu
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+        closing_video_path (str): Kapanış videosunun yolu
+        subtitle_path (str): Yakılacak altyazı dosyasının yolu
+        fonts_dir (str): Altyazı fontlarının bulunduğu klasör
+
+    Returns:
+        str: Final video dosyasının yolu
+
+    Raises:
+        RuntimeError: Render başarısız olursa (çağıran taraf çok aşamalı yönteme dönebilir)
+    """
+    ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
+    final_video = os.path.join(project_folder, "final_video.mp4")
+
+    if resolution[0] / resolution[1] != 9/16:
+        raise RuntimeError(f"Desteklenmeyen çözünürlük: {resolution}, 9:16 formatı gerekli")
+
+    plan = plan_render(video_paths, audio_files, project_folder, resolution,
+                       closing_video_path, subtitle_path, fonts_dir, ffprobe_path)
+    cmd = build_render_command(plan, final_video, ffmpeg_path)
+
+    # Plan ve komutu hata ayıklama için kaydet
+    try:
+        with open(os.path.join(project_folder, "render_plan.json"), "w", encoding="utf-8") as f:
+            json.dump({"plan": plan, "command": cmd}, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"Render planı kaydedilemedi: {str(e)}")
+
+    print(f"Tek geçişli render başlatılıyor: {plan['clip_count']} klip, "
+          f"ana bölüm {plan['main_duration']:.2f}s, toplam {plan['total_duration']:.2f}s")
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0 or not os.path.exists(final_video) or os.path.getsize(final_video) == 0:
+        raise RuntimeError(f"Tek geçişli render başarısız: {result.stderr[-2000:] if result.stderr else result.returncode}")
+
+    print(f"Final video tek geçişte oluşturuldu: {final_video}")
+    return final_video
@@ -11,6 +11,7 @@ import textwrap
 import re
 from datetime import datetime
 from openai import OpenAI
+from utils.media_info import media_duration
 
 # PIL modülünü dahil et (kurulu değilse uyarı ver)
 try:
@@ -381,15 +382,12 @@ def render_subtitles(video_path: str, sentences: List[str], font_path: str, proj
         # Altyazılı video dosyasının yolu
         subtitled_video = os.path.join(project_folder, "subtitled_video.mp4")
         
-        # Video süresini öğren
-        duration_cmd = f'"{ffprobe_path}" -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{os.path.abspath(video_path)}"'
-        duration = 0
-        try:
-            result = subprocess.run(duration_cmd, shell=True, capture_output=True, text=True)
-            duration = float(result.stdout.strip())
+        # Video süresini öğren (ortak medya bilgisi önbelleğinden)
+        duration = media_duration(video_path, ffprobe_path)
+        if duration is not None:
             print(f"Video süresi: {duration} saniye")
-        except Exception as e:
-            print(f"Video süresi alınamadı: {str(e)}")
+        else:
+            print(f"Video süresi alınamadı: {video_path}")
             duration = 30  # Varsayılan değer
 
         # Ses dosyalarının sürelerini al - her ses dosyası bir altyazı cümlesi içindir
@@ -418,9 +416,9 @@ def render_subtitles(video_path: str, sentences: List[str], font_path: str, proj
                 if os.path.exists(audio_file):
                     try:
                         # Ses dosyasının süresini al
-                        audio_duration_cmd = f'"{ffprobe_path}" -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{os.path.abspath(audio_file)}"'
-                        audio_result = subprocess.run(audio_duration_cmd, shell=True, capture_output=True, text=True)
-                        file_duration = float(audio_result.stdout.strip())
+                        file_duration = media_duration(audio_file, ffprobe_path)
+                        if file_duration is None:
+                            raise ValueError("süre okunamadı")
                         audio_durations.append(file_duration)
                         audio_total_duration += file_duration
                         with open(subtitle_log_path, "a", encoding="utf-8") as log_file:
@@ -1111,3 +1109,26 @@ def create_word_level_srt(sentences: List[str], timings: List[Dict[str, Any]], o
     except Exception as e:
         print(f"Kelime seviyesinde SRT oluşturma hatası: {str(e)}")
         return False
+
+def prepare_word_level_subtitles(sentences: List[str], project_folder: str) -> str:
+    """
+    Videoya yakılmadan önce kelime seviyesinde ASS altyazı dosyasını hazırlar
+    (tek geçişli render, altyazıyı kendi filtre grafiğine ekler)
+    
+    Args:
+        sentences (List[str]): Altyazı cümleleri (referans için)
+        project_folder (str): Proje klasörünün yolu
+    
+    Returns:
+        str: ASS dosyasının yolu, kelime zamanlamaları yoksa boş string
+    """
+    word_timings = load_word_timings(project_folder)
+    if not word_timings:
+        print("Kelime zamanlamaları bulunamadı, altyazı dosyası oluşturulmadı")
+        return ""
+    
+    ass_path = os.path.join(project_folder, "subtitles.ass")
+    if create_word_level_ass(sentences, word_timings, ass_path):
+        print(f"Kelime seviyesinde ASS dosyası oluşturuldu: {ass_path}")
+        return ass_path
+    return ""
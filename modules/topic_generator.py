@@ -5,6 +5,7 @@ import os
 import json
 import random
 from openai import OpenAI
+from utils.rate_limiter import call_with_retry
 import logging
 import re
 
@@ -108,7 +109,7 @@ def generate_topic(api_key, category=None):
         """
         
         # API isteği
-        response = client.chat.completions.create(
+        response = call_with_retry("openai", client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "Sen viral YouTube Shorts başlıkları üreten bir uzmansın. Başlık üretirken emoji kullanmayı unutma."},
@@ -212,7 +213,7 @@ def generate_english_topic(api_key, category=None):
         """
         
         # API isteği
-        response = client.chat.completions.create(
+        response = call_with_retry("openai", client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an expert at creating viral YouTube Shorts titles IN ENGLISH ONLY. Always use emojis in your titles and never switch to another language."},
@@ -308,7 +309,7 @@ def generate_topics_batch(api_key, count=15, english=True):
             """
             
             # API isteği
-            response = client.chat.completions.create(
+            response = call_with_retry("openai", client.chat.completions.create,
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": "You are an expert at creating viral YouTube Shorts titles in ENGLISH ONLY. Always use emojis in your titles and never switch to another language."},
@@ -340,7 +341,7 @@ def generate_topics_batch(api_key, count=15, english=True):
             """
             
             # Türkçe API isteği
-            response = client.chat.completions.create(
+            response = call_with_retry("openai", client.chat.completions.create,
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": "Sen viral YouTube Shorts başlıkları üreten bir uzmansın. Başlık üretirken emoji kullanmayı unutma. Tüm başlıklar sadece Türkçe olmalı."},
@@ -516,7 +517,7 @@ def generate_topic_international(api_key, language="es", category=None):
         """
         
         # API isteği
-        response = client.chat.completions.create(
+        response = call_with_retry("openai", client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": f"You are an expert at creating viral YouTube Shorts titles in {lang_name} ONLY. Always include emojis in your titles. NEVER use any other language than {lang_name}."},
@@ -6,8 +6,17 @@ import json
 import tempfile
 import shutil
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
+from itertools import islice
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
+from utils.rate_limiter import call_with_retry
+from utils.file_cache import FileCache, get_cache
+from modules.word_aligner import align_words
+from utils.media_info import media_duration
+
+TTS_MODEL = "tts-1"
 import subprocess
 
 def convert_numbers_to_text(text: str) -> str:
@@ -134,12 +143,77 @@ def save_word_timings(transcript: Dict[str, Any], output_path: str) -> bool:
         except:
             return False
 
-def generate_tts(sentences: List[str], api_key: str, voice: str, project_folder: str, language: str = "tr") -> List[str]:
+def tts_cache_key(text: str, voice: str, speed: float, model: str = TTS_MODEL) -> str:
+    """
+    TTS önbelleği için normalize edilmiş metin, ses, hız ve modelden anahtar üretir
+    
+    Args:
+        text (str): Seslendirilecek metin
+        voice (str): Ses adı
+        speed (float): Konuşma hızı
+        model (str): TTS modeli
+    
+    Returns:
+        str: Önbellek anahtarı
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return f"{model}|{voice}|{float(speed):.2f}|{normalized}"
+
+def synthesize_sentence(client: OpenAI, text: str, voice_config: Dict[str, Any], audio_path: str,
+                        ffprobe_path: str = "ffprobe", cache: Optional[FileCache] = None) -> Optional[float]:
+    """
+    Tek bir cümleyi seslendirip dosyaya yazar ve süresini ölçer
+    Önbellekte varsa API çağrısı ve süre ölçümü yapılmadan kayıtlı süre kullanılır
+    
+    Args:
+        client (OpenAI): OpenAI istemcisi
+        text (str): Seslendirilecek metin
+        voice_config (Dict[str, Any]): Ses ve hız ayarları
+        audio_path (str): Çıktı ses dosyasının yolu
+        ffprobe_path (str): FFprobe uygulamasının yolu
+        cache (FileCache): TTS ses önbelleği (None ise kullanılmaz)
+    
+    Returns:
+        Optional[float]: Ses süresi (saniye) veya ölçülemezse None
+    """
+    cache_key = tts_cache_key(text, voice_config["voice"], voice_config["speed"]) if cache is not None else None
+    if cache_key:
+        meta = cache.get_meta(cache_key)
+        if meta and meta.get("duration") is not None and cache.link_to(cache_key, audio_path):
+            print(f"TTS önbellekten alındı: {audio_path}")
+            return float(meta["duration"])
+    
+    response = call_with_retry("openai", client.audio.speech.create,
+        model=TTS_MODEL,
+        voice=voice_config["voice"],
+        input=text,
+        speed=voice_config["speed"]
+    )
+    
+    # Önce geçici dosyaya yaz, tamamlanınca hedefe taşı
+    temp_path = audio_path + ".part.mp3"
+    response.stream_to_file(temp_path)
+    os.replace(temp_path, audio_path)
+    
+    # Ses süresini hesapla (MP3 başlıklarından, gerekirse ffprobe ile)
+    duration = media_duration(audio_path, ffprobe_path)
+    if duration is None:
+        print(f"Ses süresi hesaplanamadı: {audio_path}")
+        return None
+    
+    # Süresi ölçülen sesler önbelleğe eklenir
+    if cache_key:
+        cache.put(cache_key, audio_path, {"duration": duration, "voice": voice_config["voice"],
+                                          "speed": voice_config["speed"], "model": TTS_MODEL})
+    return duration
+
+def generate_tts(sentences: Iterable[str], api_key: str, voice: str, project_folder: str, language: str = "tr") -> List[str]:
     """
     Verilen metinleri TTS ile seslendirme dosyalarına dönüştürür
+    Cümleler bir akıştan da gelebilir; her cümlenin seslendirmesi geldiği anda başlar
     
     Args:
-        sentences (List[str]): Seslendirilecek cümleler
+        sentences (Iterable[str]): Seslendirilecek cümleler (liste veya içerik üretimi sürerken cümle veren akış)
         api_key (str): OpenAI API anahtarı
         voice (str): Kullanılacak ses (örn. "onyx", "alloy")
         project_folder (str): Proje klasörünün yolu
@@ -160,14 +234,16 @@ def generate_tts(sentences: List[str], api_key: str, voice: str, project_folder:
         client = OpenAI(api_key=api_key)
         
         # Toplam TTS süresini sınırla - maksimum 60 saniye
-        max_sentences = min(len(sentences), 10)  # Maximum 10 cümle kullan
+        max_sentences = 10  # Maximum 10 cümle kullan
         total_duration = 0
         max_total_duration = 60  # Maksimum 60 saniye
         
-        # FFmpeg yolunu config.json'dan al (ses süresi hesaplaması için)
+        # FFmpeg yollarını config.json'dan al (ses süresi hesaplaması, birleştirme ve hizalama için)
         config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
         ffprobe_path = "ffprobe"
+        ffmpeg_path = "ffmpeg"
         
+        config = {}
         if os.path.exists(config_path):
             try:
                 with open(config_path, "r", encoding="utf-8") as f:
@@ -175,108 +251,91 @@ def generate_tts(sentences: List[str], api_key: str, voice: str, project_folder:
                     
                     if "ffprobe_path" in config:
                         ffprobe_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config["ffprobe_path"])
+                    if "ffmpeg_path" in config:
+                        ffmpeg_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config["ffmpeg_path"])
             except:
                 pass
         
-        for i, sentence in enumerate(sentences[:max_sentences]):
-            # Ses dosyasının adı
-            audio_path = os.path.join(tts_folder, f"audio_{i+1:02d}.mp3")
-            
-            # Temiz bir cümle hazırla ve sayıları yazıya çevir
-            clean_sentence = sentence.strip()
-            if not clean_sentence:
-                continue
-            
-            # Sayıları yazıya çevir (1881 -> bin sekiz yüz seksen bir) - Türkçe içinse
-            if language == "tr":
-                clean_sentence = convert_numbers_to_text(clean_sentence)
-            
-            print(f"TTS için hazırlanan metin ({language}): {clean_sentence}")
-            
-            # TTS oluştur - hızı dile göre ayarla
-            # Varsayılan hız 1.0, akıcı konuşma için 1.2
-            voice_speed = 1.2
-            
-            # Dile özel ayarlar
-            voice_options = {
-                "tr": {"voice": voice, "speed": 1.2},
-                "en": {"voice": voice, "speed": 1.0},
-                "es": {"voice": voice, "speed": 1.1},
-                "fr": {"voice": voice, "speed": 1.1},
-                "de": {"voice": voice, "speed": 1.1},
-                "it": {"voice": voice, "speed": 1.1},
-                "pt": {"voice": voice, "speed": 1.1},
-                "ru": {"voice": voice, "speed": 1.0},
-                "zh": {"voice": voice, "speed": 0.9},
-                "ja": {"voice": voice, "speed": 1.0},
-                "ko": {"voice": voice, "speed": 1.0},
-                "ar": {"voice": voice, "speed": 1.1}
-            }
-            
-            # Dile göre ayarları al veya varsayılan kullan
-            voice_config = voice_options.get(language, {"voice": voice, "speed": 1.0})
-            
-            # TTS oluştur
-            response = client.audio.speech.create(
-                model="tts-1",
-                voice=voice_config["voice"],
-                input=clean_sentence,
-                speed=voice_config["speed"]
-            )
-            
-            # Tempfile ile geçici dosya oluştur
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_path = temp_file.name
-                
-                # İçeriği geçici dosyaya yaz
-                response.stream_to_file(temp_path)
-                
-                # Ses süresini hesapla (ffprobe ile)
-                try:
-                    duration_cmd = f'"{ffprobe_path}" -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{temp_path}"'
-                    result = subprocess.run(duration_cmd, shell=True, capture_output=True, text=True)
-                    file_duration = float(result.stdout.strip())
-                    
-                    # Toplam süreyi kontrol et ve gerekirse döngüyü sonlandır
-                    if total_duration + file_duration > max_total_duration:
-                        print(f"TTS süresi sınırını ({max_total_duration} saniye) aştı, sonraki cümleler atlanıyor.")
-                        break
-                    
-                    total_duration += file_duration
-                except Exception as dur_error:
-                    print(f"Ses süresi hesaplama hatası: {str(dur_error)}")
+        # Dile özel ayarlar - varsayılan hız 1.0, akıcı konuşma için 1.2
+        voice_options = {
+            "tr": {"voice": voice, "speed": 1.2},
+            "en": {"voice": voice, "speed": 1.0},
+            "es": {"voice": voice, "speed": 1.1},
+            "fr": {"voice": voice, "speed": 1.1},
+            "de": {"voice": voice, "speed": 1.1},
+            "it": {"voice": voice, "speed": 1.1},
+            "pt": {"voice": voice, "speed": 1.1},
+            "ru": {"voice": voice, "speed": 1.0},
+            "zh": {"voice": voice, "speed": 0.9},
+            "ja": {"voice": voice, "speed": 1.0},
+            "ko": {"voice": voice, "speed": 1.0},
+            "ar": {"voice": voice, "speed": 1.1}
+        }
+        
+        # Dile göre ayarları al veya varsayılan kullan
+        voice_config = voice_options.get(language, {"voice": voice, "speed": 1.0})
+        
+        # Cümleleri geldikleri sırayla paralel seslendir (dosya numarası cümle sırasını korur),
+        # sonuçları orijinal sırayla topla
+        concurrency = max(1, int(config.get("tts_concurrency", 4))) if config else 4
+        tts_cache = get_cache("tts", 1024)
+        jobs = []
+        futures = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for i, sentence in enumerate(islice(sentences, max_sentences)):
+                # Temiz bir cümle hazırla ve sayıları yazıya çevir
+                clean_sentence = sentence.strip()
+                if not clean_sentence:
+                    continue
                 
-                # Geçici dosyayı kopyala
-                shutil.copy2(temp_path, audio_path)
+                # Sayıları yazıya çevir (1881 -> bin sekiz yüz seksen bir) - Türkçe içinse
+                if language == "tr":
+                    clean_sentence = convert_numbers_to_text(clean_sentence)
                 
-                # Temizle
+                print(f"TTS için hazırlanan metin ({language}): {clean_sentence}")
+                audio_path = os.path.join(tts_folder, f"audio_{i+1:02d}.mp3")
+                jobs.append((audio_path, clean_sentence))
+                futures.append(executor.submit(synthesize_sentence, client, clean_sentence, voice_config,
+                                               audio_path, ffprobe_path, tts_cache))
+            
+            results = []
+            for (audio_path, _), future in zip(jobs, futures):
                 try:
-                    os.unlink(temp_path)
-                except:
-                    pass
-                
-                # Ses dosyasını listeye ekle
-                audio_files.append(audio_path)
-                print(f"Ses dosyası oluşturuldu ({language}): {audio_path}")
-                
-                # Artık her ses dosyası için ayrı ayrı Whisper analizi yapmıyoruz
-                # Bunun yerine tüm ses dosyalarını birleştirip tek bir analiz yapacağız
+                    results.append((audio_path, future.result()))
+                except Exception as e:
+                    print(f"TTS üretme hatası ({audio_path}): {str(e)}")
+                    results.append((audio_path, False))
+        
+        # Sırayla ilerleyerek 60 saniye sınırını uygula
+        for index, (audio_path, file_duration) in enumerate(results):
+            if file_duration is False:
+                # Sıra bozulmasın diye ilk hatalı cümlede dur
+                dropped = results[index:]
+                break
+            
+            if file_duration is not None:
+                # Toplam süreyi kontrol et ve gerekirse sonraki cümleleri atla
+                if total_duration + file_duration > max_total_duration:
+                    print(f"TTS süresi sınırını ({max_total_duration} saniye) aştı, sonraki cümleler atlanıyor.")
+                    dropped = results[index:]
+                    break
+                total_duration += file_duration
+            
+            # Ses dosyasını listeye ekle
+            audio_files.append(audio_path)
+            print(f"Ses dosyası oluşturuldu ({language}): {audio_path}")
+        else:
+            dropped = []
+        
+        # Sınır dışında kalan dosyaları sil
+        for audio_path, _ in dropped:
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
         
         # Ses dosyalarını birleştir
         merged_audio = os.path.join(tts_folder, "merged_audio.mp3")
         
         if len(audio_files) > 1:
-            # FFmpeg yolunu config.json'dan al
-            ffmpeg_path = "ffmpeg"
-            if os.path.exists(config_path):
-                try:
-                    with open(config_path, "r", encoding="utf-8") as f:
-                        config = json.load(f)
-                        if "ffmpeg_path" in config:
-                            ffmpeg_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config["ffmpeg_path"])
-                except:
-                    pass
-            
             # Birleştirme için concat listesi oluştur
             concat_list_path = os.path.join(tts_folder, "concat_list.txt")
             with open(concat_list_path, "w", encoding="utf-8") as f:
@@ -310,14 +369,24 @@ def generate_tts(sentences: List[str], api_key: str, voice: str, project_folder:
             with open(merged_audio, 'wb') as f:
                 f.write(b'')
         
+        # Kelime zamanlamaları: varsayılan olarak cümle metinleri ve sesleri kullanılarak yerelde
+        # hizalanır, sadece "word_timing": "whisper" seçilirse veya yerel hizalama başarısız olursa
+        # birleştirilmiş ses Whisper API'ye gönderilir
+        timing_path = os.path.join(tts_folder, "full_timing.json")
+        aligned = False
+        if config.get("word_timing", "local") == "local" and audio_files:
+            spoken_texts = dict(jobs)
+            aligned = align_words([(path, spoken_texts[path]) for path in audio_files], timing_path, ffmpeg_path, language) is not None
+            if aligned:
+                print(f"Tam kelime zamanlamaları kaydedildi: {timing_path}")
+        
         # Birleştirilmiş ses dosyasını Whisper API ile analiz et
-        if os.path.exists(merged_audio) and os.path.getsize(merged_audio) > 0:
+        if not aligned and os.path.exists(merged_audio) and os.path.getsize(merged_audio) > 0:
             try:
                 print("Birleştirilmiş ses dosyası Whisper API ile analiz ediliyor...")
                 transcript = analyze_audio_with_whisper(merged_audio, api_key)
                 
                 # Kelime zamanlamalarını kaydet
-                timing_path = os.path.join(tts_folder, "full_timing.json")
                 save_word_timings(transcript, timing_path)
                 print(f"Tam kelime zamanlamaları kaydedildi: {timing_path}")
             except Exception as whisper_error:
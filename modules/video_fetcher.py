@@ -10,10 +10,44 @@ import base64
 import asyncio
 import aiohttp
 import aiofiles
+import io
+import re
 from typing import List, Dict, Any, Tuple, Optional
 from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from utils.shell_utils import run_command, is_windows
+from utils.file_cache import FileCache, get_cache, load_cache_settings
+from utils.score_cache import ScoreCache, get_score_cache, text_fingerprint
+from utils.http_client import resolve_session
+from utils.rate_limiter import limited_request, call_with_retry
+from utils.range_downloader import download_ranged, download_window, throughput_report
+from utils.mp4_index import write_valid_window
+from modules.video_processor import MIN_CLIP_DURATION, allocate_clip_durations, get_max_clip_duration
+
+# PIL varsa thumbnail'ler gönderilmeden önce küçültülür
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Tek bir görsel isteğinde puanlanan en fazla thumbnail sayısı
+THUMBNAIL_BATCH_SIZE = 8
+# Toplu puanlamada thumbnail'in en uzun kenarı (piksel)
+THUMBNAIL_MAX_SIDE = 512
+# Video başına indirilecek en fazla klip sayısı
+MAX_DOWNLOADS = 5
+# Hedef çıktı kare hızı ve stok videolar için tahmini piksel başına bit (H.264)
+TARGET_FPS = 30
+ESTIMATED_BITS_PER_PIXEL = 0.1
+# Kısmi indirme: bu süreden uzun kliplerde sadece ortadaki pencere (+ pay) indirilir
+PARTIAL_MIN_DURATION = 20.0
+PARTIAL_MARGIN = 1.0
+# Seslendirme süresi tahmini için konuşma hızı (karakter/saniye). TTS genelde daha hızlı okur;
+# düşük tutulan değer pencerelerin seslendirmeye yetmeyecek kadar kısa kalmasını önler
+NARRATION_CHARS_PER_SECOND = 12.0
+# process_videos'un kullandığı en uzun toplam süre (saniye)
+MAX_NARRATION_DURATION = 60.0
 
 # Eski fonksiyonlar yorum satırına alındı
 """
@@ -198,7 +232,7 @@ async def translate_keywords_to_english(keywords: List[str], openai_api_key: str
         
         # API isteği
         try:
-            response = client.chat.completions.create(
+            response = call_with_retry("openai", client.chat.completions.create,
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": "You are a translator that accurately translates keywords."},
@@ -242,7 +276,9 @@ async def translate_keywords_to_english(keywords: List[str], openai_api_key: str
         return keywords  # Hata durumunda orijinal kelimeleri döndür
 
 # Yeni asenkron arama fonksiyonu - dil parametresi eklendi
-async def search_videos_by_keywords(keywords: List[str], api_key: str, openai_api_key: str = "", language: str = "tr", per_page: int = 5) -> List[Dict[str, Any]]:
+async def search_videos_by_keywords(keywords: List[str], api_key: str, openai_api_key: str = "", language: str = "tr", per_page: int = 5,
+                                    session: Optional[aiohttp.ClientSession] = None,
+                                    target_resolution: Tuple[int, int] = (1080, 1920)) -> List[Dict[str, Any]]:
     """
     Pexels API kullanarak anahtar kelimelere göre video arar ve thumbnail bilgilerini döndürür
     
@@ -252,6 +288,8 @@ async def search_videos_by_keywords(keywords: List[str], api_key: str, openai_ap
         openai_api_key (str): OpenAI API anahtarı (çeviri için)
         language (str): Anahtar kelimelerin dili (default: "tr")
         per_page (int): Her aramada dönecek video sayısı
+        session (aiohttp.ClientSession): Paylaşılan HTTP oturumu (None ise ortak oturum kullanılır)
+        target_resolution (Tuple[int, int]): Çıktı videosunun çözünürlüğü (indirilecek dosya seçimi için)
     
     Returns:
         List[Dict[str, Any]]: Video bilgilerini içeren liste
@@ -268,30 +306,85 @@ async def search_videos_by_keywords(keywords: List[str], api_key: str, openai_ap
     english_keywords = keywords
     
     # Her anahtar kelime için asenkron arama yap
-    async with aiohttp.ClientSession() as session:
-        search_tasks = []
-        
-        for i, keyword in enumerate(english_keywords):
-            # Boş anahtar kelimeleri atla
-            if not keyword.strip():
-                continue
-                
-            url = f"https://api.pexels.com/videos/search?query={keyword}&per_page={per_page}"
-            # Orijinal (çevrilmemiş) anahtar kelimeyi de parametre olarak geçirelim
-            original_keyword = keywords[i] if i < len(keywords) else keyword
-            search_tasks.append(fetch_keyword_videos(session, url, headers, keyword, original_keyword))
-        
-        # Tüm aramaları paralel olarak çalıştır
-        keyword_results = await asyncio.gather(*search_tasks)
-        
-        # Sonuçları birleştir
-        for result in keyword_results:
-            all_videos.extend(result)
+    session = resolve_session(session)
+    search_tasks = []
+    
+    for i, keyword in enumerate(english_keywords):
+        # Boş anahtar kelimeleri atla
+        if not keyword.strip():
+            continue
+            
+        url = f"https://api.pexels.com/videos/search?query={keyword}&per_page={per_page}"
+        # Orijinal (çevrilmemiş) anahtar kelimeyi de parametre olarak geçirelim
+        original_keyword = keywords[i] if i < len(keywords) else keyword
+        search_tasks.append(fetch_keyword_videos(session, url, headers, keyword, original_keyword, target_resolution))
+    
+    # Tüm aramaları paralel olarak çalıştır
+    keyword_results = await asyncio.gather(*search_tasks)
+    
+    # Sonuçları birleştir
+    for result in keyword_results:
+        all_videos.extend(result)
     
     print(f"Toplam {len(all_videos)} adet potansiyel video bulundu.")
     return all_videos
 
-async def fetch_keyword_videos(session, url: str, headers: Dict[str, str], keyword: str, original_keyword: str = None) -> List[Dict[str, Any]]:
+def estimate_rendition_bytes(video_file: Dict[str, Any], duration: float) -> int:
+    """
+    Bir video dosyasının verilen süre için yaklaşık boyutunu tahmin eder
+    
+    Args:
+        video_file (Dict[str, Any]): Pexels video_files öğesi (width, height, fps)
+        duration (float): Süre (saniye)
+    
+    Returns:
+        int: Tahmini bayt sayısı
+    """
+    fps = video_file.get("fps") or TARGET_FPS
+    pixels = (video_file.get("width") or 0) * (video_file.get("height") or 0)
+    return int(pixels * fps * ESTIMATED_BITS_PER_PIXEL * duration / 8)
+
+def select_rendition(video_files: List[Dict[str, Any]], target_resolution: Tuple[int, int] = (1080, 1920),
+                     target_fps: float = TARGET_FPS) -> Optional[Dict[str, Any]]:
+    """
+    Hedef çözünürlük ve kare hızını karşılayan en küçük video dosyasını seçer
+    Dikey dosyalar önceliklidir. Yatay kaynaklar kare kırpıldığından kısa kenarın
+    hedef genişliğe yetmesi yeterlidir. Kare hızını karşılayan dosya yoksa (24/25 fps kaynaklar)
+    çözünürlüğü yeten en küçük dosya, o da yoksa en büyük dosya seçilir.
+    
+    Args:
+        video_files (List[Dict[str, Any]]): Pexels video_files listesi
+        target_resolution (Tuple[int, int]): Çıktı çözünürlüğü (genişlik, yükseklik)
+        target_fps (float): Çıktı kare hızı
+    
+    Returns:
+        Optional[Dict[str, Any]]: Seçilen dosya veya uygun dosya yoksa None
+    """
+    candidates = [v for v in video_files if v.get("link") and v.get("width") and v.get("height")]
+    portrait_videos = [v for v in candidates if v["width"] < v["height"]]
+    if portrait_videos:
+        candidates = portrait_videos
+    if not candidates:
+        return None
+    
+    target_side = min(target_resolution)
+    
+    def meets_resolution(video_file: Dict[str, Any]) -> bool:
+        return min(video_file["width"], video_file["height"]) >= target_side
+    
+    def meets_fps(video_file: Dict[str, Any]) -> bool:
+        fps = video_file.get("fps")
+        # 29.97 gibi değerler 30 kabul edilir
+        return not fps or fps >= target_fps * 0.95
+    
+    large_enough = [v for v in candidates if meets_resolution(v)]
+    sufficient = [v for v in large_enough if meets_fps(v)] or large_enough
+    if sufficient:
+        return min(sufficient, key=lambda v: estimate_rendition_bytes(v, 1.0))
+    return max(candidates, key=lambda v: v["width"] * v["height"])
+
+async def fetch_keyword_videos(session, url: str, headers: Dict[str, str], keyword: str, original_keyword: str = None,
+                               target_resolution: Tuple[int, int] = (1080, 1920)) -> List[Dict[str, Any]]:
     """
     Belirli bir anahtar kelime için video arar
     
@@ -301,6 +394,7 @@ async def fetch_keyword_videos(session, url: str, headers: Dict[str, str], keywo
         headers (Dict[str, str]): API başlıkları
         keyword (str): Aranan anahtar kelime (İngilizce)
         original_keyword (str): Orijinal anahtar kelime
+        target_resolution (Tuple[int, int]): Çıktı videosunun çözünürlüğü
     
     Returns:
         List[Dict[str, Any]]: Video bilgilerini içeren liste
@@ -309,7 +403,7 @@ async def fetch_keyword_videos(session, url: str, headers: Dict[str, str], keywo
     try:
         display_keyword = original_keyword or keyword
         print(f"'{display_keyword}' için Pexels API'ye istek gönderiliyor...")
-        async with session.get(url, headers=headers, timeout=30) as response:
+        async with limited_request(session, "GET", url, "pexels", headers=headers, timeout=30) as response:
             if response.status == 200:
                 data = await response.json()
                 
@@ -322,31 +416,25 @@ async def fetch_keyword_videos(session, url: str, headers: Dict[str, str], keywo
                         # Video thumbnail URL'si kontrolü
                         thumbnail_url = video.get("image")
                         if thumbnail_url:
-                            # En yüksek çözünürlüklü video dosyasını bul
-                            video_files = video.get("video_files", [])
-                            portrait_videos = [v for v in video_files if v.get("width", 0) < v.get("height", 0)]
-                            
-                            if not portrait_videos:
-                                portrait_videos = video_files
+                            # Hedef çözünürlüğü karşılayan en küçük video dosyasını seç
+                            rendition = select_rendition(video.get("video_files", []), target_resolution)
                             
-                            # Çözünürlüğe göre sırala (en yüksek başta)
-                            if portrait_videos:
-                                portrait_videos.sort(key=lambda x: x.get("width", 0) * x.get("height", 0), reverse=True)
-                                video_url = portrait_videos[0].get("link")
-                                
-                                if video_url:
-                                    # Video bilgilerini sakla
-                                    video_info = {
-                                        "id": video.get("id"),
-                                        "keyword": display_keyword,
-                                        "thumbnail_url": thumbnail_url,
-                                        "video_url": video_url,
-                                        "width": portrait_videos[0].get("width"),
-                                        "height": portrait_videos[0].get("height"),
-                                        "duration": video.get("duration"),
-                                        "index": i
-                                    }
-                                    videos.append(video_info)
+                            if rendition:
+                                # Video bilgilerini sakla
+                                video_info = {
+                                    "id": video.get("id"),
+                                    "keyword": display_keyword,
+                                    "thumbnail_url": thumbnail_url,
+                                    "video_url": rendition.get("link"),
+                                    "file_id": rendition.get("id"),
+                                    "width": rendition.get("width"),
+                                    "height": rendition.get("height"),
+                                    "fps": rendition.get("fps"),
+                                    "duration": video.get("duration"),
+                                    "estimated_bytes": estimate_rendition_bytes(rendition, video.get("duration") or 0),
+                                    "index": i
+                                }
+                                videos.append(video_info)
                 else:
                     print(f"'{display_keyword}' için sonuç bulunamadı!")
             else:
@@ -387,7 +475,9 @@ async def download_thumbnail(session, video_info: Dict[str, Any], temp_folder: s
     
     return video_info, None
 
-async def evaluate_thumbnail_relevance(thumbnail_path: str, topic: str, content: List[str], openai_api_key: str) -> Tuple[str, float]:
+async def evaluate_thumbnail_relevance(thumbnail_path: str, topic: str, content: List[str], openai_api_key: str,
+                                       score_cache: Optional[ScoreCache] = None, cache_key: Optional[str] = None,
+                                       session: Optional[aiohttp.ClientSession] = None) -> Tuple[str, float]:
     """
     GPT-4o kullanarak thumbnail'in konu ile alakasını değerlendirir
     
@@ -396,6 +486,9 @@ async def evaluate_thumbnail_relevance(thumbnail_path: str, topic: str, content:
         topic (str): Ana konu
         content (List[str]): İçerik metni
         openai_api_key (str): OpenAI API anahtarı
+        score_cache (ScoreCache): Puan önbelleği (başarılı puanlar buraya yazılır)
+        cache_key (str): Thumbnail'in önbellek anahtarı
+        session (aiohttp.ClientSession): Paylaşılan HTTP oturumu (None ise ortak oturum kullanılır)
     
     Returns:
         Tuple[str, float]: Thumbnail yolu ve alaka puanı (0-10)
@@ -452,86 +545,339 @@ async def evaluate_thumbnail_relevance(thumbnail_path: str, topic: str, content:
             "max_tokens": 150
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    response_text = result["choices"][0]["message"]["content"]
-                    
-                    # Yanıttan puanı çıkar
-                    try:
-                        # "[PUAN]: [AÇIKLAMA]" veya "[SCORE]: [EXPLANATION]" formatında yanıt bekliyoruz
-                        # Önce iki nokta üstüne göre ayır
-                        if ":" in response_text:
-                            score_text = response_text.split(":")[0].strip()
-                        # Eğer iki nokta üstü yoksa, ilk sayıyı bulmaya çalış
+        async with limited_request(resolve_session(session), "POST", "https://api.openai.com/v1/chat/completions", "openai", headers=headers, json=payload) as response:
+            if response.status == 200:
+                result = await response.json()
+                response_text = result["choices"][0]["message"]["content"]
+                
+                # Yanıttan puanı çıkar
+                try:
+                    # "[PUAN]: [AÇIKLAMA]" veya "[SCORE]: [EXPLANATION]" formatında yanıt bekliyoruz
+                    # Önce iki nokta üstüne göre ayır
+                    if ":" in response_text:
+                        score_text = response_text.split(":")[0].strip()
+                    # Eğer iki nokta üstü yoksa, ilk sayıyı bulmaya çalış
+                    else:
+                        import re
+                        score_match = re.search(r'\b(\d+(\.\d+)?)\b', response_text)
+                        if score_match:
+                            score_text = score_match.group(1)
                         else:
-                            import re
-                            score_match = re.search(r'\b(\d+(\.\d+)?)\b', response_text)
-                            if score_match:
-                                score_text = score_match.group(1)
-                            else:
-                                raise ValueError("Score not found in response")
-                        
-                        # Puanı dönüştür
-                        score = float(score_text)
-                        
-                        # Puan 0-10 arasında olmalı
-                        score = max(0.0, min(10.0, score))
-                        
-                        print(f"Thumbnail puanı: {score}/10 - {thumbnail_path}")
-                        return thumbnail_path, score
-                    except Exception as parse_error:
-                        # Puan çıkarılamazsa varsayılan değer
-                        print(f"Puan çıkarılamadı: {response_text} - Hata: {str(parse_error)}")
-                        return thumbnail_path, 0.0
-                else:
-                    error_text = await response.text()
-                    print(f"GPT-4o API hatası: {response.status} - {error_text}")
+                            raise ValueError("Score not found in response")
+                    
+                    # Puanı dönüştür
+                    score = float(score_text)
+                    
+                    # Puan 0-10 arasında olmalı
+                    score = max(0.0, min(10.0, score))
+                    
+                    print(f"Thumbnail puanı: {score}/10 - {thumbnail_path}")
+                    # Sadece API'den gerçekten alınan puanlar önbelleğe yazılır
+                    if score_cache is not None and cache_key:
+                        score_cache.set(cache_key, score)
+                    return thumbnail_path, score
+                except Exception as parse_error:
+                    # Puan çıkarılamazsa varsayılan değer
+                    print(f"Puan çıkarılamadı: {response_text} - Hata: {str(parse_error)}")
                     return thumbnail_path, 0.0
+            else:
+                error_text = await response.text()
+                print(f"GPT-4o API hatası: {response.status} - {error_text}")
+                return thumbnail_path, 0.0
     except Exception as e:
         print(f"Thumbnail değerlendirme hatası: {str(e)}")
         return thumbnail_path, 0.0
 
-async def download_video(video_url: str, destination: str) -> str:
+def encode_thumbnail(thumbnail_path: str, max_side: int = THUMBNAIL_MAX_SIDE) -> str:
+    """
+    Thumbnail'i küçültüp base64 JPEG olarak kodlar (PIL yoksa dosya olduğu gibi kodlanır)
+    
+    Args:
+        thumbnail_path (str): Thumbnail dosya yolu
+        max_side (int): En uzun kenarın piksel sınırı
+    
+    Returns:
+        str: Base64 kodlanmış görsel
+    """
+    if PIL_AVAILABLE:
+        try:
+            with Image.open(thumbnail_path) as image:
+                image = image.convert("RGB")
+                image.thumbnail((max_side, max_side))
+                buffer = io.BytesIO()
+                image.save(buffer, format="JPEG", quality=80)
+                return base64.b64encode(buffer.getvalue()).decode('utf-8')
+        except Exception as e:
+            print(f"Thumbnail küçültme hatası: {str(e)}")
+    
+    with open(thumbnail_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode('utf-8')
+
+def parse_batch_scores(response_text: str, count: int) -> Optional[List[float]]:
+    """
+    Toplu puanlama yanıtından görsel başına puanları çıkarır
+    
+    Args:
+        response_text (str): Model yanıtı ({"scores": [...]} JSON'u beklenir)
+        count (int): Gönderilen görsel sayısı
+    
+    Returns:
+        Optional[List[float]]: Görsel sırasına göre puanlar veya ayrıştırılamazsa None
+    """
+    try:
+        data = json.loads(response_text)
+        scores = data.get("scores") if isinstance(data, dict) else data
+    except Exception:
+        # JSON bozuksa metindeki sayıları sırayla al
+        scores = [match for match in re.findall(r'\b\d+(?:\.\d+)?\b', response_text)]
+    
+    if not isinstance(scores, list) or len(scores) != count:
+        return None
+    
+    try:
+        return [max(0.0, min(10.0, float(score))) for score in scores]
+    except (TypeError, ValueError):
+        return None
+
+async def evaluate_thumbnails_batch(thumbnail_paths: List[str], topic: str, content: List[str], openai_api_key: str,
+                                    score_cache: Optional[ScoreCache] = None,
+                                    cache_keys: Optional[List[Optional[str]]] = None,
+                                    session: Optional[aiohttp.ClientSession] = None) -> List[float]:
+    """
+    Birden fazla thumbnail'i tek bir GPT-4o isteğinde puanlar
+    Konu ve içerik metni istek başına bir kez gönderilir, görseller küçültülüp düşük detayla eklenir
+    Yanıt ayrıştırılamazsa thumbnail'ler tek tek değerlendirilir
+    
+    Args:
+        thumbnail_paths (List[str]): Thumbnail dosya yolları
+        topic (str): Ana konu
+        content (List[str]): İçerik metni
+        openai_api_key (str): OpenAI API anahtarı
+        score_cache (ScoreCache): Puan önbelleği (başarılı puanlar buraya yazılır)
+        cache_keys (List[Optional[str]]): Her thumbnail'in önbellek anahtarı
+        session (aiohttp.ClientSession): Paylaşılan HTTP oturumu (None ise ortak oturum kullanılır)
+    
+    Returns:
+        List[float]: Thumbnail sırasına göre alaka puanları (0-10)
+    """
+    if not thumbnail_paths:
+        return []
+    cache_keys = cache_keys or [None] * len(thumbnail_paths)
+    
+    async def evaluate_one_by_one() -> List[float]:
+        results = await asyncio.gather(*[
+            evaluate_thumbnail_relevance(path, topic, content, openai_api_key, score_cache, key, session)
+            for path, key in zip(thumbnail_paths, cache_keys)
+        ])
+        return [score for _, score in results]
+    
+    if len(thumbnail_paths) == 1:
+        return await evaluate_one_by_one()
+    
+    try:
+        content_text = "\n".join(content)
+        count = len(thumbnail_paths)
+        is_english = any(word in topic.lower() for word in ["what", "why", "how", "if", "can", "do", "is", "are", "will", "would"]) or "?" in topic
+        
+        if is_english:
+            system_content = "Rate how relevant each image is to the given topic and content on a scale of 0-10. Respond only with JSON."
+            user_text = f"Topic: {topic}\n\nContent: {content_text}\n\nThe following {count} images are numbered 1 to {count} in order. Rate each image's relevance to the topic and content on a scale of 0-10. Return only JSON in the format {{\"scores\": [score_1, ..., score_{count}]}}"
+        else:
+            system_content = "Her görselin verilen konu ve içerikle ne kadar alakalı olduğunu 0-10 arasında değerlendir. Sadece JSON ile yanıt ver."
+            user_text = f"Konu: {topic}\n\nİçerik: {content_text}\n\nAşağıdaki {count} görsel sırasıyla 1'den {count}'e kadar numaralandırılmıştır. Her görselin konuyla ve içerikle alakasını 0-10 arasında puanla. Sadece {{\"scores\": [puan_1, ..., puan_{count}]}} formatında JSON döndür."
+        
+        user_content = [{"type": "text", "text": user_text}]
+        for path in thumbnail_paths:
+            user_content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{encode_thumbnail(path)}",
+                    "detail": "low"
+                }
+            })
+        
+        payload = {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": system_content},
+                {"role": "user", "content": user_content}
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 20 + 10 * count
+        }
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {openai_api_key}"
+        }
+        
+        async with limited_request(resolve_session(session), "POST", "https://api.openai.com/v1/chat/completions", "openai", headers=headers, json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                print(f"GPT-4o toplu puanlama hatası: {response.status} - {error_text}")
+                return await evaluate_one_by_one()
+            result = await response.json()
+            response_text = result["choices"][0]["message"]["content"]
+        
+        scores = parse_batch_scores(response_text, count)
+        if scores is None:
+            print(f"Toplu puanlar ayrıştırılamadı, thumbnail'ler tek tek değerlendirilecek: {response_text}")
+            return await evaluate_one_by_one()
+        
+        for path, score in zip(thumbnail_paths, scores):
+            print(f"Thumbnail puanı: {score}/10 - {path}")
+        
+        if score_cache is not None:
+            score_cache.update({key: score for key, score in zip(cache_keys, scores) if key})
+        return scores
+    except Exception as e:
+        print(f"Toplu thumbnail değerlendirme hatası: {str(e)}")
+        return await evaluate_one_by_one()
+
+async def download_video(video_url: str, destination: str, session: Optional[aiohttp.ClientSession] = None) -> str:
     """
     Belirtilen URL'den videoyu asenkron olarak indirir
+    Büyük dosyalar paralel Range istekleriyle indirilir, yarıda kalan .temp dosyaları kaldığı yerden devam eder
     
     Args:
         video_url (str): Video URL'si
         destination (str): Kaydedilecek dosya yolu
+        session (aiohttp.ClientSession): Paylaşılan HTTP oturumu (None ise ortak oturum kullanılır)
     
     Returns:
         str: İndirilen dosya yolu veya boş string
     """
-    temp_file = destination + ".temp"
-    
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(video_url, timeout=300) as response:
-                if response.status == 200:
-                    # Geçici dosyaya kaydet
-                    async with aiofiles.open(temp_file, 'wb') as f:
-                        async for chunk in response.content.iter_chunked(8192):
-                            await f.write(chunk)
-                    
-                    # Geçici dosyayı hedef dosyaya taşı
-                    shutil.move(temp_file, destination)
-                    print(f"Video başarıyla indirildi: {destination}")
-                    return destination
-                else:
-                    print(f"Video indirme hatası - HTTP {response.status}")
-                    return ""
+        await download_ranged(resolve_session(session), video_url, destination)
+        print(f"Video başarıyla indirildi: {destination}")
+        return destination
     except Exception as e:
+        # Geçici dosya bir sonraki denemede devam edebilmek için korunur
         print(f"Video indirme hatası: {str(e)}")
-        # Geçici dosyayı temizle
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
         return ""
 
+def thumbnail_score_key(video_info: Dict[str, Any], fingerprint: str, provider: str = "pexels") -> str:
+    """
+    Thumbnail puan önbelleği için anahtar üretir
+    
+    Args:
+        video_info (Dict[str, Any]): Video bilgileri
+        fingerprint (str): Konunun normalize edilmiş parmak izi
+        provider (str): Video sağlayıcısı
+    
+    Returns:
+        str: Önbellek anahtarı
+    """
+    return f"{provider}:{video_info.get('id')}:{fingerprint}"
+
+def stock_cache_key(video_info: Dict[str, Any], provider: str = "pexels") -> str:
+    """
+    Stok video önbelleği için sağlayıcı, video id ve çözünürlüğe göre anahtar üretir
+    
+    Args:
+        video_info (Dict[str, Any]): Video bilgileri
+        provider (str): Video sağlayıcısı
+    
+    Returns:
+        str: Önbellek anahtarı
+    """
+    rendition = video_info.get("file_id") or f"{video_info.get('width')}x{video_info.get('height')}"
+    return f"{provider}:{video_info.get('id')}:{rendition}"
+
+def estimate_clip_budget(videos: List[Dict[str, Any]], content: List[str]) -> float:
+    """
+    Seslendirme süresini metin uzunluğundan tahmin ederek klip başına kullanılacak süreyi hesaplar
+    process_videos klipleri seslendirme süresine göre paylaştırdığından, uzun kaynaklara düşen pay
+    sabit klip süresini aşabilir. Pay, kısa kaynakların tamamen kullanıldığı en kötü durum için hesaplanır.
+    
+    Args:
+        videos (List[Dict[str, Any]]): İndirilecek videoların bilgileri (duration)
+        content (List[str]): Seslendirilecek cümleler
+    
+    Returns:
+        float: Klip başına kullanılacak en uzun süre (saniye)
+    """
+    clip_budget = get_max_clip_duration(len(videos))
+    narration = min(sum(len(sentence) for sentence in content or []) / NARRATION_CHARS_PER_SECOND, MAX_NARRATION_DURATION)
+    if not videos or narration <= 0:
+        return clip_budget
+    
+    # plan_clips ile aynı klip sayısı ve paylaştırma; en kısa kaynakların seçildiği varsayılır
+    clip_count = max(1, min(len(videos), int(narration // MIN_CLIP_DURATION)))
+    available = sorted(video.get("duration") or clip_budget for video in videos)[:clip_count]
+    return max([clip_budget] + allocate_clip_durations(available, narration))
+
+def partial_window(video_info: Dict[str, Any], clip_budget: float) -> Optional[Tuple[float, float]]:
+    """
+    Uzun kliplerde render'da kullanılacak orta pencereyi (pay ile birlikte) hesaplar
+    process_videos uzun kaynakların ortasından en fazla clip_budget saniye alır
+    
+    Args:
+        video_info (Dict[str, Any]): Video bilgileri (duration)
+        clip_budget (float): Klip başına kullanılacak en fazla süre (saniye)
+    
+    Returns:
+        Optional[Tuple[float, float]]: (başlangıç, bitiş) saniye veya kısmi indirme gerekmiyorsa None
+    """
+    duration = video_info.get("duration") or 0
+    half = clip_budget / 2 + PARTIAL_MARGIN
+    # Pencere dosyanın tamamını kapsıyorsa tüm dosya indirilir
+    if duration < PARTIAL_MIN_DURATION or 2 * half >= duration:
+        return None
+    return max(0.0, duration / 2 - half), min(float(duration), duration / 2 + half)
+
+async def download_video_cached(video_info: Dict[str, Any], destination: str, cache: Optional[FileCache] = None,
+                                session: Optional[aiohttp.ClientSession] = None,
+                                window: Optional[Tuple[float, float]] = None) -> str:
+    """
+    Videoyu projeler arası paylaşılan önbellekten alır, yoksa indirip önbelleğe ekler
+    window verilirse MP4 dizini okunarak sadece o zaman aralığının baytları indirilir
+    
+    Args:
+        video_info (Dict[str, Any]): Video bilgileri
+        destination (str): Proje klasöründeki hedef dosya yolu
+        cache (FileCache): Stok video önbelleği (None ise doğrudan indirilir)
+        session (aiohttp.ClientSession): Paylaşılan HTTP oturumu (None ise ortak oturum kullanılır)
+        window (Tuple[float, float]): Sadece indirilecek zaman aralığı (saniye), None ise tüm dosya
+    
+    Returns:
+        str: Video dosyasının yolu veya boş string
+    """
+    use_cache = cache is not None and bool(video_info.get("id"))
+    cache_key = stock_cache_key(video_info) if use_cache else ""
+    
+    # Tam dosya her pencere için geçerlidir, önce onu dene
+    if use_cache and cache.link_to(cache_key, destination):
+        print(f"Video önbellekten alındı: {destination}")
+        return destination
+    
+    if window is not None:
+        window_key = f"{cache_key}:window={window[0]:.1f}-{window[1]:.1f}"
+        if use_cache and cache.link_to(window_key, destination):
+            write_valid_window(destination, window[0], window[1])
+            print(f"Video (kısmi) önbellekten alındı: {destination}")
+            return destination
+        
+        try:
+            info = await download_window(resolve_session(session), video_info["video_url"], destination, window[0], window[1])
+        except Exception as e:
+            print(f"Kısmi indirme hatası, tüm dosya indirilecek: {str(e)}")
+            info = None
+        if info:
+            if use_cache:
+                cache.put(window_key, destination, {"url": video_info["video_url"], "keyword": video_info.get("keyword"),
+                                                    "window": [window[0], window[1]]})
+            return destination
+    
+    path = await download_video(video_info["video_url"], destination, session)
+    if path and use_cache:
+        cache.put(cache_key, path, {"url": video_info["video_url"], "keyword": video_info.get("keyword")})
+    return path
+
 # Ana video arama fonksiyonu - dil parametresi eklendi
 async def fetch_videos(keywords: List[str], pexels_api_key: str, openai_api_key: str, topic: str, content: List[str], 
-                       project_folder: str, min_score: float = 5.0, language: str = "tr") -> List[str]:
+                       project_folder: str, min_score: float = 5.0, language: str = "tr",
+                       session: Optional[aiohttp.ClientSession] = None,
+                       target_resolution: Tuple[int, int] = (1080, 1920)) -> List[str]:
     """
     Pexels API kullanarak anahtar kelimelere göre video arar ve indirir
     Her video için OpenAI API ile ilgi düzeyi değerlendirmesi yapar
@@ -545,6 +891,8 @@ async def fetch_videos(keywords: List[str], pexels_api_key: str, openai_api_key:
         project_folder (str): Proje klasörünün yolu
         min_score (float): Minimum ilgi düzeyi puanı (0-10 arasında)
         language (str): Anahtar kelimelerin dili (default: "tr")
+        session (aiohttp.ClientSession): Paylaşılan HTTP oturumu (None ise ortak oturum kullanılır)
+        target_resolution (Tuple[int, int]): Çıktı videosunun çözünürlüğü (indirilecek dosya seçimi için)
     
     Returns:
         List[str]: İndirilen video dosyalarının yolları
@@ -567,30 +915,57 @@ async def fetch_videos(keywords: List[str], pexels_api_key: str, openai_api_key:
         return []
     
     # Videoları ara - İngilizce arama için dil kodunu gönder
-    videos = await search_videos_by_keywords(keywords, pexels_api_key, openai_api_key, language)
+    # Tüm istekler aynı bağlantı havuzunu kullanır
+    session = resolve_session(session)
+    videos = await search_videos_by_keywords(keywords, pexels_api_key, openai_api_key, language, session=session,
+                                             target_resolution=target_resolution)
     
     if not videos:
         print("Hiç video bulunamadı!")
         return []
     
+    # Aynı video daha önce aynı veya neredeyse aynı konu için puanlandıysa puanı önbellekten al.
+    # İçerik her çalışmada yeniden üretildiğinden parmak izine dahil edilmez, sadece konu kullanılır
+    score_cache = get_score_cache("thumbnail")
+    fingerprint = text_fingerprint(topic)
+    cached_scores = []
+    videos_to_score = []
+    for video in videos:
+        cached_score = score_cache.get(thumbnail_score_key(video, fingerprint)) if video.get("id") else None
+        if cached_score is None:
+            videos_to_score.append(video)
+        else:
+            cached_scores.append((video, cached_score))
+    
+    if cached_scores:
+        print(f"{len(cached_scores)} thumbnail puanı önbellekten alındı, {len(videos_to_score)} thumbnail değerlendirilecek.")
+    
     # Thumbnailleri indir
-    async with aiohttp.ClientSession() as session:
-        thumbnail_tasks = [download_thumbnail(session, video, temp_folder) for video in videos]
-        thumbnail_results = await asyncio.gather(*thumbnail_tasks)
+    thumbnail_tasks = [download_thumbnail(session, video, temp_folder) for video in videos_to_score]
+    thumbnail_results = await asyncio.gather(*thumbnail_tasks)
     
     # Başarılı thumbnail indirmelerini topla
     successful_thumbnails = [(video, thumb_path) for video, thumb_path in thumbnail_results if thumb_path]
     
-    # Thumbnailleri değerlendir
-    evaluation_tasks = [evaluate_thumbnail_relevance(thumb_path, topic, content, openai_api_key) 
-                        for video, thumb_path in successful_thumbnails]
-    evaluation_results = await asyncio.gather(*evaluation_tasks)
+    # Thumbnailleri gruplar halinde, grup başına tek bir istekle değerlendir
+    batches = [successful_thumbnails[i:i + THUMBNAIL_BATCH_SIZE]
+               for i in range(0, len(successful_thumbnails), THUMBNAIL_BATCH_SIZE)]
+    evaluation_tasks = [
+        evaluate_thumbnails_batch(
+            [thumb_path for _, thumb_path in batch], topic, content, openai_api_key, score_cache,
+            [thumbnail_score_key(video, fingerprint) if video.get("id") else None for video, _ in batch],
+            session
+        )
+        for batch in batches
+    ]
+    batch_results = await asyncio.gather(*evaluation_tasks)
+    evaluation_scores = [score for batch_scores in batch_results for score in batch_scores]
     
     # Thumbnailleri puanlara göre eşleştir
+    all_scores = cached_scores + [(successful_thumbnails[i][0], score) for i, score in enumerate(evaluation_scores)]
     scored_videos = []
-    for i, (_, score) in enumerate(evaluation_results):
+    for video_info, score in all_scores:
         if score >= min_score:
-            video_info = successful_thumbnails[i][0]
             video_info["score"] = score
             scored_videos.append(video_info)
     
@@ -600,20 +975,36 @@ async def fetch_videos(keywords: List[str], pexels_api_key: str, openai_api_key:
     print(f"Minimum puan {min_score}/10 üzerinde {len(scored_videos)} video bulundu.")
     
     # En iyi videoları indir (en fazla 5 adet)
-    download_limit = min(5, len(scored_videos))
+    download_limit = min(MAX_DOWNLOADS, len(scored_videos))
     videos_to_download = scored_videos[:download_limit]
     
-    # Videoları asenkron olarak indir
+    # İndirilecek ve render'da kullanılacak tahmini veri miktarı
+    # Klip başına süre, seslendirmenin tahmini uzunluğuna göre belirlenir (kısmi indirme penceresi de buna göre)
+    clip_budget = estimate_clip_budget(videos_to_download, content)
+    estimated_total = sum(video.get("estimated_bytes", 0) for video in videos_to_download)
+    estimated_used = sum(estimate_rendition_bytes(video, min(video.get("duration") or clip_budget, clip_budget))
+                         for video in videos_to_download)
+    print(f"Tahmini indirme: {estimated_total / (1024 * 1024):.1f} MB "
+          f"(klip başına {clip_budget:.1f} sn kullanılacak, ~{estimated_used / (1024 * 1024):.1f} MB)")
+    
+    # Videoları asenkron olarak indir - daha önce indirilenler paylaşılan önbellekten bağlanır
+    stock_cache = get_cache("stock", 5120)
+    partial_fetch = load_cache_settings().get("partial_fetch", False)
     download_tasks = []
     for i, video in enumerate(videos_to_download):
         video_path = os.path.join(video_folder, f"video_{video['keyword']}_{i+1}.mp4")
-        download_tasks.append(download_video(video["video_url"], video_path))
+        window = partial_window(video, clip_budget) if partial_fetch else None
+        download_tasks.append(download_video_cached(video, video_path, stock_cache, session, window))
     
     downloaded_videos = await asyncio.gather(*download_tasks)
     
     # Boş olmayan yolları filtrele
     successful_downloads = [path for path in downloaded_videos if path]
     
+    # Sunucu bazında indirme hızlarını raporla
+    for host, stats in throughput_report().items():
+        print(f"İndirme hızı - {host}: {stats['mbps']:.2f} MB/s ({int(stats['downloads'])} dosya, {stats['bytes'] / (1024 * 1024):.1f} MB)")
+    
     # Geçici klasörü temizle
     try:
         shutil.rmtree(temp_folder)
@@ -6,237 +6,681 @@ import subprocess
 import random
 import json
 import shutil
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from utils.file_cache import FileCache, get_cache, file_fingerprint
+from utils.mp4_index import read_valid_window
+from utils.media_info import probe_media_info, media_duration
 
-def process_videos(video_paths: List[str], resolution: Tuple[int, int], project_folder: str) -> str:
+# Normalize edilmiş kliplerin kodlama ayarları (önbellek anahtarının da parçasıdır)
+# Tüm klipler aynı codec, kare hızı, zaman ölçeği ve SAR ile sessiz üretilir; böylece
+# concat demuxer ile yeniden kodlamadan (-c copy) birleştirilebilirler. Ses sonradan eklenir.
+CLIP_ENCODER_ARGS = "-c:v libx264 -preset medium -crf 18 -profile:v high -pix_fmt yuv420p -r 30 -vsync cfr -video_track_timescale 15360"
+CLIP_RATE_ARGS = "-an -y -b:v 5M -maxrate 5M -bufsize 5M"
+# Akış kopyalamalı birleştirmenin kabul edilen süre sapması (saniye)
+CONCAT_DURATION_TOLERANCE = 0.5
+CLIP_FPS = 30
+# Seslendirmeye göre planlamada bir klibin en kısa süresi (saniye)
+MIN_CLIP_DURATION = 2.5
+# Bulanık arka plan bu oranda küçültülmüş karede hesaplanıp tekrar büyütülür
+BLUR_DOWNSCALE = 4
+# Bulanık arka plan yöntemleri: tam çözünürlükte, küçültülmüş karede veya tek karelik sabit arka plan
+BACKGROUND_MODES = ("full", "downscaled", "static")
+DEFAULT_BACKGROUND_MODE = "downscaled"
+
+def load_config() -> Dict[str, Any]:
     """
-    İndirilen videoları işler ve 9:16 formatına uygun hale getirir
-    Her videodan maksimum 10 saniye alarak çeşitliliği artırır
-    Ana konuyla ilgili videoları öncelikli olarak seçer
-    
-    Args:
-        video_paths (List[str]): İşlenecek video dosyalarının yolları
-        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
-        project_folder (str): Proje klasörünün yolu
+    config.json dosyasını okur
     
     Returns:
-        str: İşlenmiş video dosyasının yolu
+        Dict[str, Any]: Yapılandırma (dosya yoksa veya okunamazsa boş sözlük)
     """
-    # FFmpeg yolunu config.json'dan al
     config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
-    ffmpeg_path = "ffmpeg"
-    ffprobe_path = "ffprobe"
-    
     if os.path.exists(config_path):
         try:
             with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                
-                if "ffmpeg_path" in config:
-                    ffmpeg_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config["ffmpeg_path"])
-                
-                if "ffprobe_path" in config:
-                    ffprobe_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config["ffprobe_path"])
+                return json.load(f)
         except:
             pass
+    return {}
+
+def get_ffmpeg_paths() -> Tuple[str, str]:
+    """
+    FFmpeg ve FFprobe yollarını config.json'dan alır
     
-    if not video_paths:
-        print("Uyarı: İşlenecek video bulunamadı!")
-        # Bir örnek video dosyası oluştur
-        create_empty_video(project_folder, resolution, ffmpeg_path)
-        return os.path.join(project_folder, "processed_video.mp4")
+    Returns:
+        Tuple[str, str]: (ffmpeg_path, ffprobe_path)
+    """
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = load_config()
+    ffmpeg_path = "ffmpeg"
+    ffprobe_path = "ffprobe"
     
-    try:
-        # Anahtar kelime öncelikli video seçimi
-        # Video dosya adlarından anahtar kelimeleri çıkar
-        keyword_videos = {}
-        primary_keyword = None
+    if "ffmpeg_path" in config:
+        ffmpeg_path = os.path.join(root_dir, config["ffmpeg_path"])
+    
+    if "ffprobe_path" in config:
+        ffprobe_path = os.path.join(root_dir, config["ffprobe_path"])
+    
+    return ffmpeg_path, ffprobe_path
+
+def select_videos(video_paths: List[str], project_folder: str, max_videos: int = 10, primary_video_count: int = 4) -> List[str]:
+    """
+    Anahtar kelime öncelikli video seçimi yapar
+    Ana konuyla ilgili videoları öncelikli olarak seçer, kalan boşlukları diğer anahtar kelimelerle doldurur
+    
+    Args:
+        video_paths (List[str]): İndirilen video dosyalarının yolları
+        project_folder (str): Proje klasörünün yolu
+        max_videos (int): Toplam maksimum video sayısı
+        primary_video_count (int): Ana konudan seçilecek minimum video sayısı
+    
+    Returns:
+        List[str]: Seçilen video dosyalarının yolları
+    """
+    # Video dosya adlarından anahtar kelimeleri çıkar
+    keyword_videos = {}
+    primary_keyword = None
+    
+    for video_path in video_paths:
+        # Dosya adından anahtar kelimeyi çıkar (video_Keyword_1.mp4 formatı)
+        filename = os.path.basename(video_path)
+        parts = filename.split('_')
         
-        for video_path in video_paths:
-            # Dosya adından anahtar kelimeyi çıkar (video_Keyword_1.mp4 formatı)
-            filename = os.path.basename(video_path)
-            parts = filename.split('_')
+        if len(parts) >= 3 and parts[0] == "video":
+            keyword = parts[1]
             
-            if len(parts) >= 3 and parts[0] == "video":
-                keyword = parts[1]
-                
-                # Anahtar kelimeye göre videoları grupla
-                if keyword not in keyword_videos:
-                    keyword_videos[keyword] = []
-                
-                keyword_videos[keyword].append(video_path)
+            # Anahtar kelimeye göre videoları grupla
+            if keyword not in keyword_videos:
+                keyword_videos[keyword] = []
+            
+            keyword_videos[keyword].append(video_path)
+            
+            # İlk karşılaşılan anahtar kelimeyi ana konu olarak kabul et
+            if primary_keyword is None:
+                primary_keyword = keyword
+    
+    print(f"Bulunan anahtar kelimeler: {list(keyword_videos.keys())}")
+    print(f"Ana konu: {primary_keyword}")
+    
+    # Anahtar kelime bazlı pexels_keywords.txt dosyasını kontrol et
+    keywords_file = os.path.join(project_folder, "pexels_keywords.txt")
+    if os.path.exists(keywords_file):
+        try:
+            with open(keywords_file, "r", encoding="utf-8") as f:
+                file_keywords = [line.strip() for line in f.readlines()]
+                if file_keywords:
+                    # İlk anahtar kelimeyi ana konu olarak kabul et
+                    primary_keyword = file_keywords[0]
+                    print(f"pexels_keywords.txt'den ana konu: {primary_keyword}")
+        except Exception as e:
+            print(f"pexels_keywords.txt okuma hatası: {str(e)}")
+    
+    # Seçilecek videoları belirle
+    selected_videos = []
+    
+    # Önce ana konuyla ilgili videoları ekle
+    if primary_keyword and primary_keyword in keyword_videos:
+        primary_videos = keyword_videos[primary_keyword]
+        # Ana konu videolarını karıştır
+        random.shuffle(primary_videos)
+        # Ana konudan minimum sayıda video seç
+        selected_count = min(len(primary_videos), primary_video_count)
+        selected_videos.extend(primary_videos[:selected_count])
+        print(f"Ana konu '{primary_keyword}'dan {selected_count} video seçildi")
+    
+    # Kalan boşlukları diğer anahtar kelimelerle doldur
+    remaining_slots = max_videos - len(selected_videos)
+    other_keywords = [k for k in keyword_videos.keys() if k != primary_keyword]
+    
+    if other_keywords and remaining_slots > 0:
+        # Her anahtar kelimeden eşit sayıda video seç
+        videos_per_keyword = remaining_slots // len(other_keywords)
+        if videos_per_keyword == 0:
+            videos_per_keyword = 1
+        
+        for keyword in other_keywords:
+            if len(selected_videos) >= max_videos:
+                break
                 
-                # İlk karşılaşılan anahtar kelimeyi ana konu olarak kabul et
-                if primary_keyword is None:
-                    primary_keyword = keyword
+            videos = keyword_videos[keyword]
+            random.shuffle(videos)
+            # Bu anahtar kelimeden seçilecek video sayısı
+            to_select = min(len(videos), videos_per_keyword, max_videos - len(selected_videos))
+            selected_videos.extend(videos[:to_select])
+            print(f"'{keyword}' anahtar kelimesinden {to_select} video seçildi")
+    
+    # Hala boş slot varsa, kalan videoları ekle
+    if len(selected_videos) < max_videos:
+        remaining_videos = [v for v in video_paths if v not in selected_videos]
+        random.shuffle(remaining_videos)
+        remaining_count = min(len(remaining_videos), max_videos - len(selected_videos))
+        selected_videos.extend(remaining_videos[:remaining_count])
+        print(f"Kalan boşluklar için {remaining_count} video daha seçildi")
+    
+    print(f"Toplam {len(selected_videos)} video seçildi")
+    return selected_videos
+
+def get_max_clip_duration(total_videos: int) -> float:
+    """
+    Video sayısına göre her klipten alınacak maksimum süreyi hesaplar
+    Video sayısı arttıkça süreyi azaltır, azaldıkça artırır
+    
+    Args:
+        total_videos (int): Seçilen video sayısı
+    
+    Returns:
+        float: Klip başına maksimum süre (saniye)
+    """
+    # 5 video veya daha az: 10 saniye
+    # 15 video veya daha fazla: 5 saniye
+    # Aradaki değerler için doğrusal interpolasyon
+    if total_videos <= 5:
+        return 10.0
+    elif total_videos >= 15:
+        return 5.0
+    else:
+        # 5 ile 15 video arasında doğrusal interpolasyon
+        return 10.0 - (total_videos - 5) * (5.0 / 10.0)
+
+def allocate_clip_durations(available: List[float], target_duration: float, fps: int = CLIP_FPS) -> List[float]:
+    """
+    Hedef süreyi klipler arasında mümkün olduğunca eşit paylaştırır
+    Kaynağı paydan kısa olan klipler tamamen kullanılır, kalan süre diğerlerine dağıtılır.
+    Süreler kare sınırına yuvarlanır; böylece birleştirilen kliplerin toplamı hedefi tam karşılar.
+    
+    Args:
+        available (List[float]): Her klibin kullanılabilir en uzun süresi (saniye)
+        target_duration (float): Kapsanacak toplam süre (saniye)
+        fps (int): Çıktı kare hızı
+    
+    Returns:
+        List[float]: Klip başına süreler (kaynaklar yetmezse toplam hedeften kısa kalır)
+    """
+    available_frames = [int(duration * fps) for duration in available]
+    remaining = int(round(target_duration * fps))
+    frames = [0] * len(available)
+    open_clips = [i for i, count in enumerate(available_frames) if count > 0]
+    
+    # Eşit pay dağıtımı: payı karşılayamayan klipler tamamen kullanılır
+    while open_clips and remaining > 0:
+        share = remaining // len(open_clips)
+        short = [i for i in open_clips if available_frames[i] - frames[i] <= share]
+        if short:
+            for i in short:
+                remaining -= available_frames[i] - frames[i]
+                frames[i] = available_frames[i]
+                open_clips.remove(i)
+            continue
+        for i in open_clips:
+            frames[i] += share
+        remaining -= share * len(open_clips)
+        # Bölümden artan kareler sırayla dağıtılır
+        for i in open_clips[:remaining]:
+            frames[i] += 1
+        remaining = 0
+    
+    return [count / fps for count in frames]
+
+def plan_clips(selected_videos: List[str], ffprobe_path: str = "ffprobe", max_duration: float = 60,
+               target_duration: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Seçilen videoların boyutlarını ve sürelerini okuyarak her klip için kırpma penceresini belirler
+    
+    Hedef süre (seslendirme süresi) verilirse klip sayısı ve pencereler toplamı tam bu süreyi
+    kapsayacak şekilde seçilir; böylece video sonradan yavaşlatılmaz veya kırpılmaz.
+    
+    Args:
+        selected_videos (List[str]): Seçilen video dosyalarının yolları
+        ffprobe_path (str): FFprobe uygulamasının yolu
+        max_duration (float): Toplam maksimum süre (saniye)
+        target_duration (float): Kapsanacak toplam süre (None ise klip başına sabit süre kullanılır)
+    
+    Returns:
+        List[Dict[str, Any]]: Her klip için path, index, width, height, start ve duration bilgileri
+    """
+    # Her videonun boyutunu, süresini ve kullanılabilir penceresini oku
+    sources = []
+    for i, video_path in enumerate(selected_videos):
+        if not os.path.exists(video_path):
+            print(f"Video dosyası bulunamadı: {video_path}")
+            continue
         
-        print(f"Bulunan anahtar kelimeler: {list(keyword_videos.keys())}")
-        print(f"Ana konu: {primary_keyword}")
+        # Video boyutlarını ve süresini al (dosya başına tek okuma, sonuç önbellekte tutulur)
+        try:
+            info = probe_media_info(video_path, ffprobe_path)
+            if not info or not info["width"] or not info["height"]:
+                raise ValueError("video akışı okunamadı")
+        except Exception as e:
+            print(f"Video bilgisi alınamadı veya dönüştürme hatası: {str(e)}")
+            continue
         
-        # Anahtar kelime bazlı pexels_keywords.txt dosyasını kontrol et
-        keywords_file = os.path.join(project_folder, "pexels_keywords.txt")
-        if os.path.exists(keywords_file):
-            try:
-                with open(keywords_file, "r", encoding="utf-8") as f:
-                    file_keywords = [line.strip() for line in f.readlines()]
-                    if file_keywords:
-                        # İlk anahtar kelimeyi ana konu olarak kabul et
-                        primary_keyword = file_keywords[0]
-                        print(f"pexels_keywords.txt'den ana konu: {primary_keyword}")
-            except Exception as e:
-                print(f"pexels_keywords.txt okuma hatası: {str(e)}")
+        # Kısmi indirilmiş kaynaklarda sadece indirilen pencere kullanılabilir
+        window = read_valid_window(video_path)
+        usable_start, usable_end = window if window else (0.0, info["duration"])
+        usable_end = min(usable_end, info["duration"])
+        if usable_end - usable_start <= 0:
+            print(f"Kısmi videonun geçerli penceresi boş, atlanıyor: {video_path}")
+            continue
         
-        # Seçilecek videoları belirle
-        selected_videos = []
-        max_videos = 10  # Toplam maksimum video sayısı
-        primary_video_count = 4  # Ana konudan seçilecek minimum video sayısı
+        sources.append({
+            "path": video_path,
+            "index": i,
+            "width": info["width"],
+            "height": info["height"],
+            "original_duration": info["duration"],
+            "window": (usable_start, usable_end),
+            "partial": window is not None
+        })
+    
+    if target_duration:
+        target_duration = min(target_duration, max_duration)
+        # Klipler çok kısa kalmasın diye klip sayısı hedef süreye göre sınırlanır
+        clip_count = max(1, min(len(sources), int(target_duration // MIN_CLIP_DURATION)))
+        sources = sources[:clip_count]
+        durations = allocate_clip_durations([source["window"][1] - source["window"][0] for source in sources], target_duration)
+        print(f"Seslendirme süresi {target_duration:.2f} saniye, {len(sources)} klip ile kapsanacak")
+        if sum(durations) < target_duration - 0.5:
+            print(f"Uyarı: Videolar seslendirmeyi kapsamaya yetmiyor ({sum(durations):.2f} saniye)")
+    else:
+        max_clip_duration = get_max_clip_duration(len(selected_videos))
+        print(f"Video sayısı: {len(selected_videos)}, her video için maksimum süre: {max_clip_duration:.2f} saniye")
+        durations = [min(source["original_duration"], max_clip_duration) for source in sources]
+    
+    clips = []
+    total_duration = 0
+    for source, clip_duration in zip(sources, durations):
+        original_duration = source["original_duration"]
+        usable_start, usable_end = source["window"]
         
-        # Önce ana konuyla ilgili videoları ekle
-        if primary_keyword and primary_keyword in keyword_videos:
-            primary_videos = keyword_videos[primary_keyword]
-            # Ana konu videolarını karıştır
-            random.shuffle(primary_videos)
-            # Ana konudan minimum sayıda video seç
-            selected_count = min(len(primary_videos), primary_video_count)
-            selected_videos.extend(primary_videos[:selected_count])
-            print(f"Ana konu '{primary_keyword}'dan {selected_count} video seçildi")
+        # Eğer video 10 saniyeden uzunsa, ortasından al
+        if original_duration > 10.0:
+            # Videonun ortasından başla
+            start_time = (original_duration - clip_duration) / 2
+        else:
+            # Kısa videolarda baştan başla
+            start_time = 0
         
-        # Kalan boşlukları diğer anahtar kelimelerle doldur
-        remaining_slots = max_videos - len(selected_videos)
-        other_keywords = [k for k in keyword_videos.keys() if k != primary_keyword]
+        # Pencere, kullanılabilir bölgenin içinde kalacak şekilde kaydırılır
+        start_time = max(usable_start, min(start_time, usable_end - clip_duration))
+        clip_duration = min(clip_duration, usable_end - start_time)
+        if clip_duration <= 0:
+            continue
         
-        if other_keywords and remaining_slots > 0:
-            # Her anahtar kelimeden eşit sayıda video seç
-            videos_per_keyword = remaining_slots // len(other_keywords)
-            if videos_per_keyword == 0:
-                videos_per_keyword = 1
-            
-            for keyword in other_keywords:
-                if len(selected_videos) >= max_videos:
-                    break
-                    
-                videos = keyword_videos[keyword]
-                random.shuffle(videos)
-                # Bu anahtar kelimeden seçilecek video sayısı
-                to_select = min(len(videos), videos_per_keyword, max_videos - len(selected_videos))
-                selected_videos.extend(videos[:to_select])
-                print(f"'{keyword}' anahtar kelimesinden {to_select} video seçildi")
+        # Toplam süreyi kontrol et
+        if total_duration + clip_duration > max_duration + 1e-6:
+            print(f"Toplam süre sınırına ulaşıldı ({max_duration} saniye), kalan videolar atlanıyor.")
+            break
+        
+        total_duration += clip_duration
+        clips.append({
+            "path": source["path"],
+            "index": source["index"],
+            "width": source["width"],
+            "height": source["height"],
+            "start": start_time,
+            "duration": clip_duration,
+            "partial": source["partial"]
+        })
+    
+    return clips
+
+def get_background_mode(resolution: Tuple[int, int]) -> str:
+    """
+    Çıktı profili için bulanık arka plan yöntemini config.json'dan okur
+    
+    "background_mode" tek bir yöntem adı ("full", "downscaled", "static") veya
+    çözünürlüğe göre eşleme olabilir, örn. {"1080x1920": "downscaled", "720x1280": "static", "default": "full"}
+    
+    Args:
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+    
+    Returns:
+        str: Arka plan yöntemi
+    """
+    setting = load_config().get("background_mode", DEFAULT_BACKGROUND_MODE)
+    if isinstance(setting, dict):
+        setting = setting.get(f"{resolution[0]}x{resolution[1]}", setting.get("default", DEFAULT_BACKGROUND_MODE))
+    if setting not in BACKGROUND_MODES:
+        print(f"Bilinmeyen arka plan yöntemi: {setting}, {DEFAULT_BACKGROUND_MODE} kullanılacak")
+        return DEFAULT_BACKGROUND_MODE
+    return setting
+
+def build_background_filter(input_label: str, output_label: str, resolution: Tuple[int, int],
+                            mode: str = DEFAULT_BACKGROUND_MODE) -> str:
+    """
+    9:16 karenin boş kalan kısımlarını dolduran bulanık arka plan zincirini oluşturur
+    
+    "full" her kareyi tam çözünürlükte bulanıklaştırır, "downscaled" küçültülmüş karede
+    bulanıklaştırıp büyütür, "static" sadece ilk kareyi bulanıklaştırıp klip boyunca tekrarlar.
+    
+    Args:
+        input_label (str): Girdi etiketi (köşeli parantezsiz)
+        output_label (str): Çıktı etiketi (köşeli parantezsiz)
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+        mode (str): Arka plan yöntemi
+    
+    Returns:
+        str: filter_complex zinciri
+    """
+    width, height = resolution
+    if mode == "full":
+        return f"[{input_label}]scale={width}:{height},boxblur=20:5,setsar=1:1[{output_label}]"
+    
+    # Tam çözünürlükte boxblur grafiğin en pahalı filtresidir; küçük karede yarıçapın
+    # aynı oranda küçültülmüş hali neredeyse aynı görüntüyü verir
+    blur_width = max(2, width // BLUR_DOWNSCALE // 2 * 2)
+    blur_height = max(2, height // BLUR_DOWNSCALE // 2 * 2)
+    blur_radius = max(1, 20 // BLUR_DOWNSCALE)
+    blur = f"scale={blur_width}:{blur_height}:flags=fast_bilinear,boxblur={blur_radius}:5,scale={width}:{height}:flags=bilinear,setsar=1:1"
+    if mode == "static":
+        # Tek kare bulanıklaştırılır ve sonsuz döngüyle klip boyunca tekrarlanır (overlay shortest=1 ile biter)
+        return f"[{input_label}]trim=end_frame=1,{blur},loop=loop=-1:size=1,setpts=N/{CLIP_FPS}/TB[{output_label}]"
+    return f"[{input_label}]{blur}[{output_label}]"
+
+def build_clip_filter(width: int, height: int, resolution: Tuple[int, int], input_label: str = "0:v", output_label: str = "",
+                      background_mode: str = DEFAULT_BACKGROUND_MODE) -> str:
+    """
+    Bir klibi 9:16 formatına getiren filter_complex parçasını oluşturur
+    
+    Geniş videolarda içerik kare olarak kırpılır ve bulanıklaştırılmış arka planın
+    ortasına yerleştirilir. Dar veya tam 9:16 videolar doğrudan ölçeklendirilir.
+    
+    Args:
+        width (int): Kaynak video genişliği
+        height (int): Kaynak video yüksekliği
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+        input_label (str): Girdi akışı etiketi (örn. "0:v")
+        output_label (str): Çıktı etiketi (boşsa etiketsiz bırakılır)
+        background_mode (str): Bulanık arka plan yöntemi (bkz. build_background_filter)
+    
+    Returns:
+        str: filter_complex ifadesi
+    """
+    output = f"[{output_label}]" if output_label else ""
+    prefix = output_label or "clip"
+    
+    # Videonun orijinal en-boy oranını koru, ancak 9:16 formatına uydur
+    if width / height > 9/16:  # Video daha geniş (tipik 16:9 formatı)
+        # Yeni yaklaşım: Video içeriğini 1:1 olarak al, üst ve alt kısımları bulanıklaştırılmış video ile doldur
+        # 1. Adım: Videoyu kare (1:1) formata kırp
+        square_size = min(width, height)
+        # Video genişse, en önemli içerik ortada olma ihtimali yüksek
+        x_offset = int((width - square_size) / 2)
+        y_offset = int((height - square_size) / 2)
         
-        # Hala boş slot varsa, kalan videoları ekle
-        if len(selected_videos) < max_videos:
-            remaining_videos = [v for v in video_paths if v not in selected_videos]
-            random.shuffle(remaining_videos)
-            remaining_count = min(len(remaining_videos), max_videos - len(selected_videos))
-            selected_videos.extend(remaining_videos[:remaining_count])
-            print(f"Kalan boşluklar için {remaining_count} video daha seçildi")
+        # 2. Adım: Orijinal videodan bulanık 9:16 arka plan üret (yöntem çıktı profiline göre seçilir)
+        # 3. Adım: Kare kırpılmış videoyu 9:16 formatın ortasına yerleştir
+        # 4. Adım: SAR değerini 1:1 olarak ayarla
+        return f'[{input_label}]split=2[{prefix}_src_fg][{prefix}_src_bg]; ' + \
+               f'[{prefix}_src_fg]crop={square_size}:{square_size}:{x_offset}:{y_offset},scale={resolution[0]}:{resolution[0]},setsar=1:1[{prefix}_fg]; ' + \
+               build_background_filter(f"{prefix}_src_bg", f"{prefix}_bg", resolution, background_mode) + '; ' + \
+               f'[{prefix}_bg][{prefix}_fg]overlay=(W-w)/2:({resolution[1]}-{resolution[0]})/2:shortest=1{output}'
+    
+    # Video daha dar veya tam 9:16, ölçeklendir
+    return f'[{input_label}]scale={resolution[0]}:{resolution[1]},setsar=1:1{output}'
+
+def get_transcode_workers(clip_count: int) -> Tuple[int, int]:
+    """
+    Paralel klip dönüştürme için iş sayısını ve iş başına libx264 thread sayısını belirler
+    
+    config.json'daki "ffmpeg_threads_per_job" (varsayılan 2) ve isteğe bağlı
+    "max_parallel_clips" değerleri kullanılır; iş sayısı çekirdek sayısına göre sınırlanır.
+    
+    Args:
+        clip_count (int): Dönüştürülecek klip sayısı
+    
+    Returns:
+        Tuple[int, int]: (paralel iş sayısı, iş başına thread sayısı)
+    """
+    config = load_config()
+    cpu_count = os.cpu_count() or 1
+    
+    try:
+        threads_per_job = max(1, int(config.get("ffmpeg_threads_per_job", 2)))
+    except (TypeError, ValueError):
+        threads_per_job = 2
+    
+    workers = max(1, cpu_count // threads_per_job)
+    
+    max_parallel = config.get("max_parallel_clips")
+    if max_parallel:
+        try:
+            workers = min(workers, max(1, int(max_parallel)))
+        except (TypeError, ValueError):
+            pass
+    
+    return max(1, min(workers, clip_count)), threads_per_job
+
+def clip_cache_key(clip: Dict[str, Any], resolution: Tuple[int, int], clip_filter: str) -> str:
+    """
+    Normalize edilmiş klip önbelleği için anahtar üretir
+    Kaynak dosya içeriği, kırpma penceresi, hedef çözünürlük, filtre ve kodlama ayarlarını kapsar
+    
+    Args:
+        clip (Dict[str, Any]): plan_clips tarafından üretilen klip bilgisi
+        resolution (Tuple[int, int]): Hedef çözünürlük
+        clip_filter (str): Kullanılan filter_complex ifadesi
+    
+    Returns:
+        str: Önbellek anahtarı
+    """
+    return "|".join([
+        file_fingerprint(clip["path"]),
+        f"{clip['start']:.3f}",
+        f"{clip['duration']:.3f}",
+        f"{resolution[0]}x{resolution[1]}",
+        clip_filter,
+        CLIP_ENCODER_ARGS,
+        CLIP_RATE_ARGS
+    ])
+
+def transcode_clip(clip: Dict[str, Any], resolution: Tuple[int, int], project_folder: str,
+                   ffmpeg_path: str = "ffmpeg", threads: int = 2, total: int = 0,
+                   cache: Optional[FileCache] = None,
+                   background_mode: str = DEFAULT_BACKGROUND_MODE) -> Optional[Tuple[str, float]]:
+    """
+    Tek bir klibi kırpar ve 9:16 formatına dönüştürür
+    
+    Args:
+        clip (Dict[str, Any]): plan_clips tarafından üretilen klip bilgisi
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+        project_folder (str): Proje klasörünün yolu
+        ffmpeg_path (str): FFmpeg uygulamasının yolu
+        threads (int): libx264 için kullanılacak thread sayısı
+        total (int): Toplam klip sayısı (log için)
+        cache (FileCache): Normalize edilmiş klip önbelleği (None ise kullanılmaz)
+        background_mode (str): Bulanık arka plan yöntemi
+    
+    Returns:
+        Optional[Tuple[str, float]]: (işlenmiş dosya yolu, süre) veya hata durumunda None
+    """
+    i = clip["index"]
+    video_path = clip["path"]
+    start_time = clip["start"]
+    clip_duration = clip["duration"]
+    
+    # Çıktı dosyasının yolu
+    output_file = os.path.join(project_folder, f"scaled_video_{i+1}.mp4")
+    
+    try:
+        clip_filter = build_clip_filter(clip["width"], clip["height"], resolution, background_mode=background_mode)
         
-        print(f"Toplam {len(selected_videos)} video seçildi")
+        # Aynı kaynak, pencere ve ayarlarla daha önce dönüştürüldüyse önbellekten al
+        cache_key = None
+        if cache is not None:
+            try:
+                cache_key = clip_cache_key(clip, resolution, clip_filter)
+                if cache.link_to(cache_key, output_file):
+                    print(f"Klip önbellekten alındı ({i+1}/{total}): {video_path}")
+                    return output_file, clip_duration
+            except Exception as cache_error:
+                print(f"Klip önbelleği hatası: {str(cache_error)}")
+                cache_key = None
         
-        # İşlenmiş videoların yollarını ve sürelerini sakla
-        processed_videos = []
-        total_duration = 0
-        max_duration = 60  # Maksimum 60 saniye
+        # Girdi tarafında aranır: FFmpeg başlangıçtan önceki son anahtar kareye atlar ve sadece
+        # oradan başlangıca kadar olan kareleri çözüp atar (accurate_seek), klip kare hassasiyetinde başlar.
+        # Kısmi indirilmiş dosyalarda pencere öncesi boş olduğundan bu zaten zorunludur.
+        # Çıktı geçici dosyaya kodlanıp yerine taşınır: hedef önceki bir çalışmadan kalma,
+        # önbelleğe bağlı (hardlink) bir dosyaysa üzerine yazmak önbellek girdisini de bozar
+        temp_file = os.path.splitext(output_file)[0] + ".part.mp4"
+        input_args = f'-ss {start_time:.3f} -t {clip_duration:.3f} -accurate_seek -i "{video_path}"'
+        crop_cmd = f'"{ffmpeg_path}" {input_args} -filter_complex "{clip_filter}" ' + \
+                   f'{CLIP_ENCODER_ARGS} -threads {threads} {CLIP_RATE_ARGS} "{temp_file}"'
         
-        # Video sayısına göre süre hesapla
-        total_videos = len(selected_videos)
-        # Video sayısı arttıkça süreyi azalt, azaldıkça artır
-        # 5 video veya daha az: 10 saniye
-        # 15 video veya daha fazla: 5 saniye
-        # Aradaki değerler için doğrusal interpolasyon
-        if total_videos <= 5:
-            max_clip_duration = 10.0
-        elif total_videos >= 15:
-            max_clip_duration = 5.0
-        else:
-            # 5 ile 15 video arasında doğrusal interpolasyon
-            max_clip_duration = 10.0 - (total_videos - 5) * (5.0 / 10.0)
+        print(f"Video işleniyor ({i+1}/{total}): {video_path}")
+        print(f"Kırpma: {start_time:.2f} saniyeden başlayarak {clip_duration:.2f} saniye")
+        try:
+            subprocess.run(crop_cmd, shell=True, check=True)
+            if os.path.exists(temp_file) and os.path.getsize(temp_file) > 0:
+                os.replace(temp_file, output_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
         
-        print(f"Video sayısı: {total_videos}, her video için maksimum süre: {max_clip_duration:.2f} saniye")
+        # İşlemi kontrol et
+        if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            print(f"Video başarıyla işlendi: {output_file}, Süre: {clip_duration:.2f} saniye")
+            if cache_key:
+                cache.put(cache_key, output_file, {"source": video_path})
+            return output_file, clip_duration
+        print(f"Video işlenemedi: {output_file}")
+    except Exception as e:
+        print(f"Video işleme hatası: {str(e)}")
+    return None
+
+def concat_clips(clip_paths: List[str], output_path: str, ffmpeg_path: str = "ffmpeg",
+                 ffprobe_path: str = "ffprobe", expected_duration: float = 0) -> bool:
+    """
+    Normalize edilmiş klipleri birleştirir
+    Klipler aynı ayarlarla üretildiğinden önce yeniden kodlamadan (-c copy) birleştirilir;
+    klipler uyumsuzsa veya sonuç beklenen süreyi tutmazsa tek seferlik yeniden kodlamaya dönülür.
+    Sonuç geçici bir dosyaya yazılıp hedefin yerine taşınır, hedef hiçbir zaman yerinde değiştirilmez.
+    
+    Args:
+        clip_paths (List[str]): Sırasıyla birleştirilecek klipler
+        output_path (str): Çıktı dosyasının yolu
+        ffmpeg_path (str): FFmpeg uygulamasının yolu
+        ffprobe_path (str): FFprobe uygulamasının yolu
+        expected_duration (float): Kliplerin toplam süresi (0 ise kontrol edilmez)
+    
+    Returns:
+        bool: Birleştirme başarılıysa True
+    """
+    concat_list_path = os.path.splitext(output_path)[0] + "_concat_list.txt"
+    temp_output = os.path.splitext(output_path)[0] + ".part.mp4"
+    with open(concat_list_path, "w", encoding="utf-8") as f:
+        for clip_path in clip_paths:
+            f.write(f"file '{os.path.abspath(clip_path)}'\n")
+    
+    try:
+        # Akış kopyalama sadece aynı boyuttaki kliplerde denenir
+        infos = [probe_media_info(clip_path, ffprobe_path) for clip_path in clip_paths]
+        uniform = all(infos) and len({(info["width"], info["height"]) for info in infos}) == 1
         
-        # Her videoyu dönüştür
-        for i, video_path in enumerate(selected_videos):
-            if not os.path.exists(video_path):
-                print(f"Video dosyası bulunamadı: {video_path}")
-                continue
-            
-            # Video boyutlarını al
+        if uniform:
+            copy_cmd = f'"{ffmpeg_path}" -y -f concat -safe 0 -i "{concat_list_path}" -c copy -movflags +faststart "{temp_output}"'
             try:
-                probe_cmd = f'"{ffprobe_path}" -v error -select_streams v:0 -show_entries stream=width,height -of json "{video_path}"'
-                result = subprocess.run(probe_cmd, shell=True, capture_output=True, text=True)
-                info = json.loads(result.stdout)
-                width = int(info["streams"][0]["width"])
-                height = int(info["streams"][0]["height"])
-                
-                # Video süresini al
-                duration_cmd = f'"{ffprobe_path}" -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{video_path}"'
-                result = subprocess.run(duration_cmd, shell=True, capture_output=True, text=True)
-                original_duration = float(result.stdout.strip())
-                
-                # Video sayısına göre hesaplanan maksimum süreyi kullan
-                clip_duration = min(original_duration, max_clip_duration)
-                
-                # Eğer video 10 saniyeden uzunsa, ortasından 10 saniye al
-                if original_duration > 10.0:
-                    # Videonun ortasından başla
-                    start_time = (original_duration - clip_duration) / 2
-                else:
-                    # Kısa videolarda baştan başla
-                    start_time = 0
-                
-                # Toplam süreyi kontrol et
-                if total_duration + clip_duration > max_duration:
-                    print(f"Toplam süre sınırına ulaşıldı ({max_duration} saniye), kalan videolar atlanıyor.")
-                    break
-                
-                total_duration += clip_duration
-                
+                print("Klipler yeniden kodlamadan birleştiriliyor...")
+                subprocess.run(copy_cmd, shell=True, check=True)
+                duration = media_duration(temp_output, ffprobe_path)
+                if duration and (not expected_duration or abs(duration - expected_duration) <= CONCAT_DURATION_TOLERANCE):
+                    os.replace(temp_output, output_path)
+                    return True
+                print(f"Birleştirilen video süresi beklenenden farklı ({duration} / {expected_duration:.2f} saniye)")
             except Exception as e:
-                print(f"Video bilgisi alınamadı veya dönüştürme hatası: {str(e)}")
-                continue
-            
-            # Çıktı dosyasının yolu
-            output_file = os.path.join(project_folder, f"scaled_video_{i+1}.mp4")
+                print(f"Akış kopyalamalı birleştirme hatası: {str(e)}")
+        
+        # Yedek yol: birleştirirken yeniden kodla ve SAR değerini 1:1 olarak ayarla
+        print("Klipler yeniden kodlanarak birleştiriliyor...")
+        encode_cmd = f'"{ffmpeg_path}" -y -f concat -safe 0 -i "{concat_list_path}" -vf "setsar=1:1" -c:v libx264 -preset medium -crf 20 -profile:v high -pix_fmt yuv420p -r 30 -vsync cfr -b:v 5M -maxrate 5M -bufsize 5M "{temp_output}"'
+        subprocess.run(encode_cmd, shell=True, check=True)
+        if os.path.exists(temp_output) and os.path.getsize(temp_output) > 0:
+            os.replace(temp_output, output_path)
+            return True
+        return False
+    finally:
+        for path in (concat_list_path, temp_output):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def process_videos(video_paths: List[str], resolution: Tuple[int, int], project_folder: str,
+                   target_duration: Optional[float] = None) -> str:
+    """
+    İndirilen videoları işler ve 9:16 formatına uygun hale getirir
+    Her videodan maksimum 10 saniye alarak çeşitliliği artırır
+    Ana konuyla ilgili videoları öncelikli olarak seçer
+    Seslendirme süresi verilirse klipler toplamda tam bu süreyi kapsayacak şekilde kırpılır
+    
+    Args:
+        video_paths (List[str]): İşlenecek video dosyalarının yolları
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+        project_folder (str): Proje klasörünün yolu
+        target_duration (float): Seslendirme süresi (saniye, None ise klip başına sabit süre)
+    
+    Returns:
+        str: İşlenmiş video dosyasının yolu (hata durumunda boş yer tutucu video)
+    """
+    return process_videos_with_status(video_paths, resolution, project_folder, target_duration)[0]
+
+def process_videos_with_status(video_paths: List[str], resolution: Tuple[int, int], project_folder: str,
+                               target_duration: Optional[float] = None) -> Tuple[str, bool]:
+    """
+    process_videos ile aynı işi yapar, ayrıca sonucun gerçekten işlenmiş video olup olmadığını bildirir
+    Hata durumunda üretilen yer tutucu (siyah video veya birleştirilemeyen ilk klip) bu çalışmada
+    kullanılabilir, ancak çağıran taraf onu tamamlanmış iş olarak kaydetmemelidir.
+    
+    Args:
+        video_paths (List[str]): İşlenecek video dosyalarının yolları
+        resolution (Tuple[int, int]): Hedef çözünürlük (genişlik, yükseklik)
+        project_folder (str): Proje klasörünün yolu
+        target_duration (float): Seslendirme süresi (saniye, None ise klip başına sabit süre)
+    
+    Returns:
+        Tuple[str, bool]: (video dosyasının yolu, video başarıyla işlendiyse True)
+    """
+    # FFmpeg yolunu config.json'dan al
+    ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
+    
+    if not video_paths:
+        print("Uyarı: İşlenecek video bulunamadı!")
+        # Bir örnek video dosyası oluştur
+        create_empty_video(project_folder, resolution, ffmpeg_path)
+        return os.path.join(project_folder, "processed_video.mp4"), False
+    
+    try:
+        # Anahtar kelime öncelikli video seçimi
+        selected_videos = select_videos(video_paths, project_folder)
+        
+        # İşlenmiş videoların yollarını ve sürelerini sakla
+        processed_videos = []
+        max_duration = 60  # Maksimum 60 saniye
+        
+        # Her klip için kırpma penceresini belirle
+        clips = plan_clips(selected_videos, ffprobe_path, max_duration, target_duration)
+        
+        # 9:16 dikey video için
+        if resolution[0] / resolution[1] == 9/16:  # 9:16 formatı (dikey video)
+            # Klipleri sınırlı bir havuzda paralel dönüştür
+            # Sonuçlar klip sırasına göre toplanır, böylece birleştirme listesi her zaman aynı sırada olur
+            workers, threads_per_job = get_transcode_workers(len(clips))
+            clip_cache = get_cache("clips", 2048)
+            background_mode = get_background_mode(resolution)
+            print(f"{len(clips)} klip {workers} paralel işte dönüştürülecek (iş başına {threads_per_job} thread)")
             
-            # 9:16 dikey video için
-            if resolution[0] / resolution[1] == 9/16:  # 9:16 formatı (dikey video)
-                try:
-                    # Videonun orijinal en-boy oranını koru, ancak 9:16 formatına uydur
-                    if width / height > 9/16:  # Video daha geniş (tipik 16:9 formatı)
-                        # Yeni yaklaşım: Video içeriğini 1:1 olarak al, üst ve alt kısımları bulanıklaştırılmış video ile doldur
-                        # 1. Adım: Videoyu kare (1:1) formata kırp
-                        square_size = min(width, height)
-                        # Video genişse, en önemli içerik ortada olma ihtimali yüksek
-                        x_offset = int((width - square_size) / 2)
-                        y_offset = int((height - square_size) / 2)
-                        
-                        # 2. Adım: Orijinal videoyu bulanıklaştır ve 9:16 formata scale et
-                        # 3. Adım: Kare kırpılmış videoyu 9:16 formatın ortasına yerleştir
-                        # 4. Adım: SAR değerini 1:1 olarak ayarla
-                        blur_cmd = f'"{ffmpeg_path}" -i "{video_path}" -ss {start_time:.2f} -t {clip_duration:.2f} -filter_complex ' + \
-                                  f'"[0:v]crop={square_size}:{square_size}:{x_offset}:{y_offset},scale={resolution[0]}:{resolution[0]},setsar=1:1[fg]; ' + \
-                                  f'[0:v]scale={resolution[0]}:{resolution[1]},boxblur=20:5,setsar=1:1[bg]; ' + \
-                                  f'[bg][fg]overlay=(W-w)/2:({resolution[1]}-{resolution[0]})/2" ' + \
-                                  f'-c:v libx264 -preset medium -crf 18 -profile:v high -pix_fmt yuv420p -r 30 -c:a aac -b:a 128k -y -b:v 5M -maxrate 5M -bufsize 5M "{output_file}"'
-                        
-                        crop_cmd = blur_cmd
-                    else:  # Video daha dar veya tam 9:16, ölçeklendir
-                        scale_cmd = f'"{ffmpeg_path}" -i "{video_path}" -ss {start_time:.2f} -t {clip_duration:.2f} -vf "scale={resolution[0]}:{resolution[1]},setsar=1:1" -c:v libx264 -preset medium -crf 18 -profile:v high -pix_fmt yuv420p -r 30 -c:a aac -b:a 128k -y -b:v 5M -maxrate 5M -bufsize 5M "{output_file}"'
-                        crop_cmd = scale_cmd
-                    
-                    print(f"Video işleniyor ({i+1}/{len(selected_videos)}): {video_path}")
-                    print(f"Kırpma: {start_time:.2f} saniyeden başlayarak {clip_duration:.2f} saniye")
-                    subprocess.run(crop_cmd, shell=True, check=True)
-                    
-                    # İşlemi kontrol et
-                    if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                        processed_videos.append((output_file, clip_duration))
-                        print(f"Video başarıyla işlendi: {output_file}, Süre: {clip_duration:.2f} saniye")
-                    else:
-                        print(f"Video işlenemedi: {output_file}")
-                except Exception as e:
-                    print(f"Video işleme hatası: {str(e)}")
-            else:
-                print(f"Desteklenmeyen çözünürlük: {resolution}, 9:16 formatı gerekli")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(transcode_clip, clip, resolution, project_folder, ffmpeg_path, threads_per_job, len(selected_videos), clip_cache, background_mode)
+                    for clip in clips
+                ]
+                for future in futures:
+                    result = future.result()
+                    if result:
+                        processed_videos.append(result)
+        else:
+            print(f"Desteklenmeyen çözünürlük: {resolution}, 9:16 formatı gerekli")
         
         if not processed_videos:
             raise ValueError("İşlenebilir video bulunamadı")
@@ -257,49 +701,31 @@ def process_videos(video_paths: List[str], resolution: Tuple[int, int], project_
         
         # Videoları birleştir
         if len(processed_videos) > 1:
-            # Videoları birleştirmek için input listesi oluştur
-            concat_list_path = os.path.join(project_folder, "video_concat_list.txt")
-            with open(concat_list_path, "w", encoding="utf-8") as f:
-                for video_path, _ in processed_videos:
-                    f.write(f"file '{os.path.abspath(video_path)}'\n")
-            
             # Birleştirilmiş video yolu
             processed_video_path = os.path.join(project_folder, "processed_video.mp4")
             
-            # SAR değerini 1:1 olarak ayarla
-            concat_cmd = f'"{ffmpeg_path}" -f concat -safe 0 -i "{concat_list_path}" -vf "setsar=1:1" -c:v libx264 -preset medium -crf 20 -profile:v high -pix_fmt yuv420p -r 30 -vsync cfr -b:v 5M -maxrate 5M -bufsize 5M "{processed_video_path}"'
-            
             try:
                 print("Videolar birleştiriliyor...")
-                print(f"Birleştirme komutu: {concat_cmd}")
-                subprocess.run(concat_cmd, shell=True, check=True)
-                
-                # Geçici dosyaları temizleme
-                try:
-                    os.remove(concat_list_path)
-                except Exception as e:
-                    print(f"Video birleştirme hatası: {str(e)}")
-                
-                if os.path.exists(processed_video_path) and os.path.getsize(processed_video_path) > 0:
+                if concat_clips([video_path for video_path, _ in processed_videos], processed_video_path,
+                                ffmpeg_path, ffprobe_path, total_duration):
                     print(f"Videolar başarıyla birleştirildi: {processed_video_path}")
-                    return processed_video_path
+                    return processed_video_path, True
                 else:
                     # Başarısız olursa ilk videoyu döndür
-                    return processed_videos[0][0]
+                    return processed_videos[0][0], False
             except Exception as e:
                 print(f"Video birleştirme hatası: {str(e)}")
                 # Hata durumunda ilk videoyu döndür
-                return processed_videos[0][0]
+                return processed_videos[0][0], False
         elif len(processed_videos) == 1:
             # Tek video varsa işlenmiş video yolu
             processed_video_path = os.path.join(project_folder, "processed_video.mp4")
             video_path, _ = processed_videos[0]
             
-            # SAR değerini 1:1 olarak ayarla
-            sar_cmd = f'"{ffmpeg_path}" -i "{video_path}" -vf "setsar=1:1" -c:v libx264 -preset medium -crf 20 -profile:v high -pix_fmt yuv420p -r 30 -b:v 5M -maxrate 5M -bufsize 5M "{processed_video_path}"'
-            subprocess.run(sar_cmd, shell=True, check=True)
+            # Klip zaten hedef biçimde (SAR 1:1) olduğundan yeniden kodlamadan taşınır
+            os.replace(video_path, processed_video_path)
             
-            return processed_video_path
+            return processed_video_path, True
         else:
             raise ValueError("Hiç video işlenemedi")
     
@@ -307,7 +733,7 @@ def process_videos(video_paths: List[str], resolution: Tuple[int, int], project_
         print(f"Video işleme genel hatası: {str(e)}")
         # Hata durumunda boş bir video oluştur
         create_empty_video(project_folder, resolution, ffmpeg_path)
-        return os.path.join(project_folder, "processed_video.mp4")
+        return os.path.join(project_folder, "processed_video.mp4"), False
 
 def create_empty_video(project_folder: str, resolution: Tuple[int, int], ffmpeg_path: str = "ffmpeg") -> None:
     """
@@ -321,6 +747,11 @@ def create_empty_video(project_folder: str, resolution: Tuple[int, int], ffmpeg_
     try:
         output_path = os.path.join(project_folder, "processed_video.mp4")
         
+        # Var olan çıktı önce silinir: önbellekten bağlanmış (hardlink) bir klip olabilir
+        # ve üzerine yazmak önbellek girdisini de bozar
+        if os.path.lexists(output_path):
+            os.remove(output_path)
+        
         # Çözünürlüğü doğru şekilde formatla
         width, height = resolution
         if not isinstance(width, int) or not isinstance(height, int):
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import json
+import math
+import subprocess
+from array import array
+from typing import List, Dict, Any, Tuple, Optional
+
+SAMPLE_RATE = 16000
+FRAME_MS = 10
+# Bu süreden kısa sessizlikler kelime içi duraklama sayılır
+MIN_SILENCE_MS = 80
+# Tüm Latin alfabeli diller için sesli harfler (Türkçe karakterler dahil)
+VOWELS = "aeiıouöüâîûàáäãåèéêëìíïòóôõùúāēīōūyæœ"
+
+def decode_pcm(audio_path: str, ffmpeg_path: str = "ffmpeg", sample_rate: int = SAMPLE_RATE) -> array:
+    """
+    Ses dosyasını FFmpeg ile mono 16-bit PCM örneklerine çözer
+
+    Args:
+        audio_path (str): Ses dosyasının yolu
+        ffmpeg_path (str): FFmpeg uygulamasının yolu
+        sample_rate (int): Örnekleme hızı
+
+    Returns:
+        array: İşaretli 16-bit örnekler
+    """
+    result = subprocess.run(
+        [ffmpeg_path, "-v", "error", "-i", audio_path, "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        capture_output=True, check=True
+    )
+    samples = array("h")
+    samples.frombytes(result.stdout[:len(result.stdout) - len(result.stdout) % 2])
+    return samples
+
+def frame_energies(samples: array, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS) -> List[float]:
+    """
+    Örnekleri sabit uzunluklu pencerelere bölerek her pencerenin RMS enerjisini hesaplar
+
+    Args:
+        samples (array): PCM örnekleri
+        sample_rate (int): Örnekleme hızı
+        frame_ms (int): Pencere uzunluğu (milisaniye)
+
+    Returns:
+        List[float]: Pencere başına RMS enerji
+    """
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    energies = []
+    for start in range(0, len(samples), frame_size):
+        frame = samples[start:start + frame_size]
+        energies.append(math.sqrt(sum(value * value for value in frame) / len(frame)))
+    return energies
+
+def speech_spans(energies: List[float], frame_ms: int = FRAME_MS, min_silence_ms: int = MIN_SILENCE_MS) -> List[Tuple[float, float]]:
+    """
+    Enerji eşiğine göre konuşma bölgelerini bulur
+    Eşik, sessiz kısımların enerjisi ile en yüksek enerjinin arasında uyarlanır
+
+    Args:
+        energies (List[float]): Pencere başına RMS enerji
+        frame_ms (int): Pencere uzunluğu (milisaniye)
+        min_silence_ms (int): Ayrı bölge sayılacak en kısa sessizlik (milisaniye)
+
+    Returns:
+        List[Tuple[float, float]]: Konuşma bölgeleri (başlangıç, bitiş) saniye
+    """
+    if not energies:
+        return []
+
+    ordered = sorted(energies)
+    noise_floor = ordered[len(ordered) // 10]
+    peak = ordered[-1]
+    if peak <= 0:
+        return []
+    threshold = noise_floor + (peak - noise_floor) * 0.04
+
+    spans = []
+    span_start = None
+    silence = 0
+    min_silence_frames = max(1, min_silence_ms // frame_ms)
+    for index, energy in enumerate(energies):
+        if energy >= threshold:
+            if span_start is None:
+                span_start = index
+            silence = 0
+        elif span_start is not None:
+            silence += 1
+            if silence >= min_silence_frames:
+                spans.append((span_start, index - silence + 1))
+                span_start = None
+                silence = 0
+    if span_start is not None:
+        spans.append((span_start, len(energies) - silence))
+
+    return [(start * frame_ms / 1000, end * frame_ms / 1000) for start, end in spans if end > start]
+
+def word_weight(word: str) -> float:
+    """
+    Kelimenin söylenme süresine yaklaşık ağırlığını hesaplar (hece sayısı, yoksa karakter sayısı)
+
+    Args:
+        word (str): Kelime
+
+    Returns:
+        float: Ağırlık
+    """
+    lowered = word.lower()
+    syllables = len(re.findall(f"[{VOWELS}]+", lowered))
+    if syllables:
+        # Uzun ünsüz kümeleri de biraz süre alır
+        return syllables + 0.1 * len(re.findall(r"\w", lowered))
+    return max(1.0, len(lowered) / 3)
+
+def split_words(text: str) -> List[str]:
+    """
+    Metni, Whisper çıktısına benzer şekilde noktalama işaretlerinden arındırılmış kelimelere böler
+
+    Args:
+        text (str): Cümle
+
+    Returns:
+        List[str]: Kelimeler
+    """
+    words = []
+    for token in text.split():
+        word = re.sub(r"^[^\w]+|[^\w]+$", "", token)
+        if word:
+            words.append(word)
+    return words
+
+def allocate_words(words: List[str], spans: List[Tuple[float, float]], duration: float) -> List[Dict[str, Any]]:
+    """
+    Kelimeleri, ağırlıklarıyla orantılı olarak konuşma bölgelerine dağıtır
+    Sessizlikler atlanır, böylece duraklamalar kelimelerin içine düşmez
+
+    Args:
+        words (List[str]): Kelimeler
+        spans (List[Tuple[float, float]]): Konuşma bölgeleri (saniye)
+        duration (float): Sesin toplam süresi
+
+    Returns:
+        List[Dict[str, Any]]: word, start ve end alanlarını içeren kelime zamanlamaları
+    """
+    if not words:
+        return []
+    if not spans:
+        spans = [(0.0, duration)]
+
+    voiced_total = sum(end - start for start, end in spans)
+    weights = [word_weight(word) for word in words]
+    weight_total = sum(weights)
+
+    def to_time(voiced_position: float, is_start: bool) -> float:
+        # Konuşma zaman çizelgesindeki konumu gerçek zamana çevir. Bölge sınırına
+        # denk gelen başlangıçlar sonraki bölgeye, bitişler önceki bölgeye bağlanır.
+        for start, end in spans:
+            length = end - start
+            if voiced_position < length - 1e-6 or (not is_start and voiced_position <= length + 1e-6):
+                return start + voiced_position
+            voiced_position -= length
+        return spans[-1][1]
+
+    # Kelime sınırlarının konuşma zaman çizelgesindeki konumları
+    boundaries = [0.0]
+    for weight in weights:
+        boundaries.append(boundaries[-1] + voiced_total * weight / weight_total)
+    
+    # Sessizlikler genelde kelime aralarına düşer: yakın kelime sınırını sessizliğe hizala
+    average_share = voiced_total / len(words)
+    edge = 0.0
+    for start, end in spans[:-1]:
+        edge += end - start
+        nearest = min(range(1, len(boundaries) - 1), key=lambda k: abs(boundaries[k] - edge), default=None)
+        if nearest is not None and abs(boundaries[nearest] - edge) < average_share * 0.5 \
+                and boundaries[nearest - 1] < edge < boundaries[nearest + 1]:
+            boundaries[nearest] = edge
+    
+    timings = []
+    for index, word in enumerate(words):
+        start = to_time(boundaries[index], True)
+        end = to_time(boundaries[index + 1], False)
+        timings.append({"word": word, "start": round(start, 3), "end": round(max(end, start + 0.01), 3)})
+    return timings
+
+def align_words(segments: List[Tuple[str, str]], output_path: str, ffmpeg_path: str = "ffmpeg",
+                language: str = "") -> Optional[Dict[str, Any]]:
+    """
+    Cümle ses dosyalarından Whisper'a gerek kalmadan kelime zamanlamaları üretir
+    Her cümlenin metni ve sesi bilindiğinden, sesteki konuşma bölgeleri bulunup
+    kelimeler hece/karakter ağırlıklarıyla bu bölgelere dağıtılır.
+    Çıktı, Whisper verbose_json ile aynı yapıdadır (full_timing.json).
+
+    Args:
+        segments (List[Tuple[str, str]]): Sırasıyla (ses dosyası, seslendirilen metin) çiftleri
+        output_path (str): Kaydedilecek JSON dosyasının yolu
+        ffmpeg_path (str): FFmpeg uygulamasının yolu
+        language (str): Dil kodu (sadece bilgi amaçlı kaydedilir)
+
+    Returns:
+        Optional[Dict[str, Any]]: Kaydedilen zamanlama verisi veya hata durumunda None
+    """
+    try:
+        all_words = []
+        offset = 0.0
+        for audio_path, text in segments:
+            samples = decode_pcm(audio_path, ffmpeg_path)
+            duration = len(samples) / SAMPLE_RATE
+            spans = speech_spans(frame_energies(samples))
+            for timing in allocate_words(split_words(text), spans, duration):
+                timing["start"] = round(timing["start"] + offset, 3)
+                timing["end"] = round(timing["end"] + offset, 3)
+                all_words.append(timing)
+            offset += duration
+
+        data = {
+            "task": "align",
+            "language": language,
+            "duration": round(offset, 3),
+            "text": " ".join(text for _, text in segments),
+            "words": all_words,
+            "source": "local"
+        }
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"Yerel kelime hizalaması tamamlandı: {len(all_words)} kelime, {offset:.2f} saniye")
+        return data
+    except Exception as e:
+        print(f"Yerel kelime hizalama hatası: {str(e)}")
+        return None
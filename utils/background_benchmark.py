@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares the blurred-background modes of the clip normalizer
+
+For a sample landscape clip, every mode in BACKGROUND_MODES is run through
+the same filter graph process_videos uses. The script reports the filtering
+cost per frame (decode + filters, no encoding) and the SSIM of each mode's
+output against the full-resolution blur.
+
+Usage:
+    python -m utils.background_benchmark sample.mp4 --resolution 1080x1920 --duration 5
+"""
+
+import os
+import re
+import time
+import argparse
+import tempfile
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+from modules.video_processor import BACKGROUND_MODES, CLIP_FPS, build_clip_filter, get_ffmpeg_paths
+from utils.media_info import probe_media_info
+
+def run_filter(ffmpeg_path: str, source: str, graph: str, duration: float, output: Optional[str] = None) -> Tuple[float, int]:
+    """
+    Runs a clip filter graph and measures it
+
+    Args:
+        ffmpeg_path (str): FFmpeg executable
+        source (str): Input clip
+        graph (str): filter_complex expression producing the 9:16 frame
+        duration (float): Seconds of the clip to process
+        output (str): Lossless output file, or None to discard the frames
+
+    Returns:
+        Tuple[float, int]: Wall-clock seconds and number of frames produced
+    """
+    cmd = [ffmpeg_path, "-hide_banner", "-y", "-ss", "0", "-t", f"{duration:.3f}", "-i", source,
+           "-filter_complex", graph, "-r", str(CLIP_FPS), "-an"]
+    if output:
+        cmd += ["-c:v", "libx264", "-preset", "ultrafast", "-qp", "0", output]
+    else:
+        cmd += ["-f", "null", "-"]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    frames = re.findall(r"frame=\s*(\d+)", result.stderr)
+    return elapsed, int(frames[-1]) if frames else 0
+
+def measure_ssim(ffmpeg_path: str, candidate: str, reference: str) -> Optional[float]:
+    """
+    Returns the average SSIM of a rendered clip against a reference rendering
+
+    Args:
+        ffmpeg_path (str): FFmpeg executable
+        candidate (str): Clip to score
+        reference (str): Reference clip
+
+    Returns:
+        Optional[float]: SSIM (1.0 means identical), or None if it could not be read
+    """
+    cmd = [ffmpeg_path, "-hide_banner", "-i", candidate, "-i", reference, "-lavfi", "ssim", "-f", "null", "-"]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    match = re.search(r"All:([0-9.]+)", result.stderr)
+    return float(match.group(1)) if match else None
+
+def benchmark(source: str, resolution: Tuple[int, int], duration: float, repeats: int = 3) -> List[Dict[str, Any]]:
+    """
+    Benchmarks every background mode on a sample clip
+
+    Args:
+        source (str): Landscape sample clip
+        resolution (Tuple[int, int]): Output resolution
+        duration (float): Seconds of the clip to process
+        repeats (int): Timed runs per mode; the fastest one is reported
+
+    Returns:
+        List[Dict[str, Any]]: One row per mode with ms_per_frame, fps and ssim
+    """
+    ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
+    info = probe_media_info(source, ffprobe_path)
+    if not info or not info["width"] or not info["height"]:
+        raise ValueError(f"Not a readable video: {source}")
+    if info["width"] / info["height"] <= 9 / 16:
+        print("Warning: the sample is not wider than 9:16, so no background is rendered")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        rendered = {}
+        for mode in BACKGROUND_MODES:
+            graph = build_clip_filter(info["width"], info["height"], resolution, background_mode=mode)
+            timings = [run_filter(ffmpeg_path, source, graph, duration) for _ in range(repeats)]
+            elapsed, frames = min(timings)
+            rendered[mode] = os.path.join(temp_dir, f"{mode}.mp4")
+            run_filter(ffmpeg_path, source, graph, duration, rendered[mode])
+            rows.append({
+                "mode": mode,
+                "ms_per_frame": elapsed * 1000 / frames if frames else float("nan"),
+                "fps": frames / elapsed if elapsed else float("nan"),
+            })
+        for row in rows:
+            row["ssim"] = measure_ssim(ffmpeg_path, rendered[row["mode"]], rendered["full"])
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare blurred-background modes of the clip normalizer")
+    parser.add_argument("source", help="Landscape sample clip")
+    parser.add_argument("--resolution", default="1080x1920", help="Output resolution, e.g. 1080x1920")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of the clip to process")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per mode")
+    args = parser.parse_args()
+
+    width, height = map(int, args.resolution.lower().split("x"))
+    rows = benchmark(args.source, (width, height), args.duration, args.repeats)
+
+    baseline = next(row for row in rows if row["mode"] == "full")["ms_per_frame"]
+    print(f"{'mode':<12}{'ms/frame':>10}{'fps':>9}{'speedup':>9}{'ssim':>9}")
+    for row in rows:
+        ssim = f"{row['ssim']:.4f}" if row["ssim"] is not None else "n/a"
+        print(f"{row['mode']:<12}{row['ms_per_frame']:>10.2f}{row['fps']:>9.1f}{baseline / row['ms_per_frame']:>8.2f}x{ssim:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,15 @@ import time
 from typing import List
 import random
 
-def process_batch(topic_list: List[str], max_videos: int = 10, delay_minutes: int = 5) -> None:
+def process_batch(topic_list: List[str], max_videos: int = 10, delay_minutes: float = 0) -> None:
     """
     Birden fazla konu için toplu video üretir
+    API limitleri istek bazında (utils.rate_limiter) uygulandığından videolar arasında beklenmez
     
     Args:
         topic_list (List[str]): İşlenecek konuların listesi
         max_videos (int): Üretilecek maksimum video sayısı
-        delay_minutes (int): Her video arasında beklenecek süre (dakika)
+        delay_minutes (float): Videolar arasında isteğe bağlı bekleme süresi (dakika, varsayılan 0)
     """
     if not topic_list:
         print("Uyarı: İşlenecek konu listesi boş!")
@@ -105,8 +106,8 @@ def process_batch(topic_list: List[str], max_videos: int = 10, delay_minutes: in
             
             print(f"Video tamamlandı: {final_video}")
             
-            # Son video değilse bekle
-            if i < process_count - 1:
+            # Son video değilse ve özellikle istendiyse bekle
+            if delay_minutes and i < process_count - 1:
                 print(f"{delay_minutes} dakika bekleniyor...")
                 time.sleep(delay_minutes * 60)
                 
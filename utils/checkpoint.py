@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+MANIFEST_FILENAME = "stage_manifest.json"
+
+def hash_inputs(value: Any) -> str:
+    """
+    Creates a stable hash of JSON-serializable stage inputs
+
+    Args:
+        value (Any): Stage inputs (dependency results, job settings)
+
+    Returns:
+        str: Hex encoded SHA-256 digest
+    """
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def collect_paths(value: Any) -> List[str]:
+    """
+    Collects the absolute file paths referenced by a stage result
+
+    Args:
+        value (Any): Stage result (string, list, dict or nested combination)
+
+    Returns:
+        List[str]: Absolute paths found in the result
+    """
+    if isinstance(value, str):
+        return [value] if os.path.isabs(value) else []
+    if isinstance(value, dict):
+        return [path for item in value.values() for path in collect_paths(item)]
+    if isinstance(value, (list, tuple)):
+        return [path for item in value for path in collect_paths(item)]
+    return []
+
+class StageManifest:
+    """
+    Completion manifest stored in a project folder
+
+    Every finished stage is recorded with a hash of its inputs, its result and
+    its duration. A later run over the same folder can reuse a stage result as
+    long as its inputs hash still matches and every output file still exists.
+
+    Args:
+        project_folder (str): Project folder the manifest belongs to
+    """
+    def __init__(self, project_folder: str):
+        self.project_folder = project_folder
+        self.path = os.path.join(project_folder, MANIFEST_FILENAME)
+        self.data: Dict[str, Any] = {"job": {}, "stages": {}}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.data["job"] = data.get("job", {}) or {}
+                self.data["stages"] = data.get("stages", {}) or {}
+        except Exception as e:
+            print(f"Manifest okuma hatası ({self.path}): {str(e)}")
+
+    def save(self) -> None:
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Manifest yazma hatası ({self.path}): {str(e)}")
+
+    @property
+    def job(self) -> Dict[str, Any]:
+        return self.data["job"]
+
+    def set_job(self, **settings: Any) -> None:
+        """Stores the job settings (topic, languages...) needed to resume the project"""
+        self.data["job"].update(settings)
+        self.save()
+
+    def completed_result(self, stage: str, inputs_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the recorded entry of a stage if it can be reused
+
+        Args:
+            stage (str): Stage name
+            inputs_hash (str): Hash of the current stage inputs
+
+        Returns:
+            Optional[Dict[str, Any]]: Manifest entry, or None if the stage has to run again
+        """
+        entry = self.data["stages"].get(stage)
+        if not entry or entry.get("inputs_hash") != inputs_hash:
+            return None
+        for path in entry.get("outputs", []):
+            if not os.path.isfile(path) or os.path.getsize(path) == 0:
+                return None
+        return entry
+
+    def record(self, stage: str, inputs_hash: str, result: Any, duration: float) -> bool:
+        """
+        Records a finished stage
+
+        A result that references a missing or empty file is not completed work
+        and is refused, so the stage runs again on resume.
+
+        Args:
+            stage (str): Stage name
+            inputs_hash (str): Hash of the stage inputs
+            result (Any): Stage result (must be JSON-serializable)
+            duration (float): Stage duration in seconds
+
+        Returns:
+            bool: True if the stage was recorded
+        """
+        outputs = collect_paths(result)
+        missing = [path for path in outputs if not os.path.isfile(path) or os.path.getsize(path) == 0]
+        if missing:
+            print(f"'{stage}' adımı kaydedilmedi, eksik veya boş çıktı: {missing[0]}")
+            self.data["stages"].pop(stage, None)
+            self.save()
+            return False
+
+        self.data["stages"][stage] = {
+            "inputs_hash": inputs_hash,
+            "result": result,
+            "outputs": outputs,
+            "duration": round(duration, 3),
+            "completed_at": datetime.now().isoformat()
+        }
+        self.save()
+        return True
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_cache_settings() -> Dict[str, Any]:
+    """
+    Reads cache settings from config.json
+
+    Returns:
+        Dict[str, Any]: Configuration values (empty if the file is missing)
+    """
+    config_path = os.path.join(ROOT_DIR, "config.json")
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+def link_or_copy(src: str, dest: str) -> None:
+    """
+    Hardlinks src to dest, falling back to a copy across filesystems
+
+    Args:
+        src (str): Existing file
+        dest (str): Destination path (replaced if it exists)
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    temp_dest = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, temp_dest)
+    except OSError:
+        shutil.copy2(src, temp_dest)
+    os.replace(temp_dest, dest)
+
+def file_fingerprint(path: str, sample_bytes: int = 4 * 1024 * 1024) -> str:
+    """
+    Computes a content fingerprint of a file
+
+    Small files are hashed completely; large files are identified by their
+    size plus the first and last sample_bytes, which is enough to tell stock
+    clips apart without reading hundreds of megabytes.
+
+    Args:
+        path (str): File path
+        sample_bytes (int): Bytes read from each end of large files
+
+    Returns:
+        str: Hex encoded SHA-256 fingerprint
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        if size <= sample_bytes * 2:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        else:
+            digest.update(f.read(sample_bytes))
+            f.seek(size - sample_bytes)
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+class FileCache:
+    """
+    Persistent content-addressed file cache with size-bounded LRU eviction
+
+    Entries are stored under root/<first two hash chars>/<sha256(key)><ext>
+    with a JSON sidecar holding the original key and caller metadata. The
+    entry's mtime is refreshed on every hit and is used as the LRU clock.
+
+    Args:
+        root (str): Cache directory
+        max_bytes (int): Maximum total size of cached files (0 disables eviction)
+    """
+    def __init__(self, root: str, max_bytes: int = 0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, key: str, ext: str = "") -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + ext)
+
+    def _find(self, key: str) -> Optional[str]:
+        meta = self.get_meta(key)
+        if meta is None:
+            return None
+        path = self._entry_path(key, meta.get("ext", ""))
+        return path if os.path.exists(path) else None
+
+    def get_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the metadata stored with a cache entry
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[Dict[str, Any]]: Metadata, or None on a miss
+        """
+        meta_path = self._entry_path(key, ".json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta if meta.get("key") == key else None
+        except Exception:
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a cache entry and marks it as recently used
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[str]: Path of the cached file, or None on a miss
+        """
+        path = self._find(key)
+        if path is None:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, src_path: str, meta: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Stores a file in the cache (hardlinked when possible, copied otherwise)
+
+        Args:
+            key (str): Cache key
+            src_path (str): File to store
+            meta (Dict[str, Any]): Optional metadata saved next to the entry
+
+        Returns:
+            Optional[str]: Path of the cached file, or None if it could not be stored
+        """
+        if not os.path.exists(src_path) or os.path.getsize(src_path) == 0:
+            return None
+
+        ext = os.path.splitext(src_path)[1]
+        path = self._entry_path(key, ext)
+        try:
+            link_or_copy(src_path, path)
+            entry_meta = dict(meta or {})
+            entry_meta.update({"key": key, "ext": ext, "size": os.path.getsize(path), "created": time.time()})
+            meta_path = self._entry_path(key, ".json")
+            temp_meta = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_meta, "w", encoding="utf-8") as f:
+                json.dump(entry_meta, f, ensure_ascii=False)
+            os.replace(temp_meta, meta_path)
+        except Exception as e:
+            print(f"Cache write error ({key}): {str(e)}")
+            return None
+
+        self.evict()
+        return path
+
+    def link_to(self, key: str, dest: str) -> Optional[str]:
+        """
+        Hardlinks (or copies) a cached file into a project folder
+
+        Args:
+            key (str): Cache key
+            dest (str): Destination path
+
+        Returns:
+            Optional[str]: dest on a hit, None on a miss
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            link_or_copy(path, dest)
+            return dest
+        except Exception as e:
+            print(f"Cache link error ({key}): {str(e)}")
+            return None
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the cache fits in max_bytes"""
+        if not self.max_bytes:
+            return
+
+        with self._lock:
+            entries = []
+            total = 0
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if filename.endswith(".json") or filename.endswith(".tmp"):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    meta_path = os.path.splitext(path)[0] + ".json"
+                    if os.path.exists(meta_path):
+                        os.remove(meta_path)
+                    total -= size
+                except OSError:
+                    continue
+
+def get_cache(namespace: str, default_max_mb: int) -> FileCache:
+    """
+    Returns the shared cache for a namespace, configured from config.json
+
+    "cache_dir" sets the cache root (default: <repo>/cache) and
+    "<namespace>_cache_max_mb" its size limit.
+
+    Args:
+        namespace (str): Cache namespace (e.g. "stock")
+        default_max_mb (int): Size limit used when not configured
+
+    Returns:
+        FileCache: Cache instance
+    """
+    config = load_cache_settings()
+    cache_dir = config.get("cache_dir") or os.path.join(ROOT_DIR, "cache")
+    if not os.path.isabs(cache_dir):
+        cache_dir = os.path.join(ROOT_DIR, cache_dir)
+
+    try:
+        max_mb = int(config.get(f"{namespace}_cache_max_mb", default_max_mb))
+    except (TypeError, ValueError):
+        max_mb = default_max_mb
+
+    return FileCache(os.path.join(cache_dir, namespace), max_mb * 1024 * 1024)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import weakref
+from typing import Any, Dict, Optional
+import aiohttp
+from utils.file_cache import load_cache_settings
+
+# One pooled session per event loop; aiohttp sessions cannot be shared across loops.
+# Loops are held weakly so a discarded loop never hands its session to a new one.
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+def load_http_settings() -> Dict[str, Any]:
+    """
+    Reads connection pool settings from config.json
+
+    Returns:
+        Dict[str, Any]: Pool settings with defaults filled in
+    """
+    config = load_cache_settings()
+    settings = {
+        "http_max_connections": 64,
+        "http_max_per_host": 16,
+        "http_dns_cache_ttl": 300,
+        "http_keepalive_timeout": 60,
+        "http_total_timeout": 300,
+    }
+    for key, default in settings.items():
+        try:
+            settings[key] = type(default)(config.get(key, default))
+        except (TypeError, ValueError):
+            pass
+    return settings
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the process-wide HTTP session of the running event loop
+
+    The session keeps per-host connection pools alive between requests and
+    caches DNS lookups, so repeated calls to Pexels, OpenAI and the video CDN
+    reuse established TCP/TLS connections. Callers must not close it; whoever
+    owns the loop calls close_session() before closing the loop.
+
+    Returns:
+        aiohttp.ClientSession: Shared session
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is not None and not session.closed:
+        return session
+
+    settings = load_http_settings()
+    connector = aiohttp.TCPConnector(
+        limit=settings["http_max_connections"],
+        limit_per_host=settings["http_max_per_host"],
+        use_dns_cache=True,
+        ttl_dns_cache=settings["http_dns_cache_ttl"],
+        keepalive_timeout=settings["http_keepalive_timeout"],
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=settings["http_total_timeout"]),
+    )
+    _sessions[loop] = session
+    return session
+
+async def close_session() -> None:
+    """Closes the shared session of the running event loop, if any"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+def resolve_session(session: Optional[aiohttp.ClientSession] = None) -> aiohttp.ClientSession:
+    """Returns the injected session, or the shared one when none was given"""
+    return session if session is not None else get_session()
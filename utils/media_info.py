@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import struct
+import threading
+import subprocess
+from typing import Any, Dict, Optional, Tuple
+from utils.mp4_index import iter_boxes, parse_box_header
+
+MP4_EXTENSIONS = {".mp4", ".m4v", ".m4a", ".mov"}
+# MP3 files without a Xing/Info header are measured by walking every frame
+MP3_WALK_LIMIT = 32 * 1024 * 1024
+# Top-level boxes scanned while looking for moov
+MAX_TOP_LEVEL_BOXES = 64
+
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# Layer III tables indexed by MPEG version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_MP3_BITRATES = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_BITRATES[0] = _MP3_BITRATES[2]
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+# Memoized results keyed by absolute path; entries are valid while mtime and size match
+_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+def _parse_mp3_header(data: bytes, pos: int) -> Optional[Tuple[int, int, int, int]]:
+    # Returns (frame length, samples per frame, sample rate, side info size) of a Layer III frame
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 3
+    layer = (data[pos + 1] >> 1) & 3
+    bitrate_index = data[pos + 2] >> 4
+    rate_index = (data[pos + 2] >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[version][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (data[pos + 2] >> 1) & 1
+    mono = (data[pos + 3] >> 6) == 3
+    if version == 3:
+        samples, length = 1152, 144 * bitrate // sample_rate + padding
+        side_info = 17 if mono else 32
+    else:
+        samples, length = 576, 72 * bitrate // sample_rate + padding
+        side_info = 9 if mono else 17
+    return length, samples, sample_rate, side_info
+
+def _id3_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def mp3_duration(path: str) -> Optional[float]:
+    """
+    Reads the duration of an MP3 file from its frame headers
+
+    The Xing/Info frame count is used when present; otherwise every frame
+    header is walked, which is exact for both CBR and VBR files.
+
+    Args:
+        path (str): MP3 file path
+
+    Returns:
+        Optional[float]: Duration in seconds, or None if the file is not a Layer III stream
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(10)
+        start = _id3_size(head)
+        f.seek(start)
+        data = f.read(max(0, min(size, MP3_WALK_LIMIT) - start))
+
+    # Skip any junk before the first frame; a real frame is followed by another one
+    pos = 0
+    first = None
+    while pos < min(len(data), 64 * 1024):
+        first = _parse_mp3_header(data, pos)
+        if first and (pos + first[0] >= len(data) or _parse_mp3_header(data, pos + first[0])):
+            break
+        first = None
+        pos += 1
+    if first is None:
+        return None
+
+    length, samples, sample_rate, side_info = first
+    tag_pos = pos + 4 + side_info
+    tag = data[tag_pos:tag_pos + 4]
+    if tag in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[tag_pos + 4:tag_pos + 8])[0]
+        if flags & 1:
+            frames = struct.unpack(">I", data[tag_pos + 8:tag_pos + 12])[0]
+            return frames * samples / sample_rate
+
+    if size > MP3_WALK_LIMIT:
+        return None
+
+    total_seconds = 0.0
+    while pos + 4 <= len(data):
+        header = _parse_mp3_header(data, pos)
+        if header is None:
+            if data[pos:pos + 3] == b"TAG":
+                break
+            pos += 1
+            continue
+        total_seconds += header[1] / header[2]
+        pos += header[0]
+    return total_seconds if total_seconds > 0 else None
+
+def _read_moov(path: str) -> Optional[bytes]:
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        offset = 0
+        for _ in range(MAX_TOP_LEVEL_BOXES):
+            if offset + 8 > size:
+                return None
+            f.seek(offset)
+            parsed = parse_box_header(f.read(16), size, offset)
+            if parsed is None:
+                return None
+            box_type, _, box_size = parsed
+            if box_type == b"moov":
+                f.seek(offset)
+                return f.read(box_size)
+            offset += box_size
+    return None
+
+def mp4_info(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads duration, stream types and video size from an MP4/MOV moov box
+
+    Args:
+        path (str): Media file path
+
+    Returns:
+        Optional[Dict[str, Any]]: Media info, or None if the file has no usable moov box
+    """
+    moov = _read_moov(path)
+    if not moov:
+        return None
+
+    movie: Dict[str, int] = {}
+    tracks = []
+
+    def walk(start: int, end: int, track: Optional[Dict[str, Any]]) -> None:
+        for box_type, _, payload, box_end in iter_boxes(moov, start, end):
+            if box_type == b"trak":
+                new_track: Dict[str, Any] = {}
+                walk(payload, box_end, new_track)
+                tracks.append(new_track)
+            elif box_type == b"mvhd":
+                body = payload + 4
+                if moov[payload] == 1:
+                    movie["timescale"], movie["duration"] = struct.unpack(">IQ", moov[body + 16:body + 28])
+                else:
+                    movie["timescale"], movie["duration"] = struct.unpack(">II", moov[body + 8:body + 16])
+            elif box_type == b"hdlr" and track is not None:
+                track["handler"] = moov[payload + 8:payload + 12].decode("latin-1")
+            elif box_type == b"stsd" and track is not None:
+                # Visual sample entries store the coded width and height 24 bytes into the entry body
+                entry = payload + 8
+                if entry + 36 <= box_end:
+                    track["size"] = struct.unpack(">HH", moov[entry + 32:entry + 36])
+            elif box_type in _MP4_CONTAINERS:
+                walk(payload, box_end, track)
+
+    walk(0, len(moov), None)
+    if not movie.get("timescale"):
+        return None
+
+    video = next((track for track in tracks if track.get("handler") == "vide"), None)
+    width, height = video.get("size", (None, None)) if video else (None, None)
+    return {
+        "duration": movie["duration"] / movie["timescale"],
+        "has_audio": any(track.get("handler") == "soun" for track in tracks),
+        "has_video": video is not None,
+        "width": width or None,
+        "height": height or None,
+        "source": "native"
+    }
+
+def ffprobe_info(path: str, ffprobe_path: str = "ffprobe") -> Optional[Dict[str, Any]]:
+    """
+    Reads media info with a single combined ffprobe call
+
+    Args:
+        path (str): Media file path
+        ffprobe_path (str): FFprobe executable
+
+    Returns:
+        Optional[Dict[str, Any]]: Media info, or None if ffprobe failed
+    """
+    cmd = f'"{ffprobe_path}" -v error -show_entries format=duration:stream=codec_type,width,height -of json "{os.path.abspath(path)}"'
+    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    try:
+        data = json.loads(result.stdout)
+        duration = float(data.get("format", {}).get("duration", 0.0))
+    except (ValueError, TypeError):
+        return None
+    streams = data.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    return {
+        "duration": duration,
+        "has_audio": any(stream.get("codec_type") == "audio" for stream in streams),
+        "has_video": video is not None,
+        "width": int(video["width"]) if video and video.get("width") else None,
+        "height": int(video["height"]) if video and video.get("height") else None,
+        "source": "ffprobe"
+    }
+
+def _native_info(path: str) -> Optional[Dict[str, Any]]:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in MP4_EXTENSIONS:
+        info = mp4_info(path)
+        # A video track without a readable sample entry still needs ffprobe for its size
+        if info and info["has_video"] and not info["width"]:
+            return None
+        return info
+    if extension == ".mp3":
+        duration = mp3_duration(path)
+        if duration is None:
+            return None
+        return {"duration": duration, "has_audio": True, "has_video": False,
+                "width": None, "height": None, "source": "native"}
+    return None
+
+def probe_media_info(path: str, ffprobe_path: str = "ffprobe") -> Optional[Dict[str, Any]]:
+    """
+    Returns duration, stream types and video size of a media file, probing it at most once
+
+    MP4/MOV and MP3 headers are parsed in-process; other files, or files the
+    native parsers cannot read, fall back to one combined ffprobe call.
+    Results are memoized by path, modification time and size, so a file is
+    re-probed only after it changes.
+
+    Args:
+        path (str): Media file path
+        ffprobe_path (str): FFprobe executable used for the fallback
+
+    Returns:
+        Optional[Dict[str, Any]]: {"duration", "has_audio", "has_video", "width", "height", "source"},
+            or None if the file is missing or unreadable
+    """
+    key_path = os.path.abspath(path)
+    try:
+        stat = os.stat(key_path)
+    except OSError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(key_path)
+    if cached and cached[0] == signature:
+        return dict(cached[1])
+
+    info = None
+    try:
+        info = _native_info(key_path)
+    except (OSError, struct.error, ValueError, IndexError):
+        info = None
+    if info is None:
+        info = ffprobe_info(key_path, ffprobe_path)
+    if info is None:
+        return None
+
+    with _cache_lock:
+        _cache[key_path] = (signature, info)
+    return dict(info)
+
+def media_duration(path: str, ffprobe_path: str = "ffprobe") -> Optional[float]:
+    """
+    Returns the duration of a media file in seconds (see probe_media_info)
+
+    Args:
+        path (str): Media file path
+        ffprobe_path (str): FFprobe executable used for the fallback
+
+    Returns:
+        Optional[float]: Duration, or None if it could not be read
+    """
+    info = probe_media_info(path, ffprobe_path)
+    return info["duration"] if info else None
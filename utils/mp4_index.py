@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import bisect
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+WINDOW_SUFFIX = ".window.json"
+
+# Container boxes that are descended into while looking for sample tables
+_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts"}
+
+def iter_boxes(data: bytes, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int, int]]:
+    """
+    Iterates over the ISO BMFF boxes stored in a byte buffer
+
+    Args:
+        data (bytes): Buffer holding complete boxes
+        offset (int): Position of the first box
+        end (int): End of the region to scan (default: end of buffer)
+
+    Yields:
+        Tuple[bytes, int, int, int]: Box type, box start, payload start and box end
+    """
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            break
+        yield box_type, offset, offset + header, min(offset + size, end)
+        offset += size
+
+def parse_box_header(data: bytes, file_size: int, offset: int) -> Optional[Tuple[bytes, int, int]]:
+    """
+    Parses a single top-level box header read from a remote file
+
+    Args:
+        data (bytes): At least the first 16 bytes of the box
+        file_size (int): Total size of the file
+        offset (int): Position of the box in the file
+
+    Returns:
+        Optional[Tuple[bytes, int, int]]: Box type, header length and box size, or None if invalid
+    """
+    if len(data) < 8:
+        return None
+    size, box_type = struct.unpack(">I4s", data[:8])
+    header = 8
+    if size == 1:
+        if len(data) < 16:
+            return None
+        size = struct.unpack(">Q", data[8:16])[0]
+        header = 16
+    elif size == 0:
+        size = file_size - offset
+    if size < header:
+        return None
+    return box_type, header, size
+
+def _full_box(data: bytes, payload: int) -> Tuple[int, int]:
+    # Returns the version and the start of the body of a full box
+    return data[payload], payload + 4
+
+def _parse_stbl(data: bytes, start: int, end: int) -> Dict[str, Any]:
+    tables: Dict[str, Any] = {}
+    for box_type, _, payload, box_end in iter_boxes(data, start, end):
+        if box_type == b"stts":
+            _, body = _full_box(data, payload)
+            count = struct.unpack(">I", data[body:body + 4])[0]
+            tables["stts"] = [struct.unpack(">II", data[body + 4 + i * 8:body + 12 + i * 8]) for i in range(count)]
+        elif box_type == b"stss":
+            _, body = _full_box(data, payload)
+            count = struct.unpack(">I", data[body:body + 4])[0]
+            tables["stss"] = list(struct.unpack(f">{count}I", data[body + 4:body + 4 + count * 4]))
+        elif box_type == b"stsc":
+            _, body = _full_box(data, payload)
+            count = struct.unpack(">I", data[body:body + 4])[0]
+            tables["stsc"] = [struct.unpack(">III", data[body + 4 + i * 12:body + 16 + i * 12]) for i in range(count)]
+        elif box_type == b"stsz":
+            _, body = _full_box(data, payload)
+            sample_size, count = struct.unpack(">II", data[body:body + 8])
+            if sample_size:
+                tables["stsz"] = [sample_size] * count
+            else:
+                tables["stsz"] = list(struct.unpack(f">{count}I", data[body + 8:body + 8 + count * 4]))
+        elif box_type == b"stco":
+            _, body = _full_box(data, payload)
+            count = struct.unpack(">I", data[body:body + 4])[0]
+            tables["chunks"] = list(struct.unpack(f">{count}I", data[body + 4:body + 4 + count * 4]))
+        elif box_type == b"co64":
+            _, body = _full_box(data, payload)
+            count = struct.unpack(">I", data[body:body + 4])[0]
+            tables["chunks"] = list(struct.unpack(f">{count}Q", data[body + 4:body + 4 + count * 8]))
+    return tables
+
+def _sample_offsets(tables: Dict[str, Any]) -> List[int]:
+    sizes = tables["stsz"]
+    chunks = tables["chunks"]
+    stsc = tables["stsc"]
+    offsets: List[int] = []
+    sample = 0
+    for entry_index, (first_chunk, per_chunk, _) in enumerate(stsc):
+        last_chunk = stsc[entry_index + 1][0] - 1 if entry_index + 1 < len(stsc) else len(chunks)
+        for chunk in range(first_chunk, last_chunk + 1):
+            position = chunks[chunk - 1]
+            for _ in range(per_chunk):
+                if sample >= len(sizes):
+                    return offsets
+                offsets.append(position)
+                position += sizes[sample]
+                sample += 1
+    return offsets
+
+def parse_moov(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Extracts per-track sample timing and byte positions from a moov box
+
+    Args:
+        data (bytes): Complete moov box (including its header)
+
+    Returns:
+        List[Dict[str, Any]]: One entry per track with handler, timescale, sample
+            decode times, sample offsets, sample sizes and sync sample indexes
+    """
+    tracks: List[Dict[str, Any]] = []
+
+    def walk(start: int, end: int, track: Optional[Dict[str, Any]]) -> None:
+        for box_type, _, payload, box_end in iter_boxes(data, start, end):
+            if box_type == b"trak":
+                new_track: Dict[str, Any] = {}
+                walk(payload, box_end, new_track)
+                tracks.append(new_track)
+            elif box_type == b"mdhd" and track is not None:
+                version, body = _full_box(data, payload)
+                if version == 1:
+                    track["timescale"] = struct.unpack(">I", data[body + 16:body + 20])[0]
+                else:
+                    track["timescale"] = struct.unpack(">I", data[body + 8:body + 12])[0]
+            elif box_type == b"hdlr" and track is not None:
+                track["handler"] = data[payload + 8:payload + 12].decode("latin-1")
+            elif box_type == b"stbl" and track is not None:
+                track["tables"] = _parse_stbl(data, payload, box_end)
+            elif box_type in _CONTAINERS:
+                walk(payload, box_end, track)
+
+    moov = next(iter_boxes(data), None)
+    if moov is None or moov[0] != b"moov":
+        raise ValueError("Not a moov box")
+    walk(moov[2], moov[3], None)
+
+    parsed = []
+    for track in tracks:
+        tables = track.get("tables", {})
+        if not track.get("timescale") or not all(key in tables for key in ("stts", "stsc", "stsz", "chunks")):
+            continue
+        times = []
+        current = 0
+        for count, delta in tables["stts"]:
+            for _ in range(count):
+                times.append(current)
+                current += delta
+        parsed.append({
+            "handler": track.get("handler", ""),
+            "timescale": track["timescale"],
+            "times": times,
+            "offsets": _sample_offsets(tables),
+            "sizes": tables["stsz"],
+            # 1-based sample numbers in stss; no table means every sample is a sync sample
+            "sync": [number - 1 for number in tables["stss"]] if "stss" in tables else None
+        })
+    return parsed
+
+def window_byte_range(tracks: List[Dict[str, Any]], start: float, end: float) -> Optional[Tuple[int, int]]:
+    """
+    Computes the byte range of the media data needed to decode a time window
+
+    Video tracks are extended back to the last sync sample before the window,
+    so decoding can start cleanly.
+
+    Args:
+        tracks (List[Dict[str, Any]]): Output of parse_moov
+        start (float): Window start (seconds)
+        end (float): Window end (seconds)
+
+    Returns:
+        Optional[Tuple[int, int]]: First and last byte (inclusive), or None if no sample falls in the window
+    """
+    first_byte: Optional[int] = None
+    last_byte: Optional[int] = None
+    for track in tracks:
+        timescale = track["timescale"]
+        times = track["times"]
+        count = min(len(times), len(track["offsets"]), len(track["sizes"]))
+        if not count:
+            continue
+
+        start_ticks = start * timescale
+        end_ticks = end * timescale
+        # Sample containing the window start, and the last sample starting before its end
+        first = min(count - 1, max(0, bisect.bisect_right(times, start_ticks, 0, count) - 1))
+        last = min(count - 1, max(first, bisect.bisect_left(times, end_ticks, 0, count) - 1))
+
+        sync = track.get("sync")
+        if sync and track.get("handler") == "vide":
+            earlier = [index for index in sync if index <= first]
+            first = earlier[-1] if earlier else 0
+
+        for index in range(first, last + 1):
+            offset = track["offsets"][index]
+            first_byte = offset if first_byte is None else min(first_byte, offset)
+            sample_end = offset + track["sizes"][index] - 1
+            last_byte = sample_end if last_byte is None else max(last_byte, sample_end)
+
+    if first_byte is None or last_byte is None:
+        return None
+    return first_byte, last_byte
+
+def write_valid_window(path: str, start: float, end: float, extra: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Records that only [start, end] seconds of a partially fetched file hold media data
+
+    Args:
+        path (str): Media file path
+        start (float): Window start (seconds)
+        end (float): Window end (seconds)
+        extra (Dict[str, Any]): Additional information stored with the window
+    """
+    data = dict(extra or {})
+    data.update({"start": start, "end": end})
+    with open(path + WINDOW_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def read_valid_window(path: str) -> Optional[Tuple[float, float]]:
+    """
+    Returns the decodable time window of a partially fetched file
+
+    Args:
+        path (str): Media file path
+
+    Returns:
+        Optional[Tuple[float, float]]: (start, end) in seconds, or None for complete files
+    """
+    window_path = path + WINDOW_SUFFIX
+    if not os.path.exists(window_path):
+        return None
+    try:
+        with open(window_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return float(data["start"]), float(data["end"])
+    except Exception:
+        return None
@@ -0,0 +1,411 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import aiohttp
+import aiofiles
+from utils.file_cache import load_cache_settings
+from utils.mp4_index import parse_box_header, parse_moov, window_byte_range, write_valid_window
+
+CHUNK_SIZE = 256 * 1024
+SEGMENT_RETRIES = 3
+
+_stats_lock = threading.Lock()
+_host_stats: Dict[str, Dict[str, float]] = {}
+
+def record_throughput(url: str, size: int, seconds: float) -> None:
+    """
+    Adds a finished transfer to the per-host throughput statistics
+
+    Args:
+        url (str): Downloaded URL
+        size (int): Transferred bytes
+        seconds (float): Transfer duration
+    """
+    host = urlparse(url).netloc or "unknown"
+    with _stats_lock:
+        stats = _host_stats.setdefault(host, {"bytes": 0, "seconds": 0.0, "downloads": 0})
+        stats["bytes"] += size
+        stats["seconds"] += seconds
+        stats["downloads"] += 1
+
+def throughput_report() -> Dict[str, Dict[str, float]]:
+    """
+    Returns the throughput statistics collected so far
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per host bytes, seconds, downloads and MB/s
+    """
+    with _stats_lock:
+        report = {}
+        for host, stats in _host_stats.items():
+            seconds = stats["seconds"] or 1e-9
+            report[host] = dict(stats, mbps=stats["bytes"] / seconds / (1024 * 1024))
+        return report
+
+def load_download_settings() -> Tuple[int, int]:
+    """
+    Reads the segment size and connection count from config.json
+
+    Returns:
+        Tuple[int, int]: Segment size in bytes and concurrent connections per file
+    """
+    config = load_cache_settings()
+    try:
+        segment_mb = max(1, int(config.get("download_segment_mb", 8)))
+    except (TypeError, ValueError):
+        segment_mb = 8
+    try:
+        connections = max(1, int(config.get("download_connections", 4)))
+    except (TypeError, ValueError):
+        connections = 4
+    return segment_mb * 1024 * 1024, connections
+
+async def probe_range_support(session: aiohttp.ClientSession, url: str) -> Tuple[Optional[int], bool]:
+    """
+    Finds the size of a remote file and whether it can be fetched in ranges
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session
+        url (str): File URL
+
+    Returns:
+        Tuple[Optional[int], bool]: Total size (None if unknown) and range support
+    """
+    async with session.get(url, headers={"Range": "bytes=0-0"}) as response:
+        if response.status == 206:
+            match = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+            return (int(match.group(1)) if match else None), match is not None
+        if response.status == 200:
+            length = response.headers.get("Content-Length")
+            return (int(length) if length and length.isdigit() else None), False
+        raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                          status=response.status, message="Range probe failed")
+
+class SegmentState:
+    """
+    Progress sidecar of a partially downloaded file (<temp file>.json)
+
+    Args:
+        temp_path (str): Partial download path
+        url (str): Source URL
+        size (int): Expected total size
+        segment_size (int): Segment length in bytes
+    """
+    def __init__(self, temp_path: str, url: str, size: int, segment_size: int):
+        self.path = temp_path + ".json"
+        self.url = url
+        self.size = size
+        self.segment_size = segment_size
+        self.done: List[int] = []
+        self._lock = asyncio.Lock()
+
+    def load(self) -> bool:
+        """Loads earlier progress; returns False if it does not match this download"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return False
+        if data.get("size") != self.size or data.get("segment_size") != self.segment_size:
+            return False
+        self.done = [int(index) for index in data.get("done", [])]
+        return True
+
+    async def mark_done(self, index: int) -> None:
+        async with self._lock:
+            self.done.append(index)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"url": self.url, "size": self.size, "segment_size": self.segment_size, "done": self.done}, f)
+            os.replace(temp_path, self.path)
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def fetch_range(session: aiohttp.ClientSession, url: str, temp_path: str, start: int, end: int) -> int:
+    """
+    Downloads bytes start..end (inclusive) of a URL into the same offsets of an existing file
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session
+        url (str): File URL
+        temp_path (str): Preallocated file to write into
+        start (int): First byte
+        end (int): Last byte (inclusive)
+
+    Returns:
+        int: Number of bytes written
+    """
+    written = 0
+    for attempt in range(SEGMENT_RETRIES):
+        # A retried segment continues from the last byte written
+        offset = start + written
+        try:
+            async with session.get(url, headers={"Range": f"bytes={offset}-{end}"}, timeout=aiohttp.ClientTimeout(total=None, sock_read=60)) as response:
+                if response.status != 206:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                      status=response.status, message="Range request refused")
+                async with aiofiles.open(temp_path, "r+b") as f:
+                    await f.seek(offset)
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        await f.write(chunk)
+                        written += len(chunk)
+            if start + written > end:
+                return written
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == SEGMENT_RETRIES - 1:
+                raise
+            print(f"Segment retry {attempt + 1} ({start}-{end}): {str(e)}")
+            await asyncio.sleep(1 + attempt)
+    raise IOError(f"Segment {start}-{end} incomplete")
+
+async def gather_or_cancel(*coros: Any) -> List[Any]:
+    """
+    Runs coroutines concurrently; if one fails, the others are cancelled and awaited
+
+    Range workers share one output file, so none of them may keep writing
+    after the download has been given up on.
+
+    Args:
+        coros: Coroutines to run
+
+    Returns:
+        List[Any]: Results in the order of the coroutines
+
+    Raises:
+        Exception: The first exception raised by a coroutine
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+async def _download_segments(session: aiohttp.ClientSession, url: str, temp_path: str, size: int,
+                             segment_size: int, connections: int) -> None:
+    state = SegmentState(temp_path, url, size, segment_size)
+    if not (os.path.exists(temp_path) and os.path.getsize(temp_path) == size and state.load()):
+        # Preallocate the file so segments can be written at their offsets
+        with open(temp_path, "wb") as f:
+            f.truncate(size)
+        state.done = []
+
+    segments = [(index, index * segment_size, min(size, (index + 1) * segment_size) - 1)
+                for index in range((size + segment_size - 1) // segment_size)]
+    remaining = [segment for segment in segments if segment[0] not in state.done]
+    if len(remaining) < len(segments):
+        print(f"Resuming download: {len(segments) - len(remaining)}/{len(segments)} segments already present")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for segment in remaining:
+        queue.put_nowait(segment)
+
+    async def worker():
+        while not queue.empty():
+            index, start, end = queue.get_nowait()
+            await fetch_range(session, url, temp_path, start, end)
+            await state.mark_done(index)
+
+    await gather_or_cancel(*(worker() for _ in range(min(connections, len(remaining)) or 1)))
+    state.remove()
+
+async def _download_stream(session: aiohttp.ClientSession, url: str, temp_path: str, resumable: bool) -> None:
+    offset = os.path.getsize(temp_path) if resumable and os.path.exists(temp_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=None, sock_read=60)) as response:
+        if response.status not in (200, 206):
+            raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                              status=response.status, message="Download failed")
+        # The server ignored the range: start over
+        mode = "ab" if offset and response.status == 206 else "wb"
+        async with aiofiles.open(temp_path, mode) as f:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                await f.write(chunk)
+
+async def download_ranged(session: aiohttp.ClientSession, url: str, destination: str,
+                          segment_size: Optional[int] = None, connections: Optional[int] = None) -> str:
+    """
+    Downloads a file over several concurrent HTTP Range requests
+
+    Large files are split into segments written at their offsets into a
+    preallocated <destination>.temp file. Finished segments are recorded in
+    a sidecar, so an interrupted download resumes where it stopped instead of
+    from byte zero. Servers without range support get a single stream, which
+    is still resumed when possible. Throughput is recorded per host.
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session
+        url (str): File URL
+        destination (str): Final file path
+        segment_size (int): Segment length in bytes (default: config "download_segment_mb")
+        connections (int): Concurrent connections per file (default: config "download_connections")
+
+    Returns:
+        str: destination
+
+    Raises:
+        Exception: When the download fails; the .temp file is kept for a later resume
+    """
+    default_segment, default_connections = load_download_settings()
+    segment_size = segment_size or default_segment
+    connections = connections or default_connections
+    temp_path = destination + ".temp"
+
+    started = time.monotonic()
+    size, ranged = await probe_range_support(session, url)
+
+    if ranged and size and size > segment_size and connections > 1:
+        await _download_segments(session, url, temp_path, size, segment_size, connections)
+    else:
+        if os.path.exists(temp_path + ".json"):
+            # Leftover of a segmented download; its holes cannot be appended to
+            os.remove(temp_path + ".json")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if size and os.path.exists(temp_path) and os.path.getsize(temp_path) >= size:
+            # Nothing records that a full-size file was actually written (a preallocated
+            # file looks the same), so it is fetched again rather than trusted
+            os.remove(temp_path)
+        await _download_stream(session, url, temp_path, ranged)
+
+    if size and os.path.getsize(temp_path) != size:
+        raise IOError(f"Size mismatch: {os.path.getsize(temp_path)} != {size}")
+
+    os.replace(temp_path, destination)
+    elapsed = time.monotonic() - started
+    downloaded = os.path.getsize(destination)
+    record_throughput(url, downloaded, elapsed)
+    print(f"Downloaded {downloaded / (1024 * 1024):.1f} MB in {elapsed:.1f}s "
+          f"({downloaded / max(elapsed, 1e-9) / (1024 * 1024):.2f} MB/s) from {urlparse(url).netloc}")
+    return destination
+
+async def read_range(session: aiohttp.ClientSession, url: str, start: int, end: int) -> bytes:
+    """
+    Reads bytes start..end (inclusive) of a URL into memory
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session
+        url (str): File URL
+        start (int): First byte
+        end (int): Last byte (inclusive)
+
+    Returns:
+        bytes: Data returned by the server
+    """
+    async with session.get(url, headers={"Range": f"bytes={start}-{end}"}) as response:
+        if response.status != 206:
+            raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                              status=response.status, message="Range request refused")
+        return await response.read()
+
+async def download_window(session: aiohttp.ClientSession, url: str, destination: str, start: float, end: float,
+                          max_fraction: float = 0.7, connections: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Downloads only the part of a remote MP4 needed to decode a time window
+
+    The top-level boxes are located with small Range reads and the moov index
+    is fetched and parsed to find the bytes of every sample in the window
+    (video starting from the preceding keyframe). The result is a file of the
+    original size in which only the headers and that byte range are filled in;
+    the decodable window is recorded next to it (see mp4_index.read_valid_window).
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session
+        url (str): MP4 URL
+        destination (str): Final file path
+        start (float): Window start (seconds)
+        end (float): Window end (seconds)
+        max_fraction (float): Give up (return None) when the window needs more than
+            this fraction of the file, since a full download is then simpler
+        connections (int): Concurrent connections for the media range
+
+    Returns:
+        Optional[Dict[str, Any]]: Window information (start, end, bytes, size), or None
+            when the file is not a range-capable MP4 or partial fetching is not worth it
+    """
+    size, ranged = await probe_range_support(session, url)
+    if not ranged or not size:
+        return None
+
+    started = time.monotonic()
+    boxes: List[Tuple[bytes, int, int]] = []
+    moov_data = None
+    offset = 0
+    while offset < size:
+        header = await read_range(session, url, offset, min(size, offset + 16) - 1)
+        parsed = parse_box_header(header, size, offset)
+        if parsed is None:
+            return None
+        box_type, _, box_size = parsed
+        boxes.append((box_type, offset, box_size))
+        if len(boxes) > 32:
+            # Fragmented files would need one request per fragment header
+            return None
+        if box_type == b"moov":
+            moov_data = await read_range(session, url, offset, offset + box_size - 1)
+        offset += box_size
+    if moov_data is None:
+        return None
+
+    byte_range = window_byte_range(parse_moov(moov_data), start, end)
+    if byte_range is None:
+        return None
+    first_byte, last_byte = byte_range
+    media_bytes = last_byte - first_byte + 1
+    if media_bytes > size * max_fraction:
+        return None
+
+    # Own temp name: a full download of the same destination must never pick up this
+    # mostly zero-filled file as its own finished .temp
+    temp_path = destination + ".window.temp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.truncate(size)
+
+        # Every box except the media data itself is copied (headers are small)
+        fetched = 0
+        async with aiofiles.open(temp_path, "r+b") as f:
+            for box_type, box_offset, box_size in boxes:
+                if box_type == b"mdat":
+                    data = await read_range(session, url, box_offset, box_offset + min(box_size, 16) - 1)
+                elif box_type == b"moov":
+                    data = moov_data
+                else:
+                    data = await read_range(session, url, box_offset, box_offset + box_size - 1)
+                await f.seek(box_offset)
+                await f.write(data)
+                fetched += len(data)
+
+        _, default_connections = load_download_settings()
+        connections = connections or default_connections
+        segment = max(1, (media_bytes + connections - 1) // connections)
+        await gather_or_cancel(*(
+            fetch_range(session, url, temp_path, segment_start, min(last_byte, segment_start + segment - 1))
+            for segment_start in range(first_byte, last_byte + 1, segment)
+        ))
+        fetched += media_bytes
+
+        os.replace(temp_path, destination)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    info = {"start": start, "end": end, "bytes": fetched, "size": size}
+    write_valid_window(destination, start, end, {"bytes": fetched, "size": size})
+
+    elapsed = time.monotonic() - started
+    record_throughput(url, fetched, elapsed)
+    print(f"Partial download: {fetched / (1024 * 1024):.1f} of {size / (1024 * 1024):.1f} MB "
+          f"for {start:.1f}-{end:.1f}s from {urlparse(url).netloc}")
+    return info
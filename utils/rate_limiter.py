@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import random
+import asyncio
+import threading
+import contextlib
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Mapping, Optional
+import aiohttp
+from utils.file_cache import load_cache_settings
+
+# Requests per second and burst size per API. Pexels allows 200 requests per
+# hour by default; OpenAI limits depend on the account tier.
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, float]] = {
+    "pexels": {"rate": 200 / 3600, "burst": 25},
+    "openai": {"rate": 5.0, "burst": 20},
+}
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError"}
+MAX_RETRIES = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by async and blocking callers
+
+    Tokens are reserved up front: a caller that finds the bucket empty gets the
+    time it has to wait for its token, so concurrent callers queue up fairly
+    instead of polling. pause_until() stops all callers until a server-given
+    reset time, e.g. after a 429 with Retry-After.
+
+    Args:
+        rate (float): Tokens added per second
+        burst (float): Bucket capacity
+    """
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(rate, 1e-6)
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Takes tokens from the bucket
+
+        Args:
+            tokens (float): Tokens needed
+
+        Returns:
+            float: Seconds the caller must wait before using them
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def pause_until(self, seconds_from_now: float) -> None:
+        """Blocks every caller for the given number of seconds"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds_from_now)
+
+    def acquire_sync(self, tokens: float = 1.0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(api: str) -> TokenBucket:
+    """
+    Returns the process-wide token bucket of an API
+
+    Limits come from the "rate_limits" section of config.json, e.g.
+    {"openai": {"rate": 5, "burst": 20}}, falling back to DEFAULT_RATE_LIMITS.
+
+    Args:
+        api (str): API name ("pexels", "openai", ...)
+
+    Returns:
+        TokenBucket: Shared bucket
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(api)
+        if bucket is None:
+            limits = dict(DEFAULT_RATE_LIMITS.get(api, {"rate": 10.0, "burst": 10}))
+            configured = load_cache_settings().get("rate_limits", {}).get(api, {})
+            if isinstance(configured, dict):
+                limits.update({key: float(value) for key, value in configured.items() if key in ("rate", "burst")})
+            bucket = TokenBucket(limits["rate"], limits["burst"])
+            _buckets[api] = bucket
+        return bucket
+
+def backoff_delay(attempt: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    """
+    Exponential backoff with full jitter
+
+    Args:
+        attempt (int): Retry number (0 for the first retry)
+        base (float): Delay of the first retry
+        cap (float): Maximum delay
+
+    Returns:
+        float: Seconds to wait
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def _parse_duration(value: str) -> Optional[float]:
+    # OpenAI reset headers look like "1s", "6m0s" or "120ms"
+    total = 0.0
+    number = ""
+    index = 0
+    found = False
+    while index < len(value):
+        char = value[index]
+        if char.isdigit() or char == ".":
+            number += char
+        elif number:
+            unit = value[index:index + 2] if value[index:index + 2] == "ms" else char
+            scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}.get(unit)
+            if scale is None:
+                return None
+            total += float(number) * scale
+            number = ""
+            found = True
+            index += len(unit) - 1
+        index += 1
+    if number:
+        total += float(number)
+        found = True
+    return total if found else None
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Reads how long the server asked us to wait from response headers
+
+    Understands Retry-After (seconds or HTTP date), OpenAI's
+    x-ratelimit-reset-* durations and Pexels' X-Ratelimit-Reset timestamp
+    (the latter two only when the remaining quota is zero).
+
+    Args:
+        headers (Mapping[str, str]): Response headers
+
+    Returns:
+        Optional[float]: Seconds to wait, or None when the headers say nothing
+    """
+    if not headers:
+        return None
+    lowered = {str(key).lower(): str(value) for key, value in headers.items()}
+
+    retry_after = lowered.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except Exception:
+                pass
+
+    for kind in ("requests", "tokens"):
+        if lowered.get(f"x-ratelimit-remaining-{kind}") == "0":
+            reset = _parse_duration(lowered.get(f"x-ratelimit-reset-{kind}", ""))
+            if reset is not None:
+                return reset
+
+    if lowered.get("x-ratelimit-remaining") == "0":
+        try:
+            return max(0.0, float(lowered.get("x-ratelimit-reset", "")) - time.time())
+        except ValueError:
+            pass
+    return None
+
+@contextlib.asynccontextmanager
+async def limited_request(session: aiohttp.ClientSession, method: str, url: str, api: str,
+                          max_retries: int = MAX_RETRIES, **kwargs: Any) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    Performs an HTTP request under an API's rate limit, retrying transient failures
+
+    429/5xx responses and connection errors are retried with jittered
+    exponential backoff, or after the delay the server asks for. When the
+    server reports an exhausted quota the whole API bucket is paused. The last
+    response is yielded as is, so callers keep their own status handling.
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session
+        method (str): HTTP method
+        url (str): Request URL
+        api (str): API name used to pick the token bucket
+        max_retries (int): Maximum number of retries
+        **kwargs: Passed to session.request
+
+    Yields:
+        aiohttp.ClientResponse: Final response
+    """
+    bucket = get_bucket(api)
+    attempt = 0
+    while True:
+        await bucket.acquire()
+        try:
+            response = await session.request(method, url, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= max_retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        wait = retry_after_seconds(response.headers)
+        if response.status in RETRY_STATUSES and attempt < max_retries:
+            response.release()
+            if wait is not None:
+                bucket.pause_until(wait)
+            await asyncio.sleep(wait if wait is not None else backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if wait is not None:
+            # Quota exhausted but this request succeeded: hold back the next ones
+            bucket.pause_until(wait)
+        try:
+            yield response
+        finally:
+            response.release()
+        return
+
+def call_with_retry(api: str, func: Callable[..., Any], *args: Any, max_retries: int = MAX_RETRIES, **kwargs: Any) -> Any:
+    """
+    Calls a blocking SDK function under an API's rate limit, retrying transient failures
+
+    Rate limit, timeout, connection and 5xx errors (recognized by class name
+    or status_code, so SDK imports are not needed here) are retried with
+    jittered exponential backoff or the server's Retry-After.
+
+    Args:
+        api (str): API name used to pick the token bucket
+        func (Callable): Function to call
+        *args: Positional arguments for func
+        max_retries (int): Maximum number of retries
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Any: Return value of func
+
+    Raises:
+        Exception: The last error when it is not transient or retries are exhausted
+    """
+    bucket = get_bucket(api)
+    attempt = 0
+    while True:
+        bucket.acquire_sync()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            transient = type(e).__name__ in RETRY_EXCEPTIONS or status in RETRY_STATUSES
+            if not transient or attempt >= max_retries:
+                raise
+            response = getattr(e, "response", None)
+            wait = retry_after_seconds(getattr(response, "headers", None))
+            if wait is not None:
+                bucket.pause_until(wait)
+            delay = wait if wait is not None else backoff_delay(attempt)
+            print(f"Retrying {api} request ({attempt + 1}/{max_retries}) in {delay:.1f}s: {str(e)}")
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Optional
+from utils.file_cache import ROOT_DIR, load_cache_settings
+
+def text_fingerprint(*parts: Any) -> str:
+    """
+    Creates a fingerprint that is stable across near-identical texts
+
+    Texts are lowercased, stripped of punctuation and reduced to their sorted
+    set of words, so differences in casing, spacing, punctuation or sentence
+    order do not change the fingerprint.
+
+    Args:
+        *parts: Strings or lists of strings (topic, content sentences...)
+
+    Returns:
+        str: Short hex fingerprint
+    """
+    words = set()
+    for part in parts:
+        texts: Iterable[Any] = part if isinstance(part, (list, tuple)) else [part]
+        for text in texts:
+            words.update(re.findall(r"\w+", str(text or "").lower()))
+    return hashlib.sha256(" ".join(sorted(words)).encode("utf-8")).hexdigest()[:16]
+
+class ScoreCache:
+    """
+    Persistent key/score store with expiry and a bounded number of entries
+
+    Scores are kept in a single JSON file that is rewritten atomically. Entries
+    older than ttl_seconds are ignored and dropped on the next write; when the
+    store grows past max_entries the oldest entries are removed first.
+
+    Args:
+        path (str): JSON file holding the scores
+        ttl_seconds (float): Entry lifetime (0 disables expiry)
+        max_entries (int): Maximum number of stored entries (0 disables the limit)
+    """
+    def __init__(self, path: str, ttl_seconds: float = 0, max_entries: int = 0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        # Merge with what is on disk so concurrent jobs do not drop each other's scores
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Score cache read error ({self.path}): {str(e)}")
+            return
+        if not isinstance(data, dict):
+            return
+        for key, entry in data.items():
+            current = self._entries.get(key)
+            if current is None or entry.get("time", 0) > current.get("time", 0):
+                self._entries[key] = entry
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry.get("time", 0) > self.ttl_seconds
+
+    def _save(self) -> None:
+        now = time.time()
+        entries = {key: entry for key, entry in self._entries.items() if not self._expired(entry, now)}
+        if self.max_entries and len(entries) > self.max_entries:
+            newest = sorted(entries.items(), key=lambda item: item[1].get("time", 0), reverse=True)
+            entries = dict(newest[:self.max_entries])
+        self._entries = entries
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Score cache write error ({self.path}): {str(e)}")
+
+    def get(self, key: str) -> Optional[float]:
+        """
+        Returns a stored score
+
+        Args:
+            key (str): Score key
+
+        Returns:
+            Optional[float]: Score, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry, time.time()):
+                return None
+            return entry.get("score")
+
+    def set(self, key: str, score: float) -> None:
+        """Stores a single score"""
+        self.update({key: score})
+
+    def update(self, scores: Dict[str, float]) -> None:
+        """
+        Stores several scores with a single write
+
+        Args:
+            scores (Dict[str, float]): Scores keyed by score key
+        """
+        if not scores:
+            return
+        with self._lock:
+            self._load()
+            now = time.time()
+            for key, score in scores.items():
+                self._entries[key] = {"score": float(score), "time": now}
+            self._save()
+
+def get_score_cache(namespace: str, default_ttl_hours: float = 720, default_max_entries: int = 20000) -> ScoreCache:
+    """
+    Returns the persistent score store for a namespace, configured from config.json
+
+    The store lives in "cache_dir" (default: <repo>/cache) as <namespace>_scores.json.
+    "<namespace>_cache_ttl_hours" and "<namespace>_cache_max_entries" override the limits.
+
+    Args:
+        namespace (str): Store namespace (e.g. "thumbnail")
+        default_ttl_hours (float): Entry lifetime used when not configured
+        default_max_entries (int): Entry limit used when not configured
+
+    Returns:
+        ScoreCache: Score store
+    """
+    config = load_cache_settings()
+    cache_dir = config.get("cache_dir") or os.path.join(ROOT_DIR, "cache")
+    if not os.path.isabs(cache_dir):
+        cache_dir = os.path.join(ROOT_DIR, cache_dir)
+
+    try:
+        ttl_hours = float(config.get(f"{namespace}_cache_ttl_hours", default_ttl_hours))
+    except (TypeError, ValueError):
+        ttl_hours = default_ttl_hours
+    try:
+        max_entries = int(config.get(f"{namespace}_cache_max_entries", default_max_entries))
+    except (TypeError, ValueError):
+        max_entries = default_max_entries
+
+    return ScoreCache(os.path.join(cache_dir, f"{namespace}_scores.json"), ttl_hours * 3600, max_entries)
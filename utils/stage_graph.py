@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+import queue
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.checkpoint import StageManifest, hash_inputs
+
+class Stage:
+    """
+    A single node in the pipeline graph
+
+    Args:
+        name (str): Unique stage name
+        func (Callable): Stage body. Receives the results dict of finished stages.
+            Coroutine functions are awaited, plain functions run in a worker thread.
+        deps (Iterable[str]): Names of the stages that must finish first
+        resource (str): Optional resource class ("network", "cpu", ...) whose
+            concurrency limit the stage must hold while running
+        stream_deps (Iterable[str]): Stages the stage reads through a StreamChannel.
+            It does not wait for them, but their results are part of its inputs.
+    """
+    def __init__(self, name: str, func: Callable, deps: Iterable[str] = (), resource: Optional[str] = None,
+                 stream_deps: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.resource = resource
+        self.stream_deps = list(stream_deps)
+
+class Fallback:
+    """
+    Wraps the value a stage returns after handling its own failure
+
+    The graph passes the wrapped value on to dependent stages, but neither the
+    stage nor anything downstream of it is recorded in the manifest, so a
+    resumed run executes them again.
+
+    Args:
+        value (Any): Fallback value handed to dependent stages
+    """
+    def __init__(self, value: Any):
+        self.value = value
+
+def unwrap(value: Any) -> Any:
+    """Returns the value inside a Fallback, or the value itself"""
+    return value.value if isinstance(value, Fallback) else value
+
+class StreamChannel:
+    """
+    Hands items from a producing stage to a consumer that starts before it finishes
+
+    The producer calls put() for every item and close() when done (also on
+    failure). The consumer iterates the channel from a worker thread. If the
+    producer stage never runs because its result was restored from the
+    manifest, the consumer falls back to the recorded result once it appears.
+
+    Args:
+        results (Dict[str, Any]): Results dict of the graph both stages belong to
+        source (str): Name of the producing stage
+        extract (Callable): Returns the full item list from the producer's result
+        poll_interval (float): Seconds between checks for a restored result
+    """
+    _CLOSED = object()
+
+    def __init__(self, results: Dict[str, Any], source: str, extract: Callable[[Any], List[Any]],
+                 poll_interval: float = 0.2):
+        self.results = results
+        self.source = source
+        self.extract = extract
+        self.poll_interval = poll_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+
+    def put(self, item: Any) -> None:
+        self._queue.put(item)
+
+    def close(self) -> None:
+        self._queue.put(self._CLOSED)
+
+    def __iter__(self) -> Iterator[Any]:
+        consumed = 0
+        while True:
+            try:
+                item = self._queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if self.source in self.results:
+                    # The producer was skipped: replay its recorded result
+                    yield from (self.extract(self.results[self.source]) or [])[consumed:]
+                    return
+                continue
+            if item is self._CLOSED:
+                return
+            consumed += 1
+            yield item
+
+class StageGraph:
+    """
+    Declarative stage graph executor
+
+    Stages whose dependencies are satisfied run concurrently; every stage starts
+    as soon as its own inputs are ready. After a run, per-stage durations and the
+    critical path are available for reporting.
+
+    Args:
+        log (Callable): Optional log function taking (message, is_error)
+        limits (Dict[str, asyncio.Semaphore]): Optional per-resource concurrency
+            limits, usually shared between several graphs running at once
+        manifest (StageManifest): Optional completion manifest. Stages already
+            recorded with the same inputs are skipped and their result reused.
+    """
+    def __init__(self, log: Optional[Callable[[str, bool], None]] = None,
+                 limits: Optional[Dict[str, asyncio.Semaphore]] = None,
+                 manifest: Optional[StageManifest] = None):
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self.skipped: List[str] = []
+        self.fallbacks: List[str] = []
+        self._finished: Dict[str, asyncio.Event] = {}
+        self.limits = limits or {}
+        self.manifest = manifest
+        self._log = log
+
+    def add(self, name: str, func: Callable, deps: Iterable[str] = (), resource: Optional[str] = None,
+            stream_deps: Iterable[str] = ()) -> "StageGraph":
+        """
+        Adds a stage to the graph
+
+        Args:
+            name (str): Unique stage name
+            func (Callable): Stage body
+            deps (Iterable[str]): Names of the stages this stage depends on
+            resource (str): Resource class used to look up a concurrency limit
+            stream_deps (Iterable[str]): Stages streamed into this one; not waited for,
+                but included in its manifest inputs
+
+        Returns:
+            StageGraph: The graph itself, so calls can be chained
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage already defined: {name}")
+        self.stages[name] = Stage(name, func, deps, resource, stream_deps)
+        return self
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            for dep in stage.deps + stage.stream_deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        # Kahn's algorithm, only to detect cycles
+        remaining = {name: len(stage.deps) for name, stage in self.stages.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            current = ready.pop()
+            visited += 1
+            for stage in self.stages.values():
+                if current in stage.deps:
+                    remaining[stage.name] -= 1
+                    if remaining[stage.name] == 0:
+                        ready.append(stage.name)
+        if visited != len(self.stages):
+            raise ValueError("Stage graph contains a cycle")
+
+    def log(self, message: str, is_error: bool = False) -> None:
+        if self._log:
+            self._log(message, is_error)
+        else:
+            logging.getLogger("merak_makinesi").info(message)
+
+    async def _call(self, stage: Stage) -> Any:
+        if asyncio.iscoroutinefunction(stage.func):
+            return await stage.func(self.results)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, stage.func, self.results)
+
+    def _inputs_hash(self, stage: Stage) -> str:
+        return hash_inputs({
+            "stage": stage.name,
+            "job": self.manifest.job if self.manifest else {},
+            "deps": {dep: self.results[dep] for dep in stage.deps + stage.stream_deps}
+        })
+
+    async def _run_stage(self, stage: Stage, started_at: float) -> None:
+        # A streamed input that is still being produced means the inputs are not known yet,
+        # so the stage cannot be matched against the manifest and simply runs
+        if self.manifest is not None and all(dep in self.results for dep in stage.stream_deps):
+            inputs_hash = self._inputs_hash(stage)
+            entry = self.manifest.completed_result(stage.name, inputs_hash)
+            if entry is not None:
+                now = time.monotonic() - started_at
+                self.results[stage.name] = entry.get("result")
+                self.timings[stage.name] = (now, now)
+                self.skipped.append(stage.name)
+                self.log(f"[stage] {stage.name}: already completed, reusing recorded result")
+                self._finished[stage.name].set()
+                return
+
+        limit = self.limits.get(stage.resource) if stage.resource else None
+        if limit is not None:
+            async with limit:
+                start = time.monotonic()
+                result = await self._call(stage)
+        else:
+            start = time.monotonic()
+            result = await self._call(stage)
+        end = time.monotonic()
+
+        # The producer closes its stream before it returns; its result is needed for the manifest inputs
+        for dep in stage.stream_deps:
+            await self._finished[dep].wait()
+
+        # Empty results (no videos, no audio) are fallbacks too, and so is anything built on one
+        failed = isinstance(result, Fallback) or not unwrap(result) or \
+            any(dep in self.fallbacks for dep in stage.deps + stage.stream_deps)
+        if failed:
+            self.fallbacks.append(stage.name)
+        self.results[stage.name] = unwrap(result)
+        self.timings[stage.name] = (start - started_at, end - started_at)
+
+        if self.manifest is not None and not failed:
+            self.manifest.record(stage.name, self._inputs_hash(stage), self.results[stage.name], end - start)
+        self._finished[stage.name].set()
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Runs every stage, starting each one as soon as its dependencies finish
+
+        Returns:
+            Dict[str, Any]: Stage results keyed by stage name
+
+        Raises:
+            Exception: The first exception raised by a stage. Stages that are
+                still running are cancelled and dependents are never started.
+        """
+        self._validate()
+        started_at = time.monotonic()
+        self._finished = {name: asyncio.Event() for name in self.stages}
+
+        pending = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dep in self.results for dep in stage.deps):
+                        task = asyncio.ensure_future(self._run_stage(stage, started_at))
+                        running[task] = name
+                        del pending[name]
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.pop(task)
+                    # Propagate the first failure right away
+                    task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+
+        return self.results
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """
+        Finds the longest chain of dependent stages by measured duration
+
+        Returns:
+            Tuple[List[str], float]: Stage names along the critical path and its total duration
+        """
+        durations = {name: end - start for name, (start, end) in self.timings.items()}
+        best: Dict[str, Tuple[float, List[str]]] = {}
+
+        def longest(name: str) -> Tuple[float, List[str]]:
+            if name in best:
+                return best[name]
+            own = durations.get(name, 0.0)
+            chain: Tuple[float, List[str]] = (own, [name])
+            for dep in self.stages[name].deps:
+                dep_total, dep_path = longest(dep)
+                if dep_total + own > chain[0]:
+                    chain = (dep_total + own, dep_path + [name])
+            best[name] = chain
+            return chain
+
+        paths = [longest(name) for name in self.stages if name in durations]
+        if not paths:
+            return [], 0.0
+        total, path = max(paths, key=lambda item: item[0])
+        return path, total
+
+    def report(self) -> None:
+        """Logs per-stage timings, total wall time and the critical path"""
+        if not self.timings:
+            return
+
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1][0]):
+            suffix = " [resumed]" if name in self.skipped else " [fallback]" if name in self.fallbacks else ""
+            self.log(f"[stage] {name}: {end - start:.2f}s (t={start:.2f}s -> {end:.2f}s){suffix}")
+
+        wall_time = max(end for _, end in self.timings.values())
+        serial_time = sum(end - start for start, end in self.timings.values())
+        path, path_time = self.critical_path()
+        self.log(f"[stage] Wall time: {wall_time:.2f}s, sum of stages: {serial_time:.2f}s")
+        self.log(f"[stage] Critical path ({path_time:.2f}s): {' -> '.join(path)}")
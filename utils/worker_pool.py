@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Blocking (thread-run) stages one job can have in flight at once, e.g. a streaming
+# TTS stage waiting on content while the content and keyword stages run
+BLOCKING_STAGES_PER_JOB = 4
+
+def default_stage_limits(workers: int, network_limit: Optional[int] = None, cpu_limit: Optional[int] = None) -> Dict[str, asyncio.Semaphore]:
+    """
+    Creates the shared concurrency limits used by pipeline stages
+
+    Network-bound stages (OpenAI, Pexels, downloads) mostly wait, so they get
+    a generous limit. CPU-bound FFmpeg stages already use several threads per
+    encode, so by default one slot is given per four cores.
+
+    Args:
+        workers (int): Number of concurrent video jobs
+        network_limit (int): Maximum concurrent network-bound stages
+        cpu_limit (int): Maximum concurrent FFmpeg stages
+
+    Returns:
+        Dict[str, asyncio.Semaphore]: Semaphores keyed by resource class
+    """
+    cpu_count = os.cpu_count() or 1
+    if network_limit is None:
+        network_limit = max(2, workers * 2)
+    if cpu_limit is None:
+        cpu_limit = max(1, cpu_count // 4)
+
+    return {
+        "network": asyncio.Semaphore(max(1, network_limit)),
+        "cpu": asyncio.Semaphore(max(1, cpu_limit)),
+    }
+
+async def run_worker_pool(produce_topic: Callable[[], str],
+                          process_topic: Callable[[str, Dict[str, asyncio.Semaphore]], Awaitable[Tuple[bool, Any]]],
+                          workers: int = 2,
+                          max_videos: Optional[int] = None,
+                          network_limit: Optional[int] = None,
+                          cpu_limit: Optional[int] = None) -> int:
+    """
+    Produces videos with several concurrent jobs fed from a topic queue
+
+    Args:
+        produce_topic (Callable): Blocking function returning a new topic (run in a thread)
+        process_topic (Callable): Coroutine function processing one topic with the shared limits,
+            returning (success, video_url)
+        workers (int): Number of concurrent video jobs
+        max_videos (int): Stop after this many successful videos (None for unlimited)
+        network_limit (int): Maximum concurrent network-bound stages
+        cpu_limit (int): Maximum concurrent FFmpeg stages
+
+    Returns:
+        int: Number of successfully produced videos
+    """
+    logger = logging.getLogger('merak_makinesi')
+    workers = max(1, workers)
+    limits = default_stage_limits(workers, network_limit, cpu_limit)
+
+    # Blocking stages run on the loop's default executor. Its stock size (min(32, cpu + 4))
+    # can be smaller than what the jobs hold at once: streaming TTS stages that wait for
+    # content would then occupy every thread and the content stages could never start.
+    # The pool is sized for every job plus the topic producer instead.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=workers * BLOCKING_STAGES_PER_JOB + 4, thread_name_prefix="stage"))
+
+    # Kuyruk küçük tutulur, böylece konular işlenmeden çok önce üretilmez
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    state = {"succeeded": 0, "in_flight": 0}
+    changed = asyncio.Condition()
+
+    def target_reached(include_in_flight: bool) -> bool:
+        if max_videos is None:
+            return False
+        done = state["succeeded"] + (state["in_flight"] + queue.qsize() if include_in_flight else 0)
+        return done >= max_videos
+
+    async def producer():
+        loop = asyncio.get_running_loop()
+        while True:
+            async with changed:
+                # Yeterli iş sıradaysa veya işleniyorsa yeni konu üretme
+                await changed.wait_for(lambda: not target_reached(include_in_flight=True) or target_reached(include_in_flight=False))
+            if target_reached(include_in_flight=False):
+                break
+
+            try:
+                async with limits["network"]:
+                    topic = await loop.run_in_executor(None, produce_topic)
+            except Exception as e:
+                logger.error(f"Konu üretme hatası: {str(e)}")
+                await asyncio.sleep(5)
+                continue
+
+            logger.info(f"Kuyruğa eklenen konu: {topic}")
+            await queue.put(topic)
+
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def worker(worker_id: int):
+        while True:
+            topic = await queue.get()
+            if topic is None:
+                break
+
+            async with changed:
+                state["in_flight"] += 1
+            try:
+                success, video_url = await process_topic(topic, limits)
+            except Exception as e:
+                logger.error(f"[worker {worker_id}] Video işleme hatası: {str(e)}", exc_info=True)
+                success, video_url = False, None
+
+            async with changed:
+                state["in_flight"] -= 1
+                if success:
+                    state["succeeded"] += 1
+                    logger.info(f"[worker {worker_id}] Video {state['succeeded']} tamamlandı. URL: {video_url}")
+                changed.notify_all()
+
+    logger.info(f"{workers} paralel video işi başlatılıyor...")
+    await asyncio.gather(producer(), *(worker(i + 1) for i in range(workers)))
+    return state["succeeded"]